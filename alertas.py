@@ -0,0 +1,291 @@
+"""
+Alertas de indicadores acima (ou abaixo) de limites, avaliados de forma
+incremental após cada atualização do dataset:
+
+    python alertas.py             # avalia a versão publicada e lista os alertas pendentes
+
+O motor guarda em SQLite (Config.ALERTAS_DB) os agregados base aditivos de
+cada Data × zona. A cada versão nova, apenas os dias reprocessados pela
+atualização (a partir do watermark anterior menos Config.JANELA_CORRECAO)
+são substituídos, lidos do cubo da versão, e apenas as janelas (dia ou
+competência) que contêm esses dias são reavaliadas pelas regras de
+Config.REGRAS_ALERTA. Quando o dataset base é regravado (carga completa ou
+compactação), os agregados são refeitos a partir do cubo inteiro.
+
+Cada alerta é gravado uma única vez por regra, período e zona enquanto a
+condição persistir; se ela deixar de valer e voltar a ocorrer, um novo
+alerta é gerado. A caixa de saída é consumida por ``drenar``.
+"""
+import datetime
+import operator
+import sqlite3
+import pandas as pd
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+from cache_dados import diretorio_cubo, ler_cache, ler_metadados, versao_dataset
+from config import Config, RegraAlerta
+from cubo import construir_cubo, ler_cubo
+from indicadores import derivar_indicadores
+from indicadores_lote import SOMAS_CUBO
+from snapshots import caminho_dataset, versao_atual
+
+
+OPERADORES: Dict[str, Callable[[Any, Any], Any]] = {'>': operator.gt, '<': operator.lt}
+
+# Indicadores derivados apenas de somas e contagens aditivas entre dias e zonas
+INDICADORES_ALERTA: List[str] = [
+    'entregas', 'valor_nf_total', 'valor_frete_total', 'ticket_medio', 'frete_gratis_perc',
+    'devolucoes_perc', 'entregas_viradas_perc', 'perc_acima', 'tempo_ciclo_medio_seg', 'tempo_rota_medio_seg',
+]
+
+ESQUEMA = f"""
+CREATE TABLE IF NOT EXISTS agregados (Data TEXT NOT NULL, zona TEXT, {', '.join(f'{coluna} REAL' for coluna in SOMAS_CUBO)});
+CREATE INDEX IF NOT EXISTS agregados_data ON agregados (Data);
+CREATE TABLE IF NOT EXISTS controle (chave TEXT PRIMARY KEY, valor TEXT);
+CREATE TABLE IF NOT EXISTS ativos (chave TEXT PRIMARY KEY, desde TEXT NOT NULL);
+CREATE TABLE IF NOT EXISTS saida (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    chave TEXT NOT NULL,
+    regra TEXT NOT NULL,
+    janela TEXT NOT NULL,
+    periodo TEXT NOT NULL,
+    zona TEXT,
+    indicador TEXT NOT NULL,
+    valor REAL,
+    limite REAL,
+    criado_em TEXT NOT NULL,
+    enviado_em TEXT
+);
+CREATE INDEX IF NOT EXISTS saida_pendentes ON saida (enviado_em);
+"""
+
+
+def conectar(banco: Path = Config.ALERTAS_DB) -> sqlite3.Connection:
+    """Abre o banco de alertas, criando as tabelas se necessário."""
+    banco.parent.mkdir(parents=True, exist_ok=True)
+    conexao = sqlite3.connect(banco, timeout=30)
+    conexao.row_factory = sqlite3.Row
+    conexao.executescript(ESQUEMA)
+    return conexao
+
+
+def validar_regra(regra: RegraAlerta) -> None:
+    """Verifica se a regra usa indicador, operador e janela suportados."""
+    if regra.indicador not in INDICADORES_ALERTA:
+        raise ValueError(f"Regra {regra.nome}: indicador {regra.indicador} não suportado nos alertas.")
+    if regra.operador not in OPERADORES:
+        raise ValueError(f"Regra {regra.nome}: operador {regra.operador} inválido.")
+    if regra.janela not in ('dia', 'competencia'):
+        raise ValueError(f"Regra {regra.nome}: janela {regra.janela} inválida.")
+    if (regra.limite is None) == (regra.limite_regiao is None):
+        raise ValueError(f"Regra {regra.nome}: informe limite ou limite_regiao.")
+
+
+def _agregados_diarios(versao: str, desde: Optional[datetime.date]) -> pd.DataFrame:
+    """Somas aditivas por Data × zona dos dias a partir de ``desde`` (todos sem ``desde``), lidas do cubo."""
+    cache = caminho_dataset(versao)
+    cubo = ler_cubo(versao_dataset(cache), diretorio_cubo(cache))
+    if cubo is None:
+        cubo = construir_cubo(ler_cache(cache, data_inicial=desde))
+    if cubo is None:
+        raise ValueError(f"Não foi possível montar o cubo da versão {versao}.")
+
+    celulas = cubo[0]
+    if desde is not None:
+        celulas = celulas[celulas['Data'] >= pd.Timestamp(desde)]
+    diario = (celulas.groupby(['Data', 'zona'], dropna=False, observed=True)[list(SOMAS_CUBO.values())]
+              .sum().reset_index())
+    diario.columns = ['Data', 'zona'] + list(SOMAS_CUBO)
+    diario['Data'] = diario['Data'].dt.strftime('%Y-%m-%d')
+    diario['zona'] = diario['zona'].astype(object).where(diario['zona'].notna(), None)
+    return diario
+
+
+def _indicadores_janela(agregados: pd.DataFrame, chaves: List[str]) -> pd.DataFrame:
+    """Soma os agregados diários por janela e deriva os indicadores com as fórmulas do dashboard."""
+    base = agregados.groupby(chaves, dropna=False)[list(SOMAS_CUBO)].sum()
+    # Viagens e motoqueiros distintos não são aditivos: as regras não os usam
+    base = base.assign(viagens=0, viagens_3p=0, motoqueiros_count=0)
+    indicadores = pd.DataFrame(derivar_indicadores(base, None), index=base.index)
+    indicadores['tempo_ciclo_medio_seg'] = base['ciclo_soma_ns'] / base['ciclo_n'].where(base['ciclo_n'] != 0) / 1e9
+    indicadores['tempo_rota_medio_seg'] = base['rota_soma_ns'] / base['rota_n'].where(base['rota_n'] != 0) / 1e9
+    return indicadores.reset_index()
+
+
+def _limites(regra: RegraAlerta, zonas: pd.Series) -> pd.Series:
+    """Limite da regra para cada linha (NaN para zonas sem parâmetros cadastrados)."""
+    if regra.limite is not None:
+        return pd.Series(float(regra.limite), index=zonas.index)
+
+    def limite_zona(zona: Any) -> float:
+        parametros = Config.PARAMETROS_REGIAO.get(zona)
+        if parametros is None:
+            return float('nan')
+        valor = getattr(parametros, regra.limite_regiao)
+        return pd.to_timedelta(valor).total_seconds() if isinstance(valor, str) else float(valor)
+
+    return zonas.map(limite_zona).astype(float)
+
+
+def avaliar_regra(regra: RegraAlerta, agregados: pd.DataFrame, periodos: Iterable[str]) -> pd.DataFrame:
+    """
+    Avalia uma regra nas janelas informadas.
+
+    Args:
+        regra: regra de alerta
+        agregados: agregados diários das competências que contêm as janelas
+        periodos: janelas a avaliar ("AAAA-MM-DD" por dia, "AAAA-MM" por competência)
+
+    Returns:
+        Uma linha por janela (e zona) avaliada, com valor, limite e a coluna
+        booleana "violada"
+    """
+    agregados = agregados.assign(periodo=agregados['Data'] if regra.janela == 'dia' else agregados['Data'].str[:7])
+    agregados = agregados[agregados['periodo'].isin(set(periodos))]
+    chaves = ['periodo', 'zona'] if regra.por_zona else ['periodo']
+    janelas = _indicadores_janela(agregados, chaves)
+    if not regra.por_zona:
+        janelas['zona'] = None
+
+    janelas['valor'] = janelas[regra.indicador]
+    janelas['limite'] = _limites(regra, janelas['zona'])
+    janelas['violada'] = (OPERADORES[regra.operador](janelas['valor'], janelas['limite'])
+                          & (janelas['entregas'] >= regra.minimo_entregas))
+    janelas['chave'] = regra.nome + '|' + janelas['periodo'] + '|' + janelas['zona'].fillna('*').astype(str)
+    return janelas[['chave', 'periodo', 'zona', 'valor', 'limite', 'entregas', 'violada']]
+
+
+def _ler_controle(conexao: sqlite3.Connection) -> Dict[str, str]:
+    return {linha['chave']: linha['valor'] for linha in conexao.execute("SELECT chave, valor FROM controle")}
+
+
+def avaliar_alertas(versao: Optional[str] = None, regras: Optional[List[RegraAlerta]] = None,
+                    banco: Path = Config.ALERTAS_DB) -> int:
+    """
+    Incorpora aos agregados os dias reprocessados pela versão e avalia as
+    regras nas janelas afetadas, gravando os alertas novos na caixa de saída.
+
+    Args:
+        versao: versão do dataset; a publicada por padrão
+        regras: regras de alerta; Config.REGRAS_ALERTA por padrão
+        banco: banco SQLite do motor de alertas
+
+    Returns:
+        Quantidade de alertas novos
+    """
+    versao = versao or versao_atual()
+    regras = Config.REGRAS_ALERTA if regras is None else regras
+    for regra in regras:
+        validar_regra(regra)
+    metadados = ler_metadados(caminho_dataset(versao)) if versao else None
+    if metadados is None:
+        return 0
+
+    conexao = conectar(banco)
+    try:
+        controle = _ler_controle(conexao)
+        if controle.get('versao') == versao:
+            return 0
+
+        # Mesma base já processada: só os dias da janela de reprocessamento podem ter mudado
+        base = str(metadados.get("base_gravada_em"))
+        desde = None
+        if controle.get('base') == base and controle.get('watermark'):
+            desde = (pd.Timestamp(controle['watermark']) - Config.JANELA_CORRECAO).date()
+        diario = _agregados_diarios(versao, desde)
+
+        agora = datetime.datetime.now().isoformat(timespec='seconds')
+        novos = 0
+        with conexao:
+            if desde is None:
+                conexao.execute("DELETE FROM agregados")
+            else:
+                conexao.execute("DELETE FROM agregados WHERE Data >= ?", (desde.isoformat(),))
+            colunas = list(diario.columns)
+            conexao.executemany(
+                f"INSERT INTO agregados ({', '.join(colunas)}) VALUES ({', '.join('?' * len(colunas))})",
+                diario.itertuples(index=False, name=None))
+
+            # Agregados das competências afetadas (cobrem também as janelas diárias)
+            dias = sorted(diario['Data'].unique())
+            competencias = sorted({dia[:7] for dia in dias})
+            agregados = pd.read_sql_query(
+                f"SELECT * FROM agregados WHERE substr(Data, 1, 7) IN ({', '.join('?' * len(competencias))})",
+                conexao, params=competencias) if competencias else diario.iloc[0:0]
+
+            for regra in regras:
+                periodos = dias if regra.janela == 'dia' else competencias
+                janelas = avaliar_regra(regra, agregados, periodos)
+                ativas = {linha['chave'] for linha in conexao.execute(
+                    "SELECT chave FROM ativos WHERE chave LIKE ?", (regra.nome + '|%',))}
+
+                for janela in janelas[janelas['violada'] & ~janelas['chave'].isin(ativas)].itertuples(index=False):
+                    conexao.execute("INSERT INTO ativos (chave, desde) VALUES (?, ?)", (janela.chave, agora))
+                    conexao.execute(
+                        "INSERT INTO saida (chave, regra, janela, periodo, zona, indicador, valor, limite, criado_em) "
+                        "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                        (janela.chave, regra.nome, regra.janela, janela.periodo, janela.zona, regra.indicador,
+                         float(janela.valor), float(janela.limite), agora))
+                    novos += 1
+
+                normalizadas = janelas.loc[~janelas['violada'] & janelas['chave'].isin(ativas), 'chave']
+                conexao.executemany("DELETE FROM ativos WHERE chave = ?", ((chave,) for chave in normalizadas))
+
+            conexao.executemany("INSERT OR REPLACE INTO controle (chave, valor) VALUES (?, ?)", [
+                ('versao', versao), ('base', base), ('watermark', metadados.get("watermark") or ''),
+            ])
+        return novos
+    finally:
+        conexao.close()
+
+
+def pendentes(banco: Path = Config.ALERTAS_DB, limite: int = 100) -> List[Dict[str, Any]]:
+    """Alertas ainda não enviados, do mais antigo para o mais recente."""
+    conexao = conectar(banco)
+    try:
+        linhas = conexao.execute("SELECT * FROM saida WHERE enviado_em IS NULL ORDER BY id LIMIT ?", (limite,))
+        return [dict(linha) for linha in linhas]
+    finally:
+        conexao.close()
+
+
+def drenar(enviar: Callable[[Dict[str, Any]], Any], banco: Path = Config.ALERTAS_DB) -> int:
+    """
+    Entrega os alertas pendentes ao notificador, marcando cada um como
+    enviado logo após o envio. Uma falha interrompe a drenagem; o alerta que
+    falhou e os seguintes continuam pendentes.
+
+    Args:
+        enviar: envia um alerta (ex.: por e-mail); deve lançar exceção em caso de falha
+        banco: banco SQLite do motor de alertas
+
+    Returns:
+        Quantidade de alertas enviados
+    """
+    enviados = 0
+    conexao = conectar(banco)
+    try:
+        while True:
+            lote = pendentes(banco)
+            if not lote:
+                return enviados
+            for alerta in lote:
+                try:
+                    enviar(alerta)
+                except Exception as e:
+                    print(f"Erro ao enviar alerta {alerta['id']}: {e}")
+                    return enviados
+                with conexao:
+                    conexao.execute("UPDATE saida SET enviado_em = ? WHERE id = ?",
+                                    (datetime.datetime.now().isoformat(timespec='seconds'), alerta['id']))
+                enviados += 1
+    finally:
+        conexao.close()
+
+
+if __name__ == "__main__":
+    print(f"Alertas novos: {avaliar_alertas()}")
+    for alerta in pendentes():
+        print(f"[{alerta['criado_em']}] {alerta['regra']} {alerta['periodo']} {alerta['zona'] or 'todas as zonas'}: "
+              f"{alerta['indicador']} = {alerta['valor']:.2f} (limite {alerta['limite']:.2f})")
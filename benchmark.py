@@ -0,0 +1,212 @@
+"""
+Benchmark do pipeline do dashboard, executado sem a interface:
+
+    python benchmark.py --linhas 10000 100000 1000000 --repeticoes 3
+
+Para cada volume, gera (ou reaproveita) entregas sintéticas com
+``gerador_dados`` e mede separadamente o tempo e o pico de memória de cada
+etapa: ingestão da origem no cache (com o esquema de ingestão), carga do
+cache já processado, filtros e indicadores - a partir das linhas e pelos
+caminhos alternativos usados pela interface (índice de filtros e cubo). Os
+resultados são gravados em JSON para comparar execuções e detectar
+regressões.
+"""
+import argparse
+import datetime
+import gc
+import json
+import os
+import platform
+import shutil
+import statistics
+import subprocess
+import tempfile
+import time
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+from cache_dados import diretorio_cubo, ler_cache, recarregar_completo, versao_dataset
+from config import Config
+from cubo import calcular_indicadores_cubo, ler_cubo
+from custos import ModeloCustos, rollup_diario
+from fontes import FonteDados, FonteExcel, FonteSQLite
+from gerador_dados import MAX_LINHAS_EXCEL, gerar_arquivo, gerar_custos
+from indicadores import calcular_indicadores
+from indice_filtros import IndiceFiltros
+from metricas import MedidorMemoria
+from processamento import aplicar_filtros
+
+
+def medir(etapa: str, funcao: Callable[[Any], Any], entrada: Optional[Callable[[], Any]] = None,
+          repeticoes: int = 1) -> Dict[str, Any]:
+    """
+    Mede o tempo e o pico de memória de uma etapa.
+
+    Args:
+        etapa: nome da etapa no resultado
+        funcao: etapa a medir; recebe o valor produzido por ``entrada``
+        entrada: prepara a entrada de cada repetição fora da medição (ex.: cópia
+            de um DataFrame que a etapa altera)
+        repeticoes: quantidade de execuções; a memória é medida na primeira
+
+    Returns:
+        Dicionário com etapa, tempos (mínimo e mediana), memória e o resultado
+        da primeira execução (chave "resultado", removida antes de gravar)
+    """
+    tempos = []
+    resultado = None
+    medidor = MedidorMemoria()
+    for repeticao in range(max(repeticoes, 1)):
+        argumento = entrada() if entrada else None
+        gc.collect()
+        if repeticao == 0:
+            with medidor:
+                inicio = time.perf_counter()
+                resultado = funcao(argumento)
+                tempos.append(time.perf_counter() - inicio)
+        else:
+            inicio = time.perf_counter()
+            funcao(argumento)
+            tempos.append(time.perf_counter() - inicio)
+        del argumento
+
+    return {
+        "etapa": etapa,
+        "segundos": min(tempos),
+        "segundos_mediana": statistics.median(tempos),
+        "repeticoes": len(tempos),
+        "pico_memoria_mb": medidor.pico_mb(),
+        "memoria_adicional_mb": medidor.adicional_mb(),
+        "resultado": resultado,
+    }
+
+
+def filtros_benchmark(df: pd.DataFrame) -> Dict[str, Any]:
+    """Filtro representativo: os últimos 30 dias dos dados em duas zonas."""
+    data_final = df['Data'].max().date()
+    zonas = sorted(df['zona'].dropna().unique())[:2]
+    return {
+        "data_inicial": data_final - datetime.timedelta(days=29),
+        "data_final": data_final,
+        "zonas": list(zonas),
+        "motoqueiros": [],
+        "clientes": [],
+        "vendedores": [],
+    }
+
+
+def preparar_origem(linhas: int, formato: str, diretorio: Path, semente: int, dias: int) -> FonteDados:
+    """Gera a origem sintética (ou reaproveita a gerada antes com os mesmos parâmetros)."""
+    extensao = {'sqlite': 'sqlite', 'excel': 'xlsx'}[formato]
+    caminho = diretorio / f"entregas-{linhas}-s{semente}-d{dias}.{extensao}"
+    if not caminho.exists():
+        print(f"Gerando {linhas} entregas em {caminho}...")
+        temporario = caminho.with_name(f"tmp-{caminho.name}")
+        gerar_arquivo(linhas, temporario, semente=semente, dias=dias)
+        os.replace(temporario, caminho)
+    return FonteSQLite(caminho) if formato == 'sqlite' else FonteExcel(caminho)
+
+
+def executar_benchmark(linhas: int, formato: str = 'sqlite', repeticoes: int = 1, semente: int = 42,
+                       dias: int = 365, diretorio: Path = Config.BENCHMARK_DIR) -> List[Dict[str, Any]]:
+    """
+    Executa todas as etapas para um volume de entregas.
+
+    Returns:
+        Um registro por etapa (ver ``medir``), sem o resultado das etapas
+    """
+    diretorio.mkdir(parents=True, exist_ok=True)
+    fonte = preparar_origem(linhas, formato, diretorio, semente, dias)
+    custos = gerar_custos(dias=dias, semente=semente)
+    trabalho = Path(tempfile.mkdtemp(prefix='execucao-', dir=diretorio))
+    cache = trabalho / Config.NOME_DATASET
+    registros = []
+
+    def registrar(registro: Dict[str, Any]) -> Any:
+        resultado = registro.pop("resultado")
+        registro["linhas"] = linhas
+        registros.append(registro)
+        print(f"  {registro['etapa']:<22} {registro['segundos']:>9.3f} s  "
+              f"pico {registro['pico_memoria_mb'] or 0:>9.1f} MB  (+{registro['memoria_adicional_mb'] or 0:.1f} MB)")
+        return resultado
+
+    try:
+        # A ingestão regrava o cache inteiro: medida uma única vez
+        registrar(medir("ingestao", lambda _: recarregar_completo(fonte, cache)))
+        # O cache guarda as entregas já processadas: a carga não faz conversões
+        preparado = registrar(medir("carregar_dados", lambda _: ler_cache(cache), repeticoes=repeticoes))
+        filtros = filtros_benchmark(preparado)
+        filtrado = registrar(medir("aplicar_filtros", lambda _: aplicar_filtros(preparado, filtros),
+                                   repeticoes=repeticoes))
+        modelo = registrar(medir("modelo_custos", lambda _: ModeloCustos(custos, rollup_diario(preparado))))
+        registrar(medir("calcular_indicadores",
+                        lambda _: calcular_indicadores(filtrado, modelo, filtros["data_inicial"], filtros["data_final"]),
+                        repeticoes=repeticoes))
+
+        # Caminhos usados pela interface
+        indice = registrar(medir("construir_indice", lambda _: IndiceFiltros(preparado)))
+        registrar(medir("filtrar_indice", lambda _: indice.filtrar(filtros), repeticoes=repeticoes))
+        cubo = ler_cubo(versao_dataset(cache), diretorio_cubo(cache))
+        if cubo is not None:
+            registrar(medir("indicadores_cubo",
+                            lambda _: calcular_indicadores_cubo(cubo[0], cubo[1], filtros, modelo),
+                            repeticoes=repeticoes))
+    finally:
+        shutil.rmtree(trabalho, ignore_errors=True)
+    return registros
+
+
+def ambiente() -> Dict[str, Any]:
+    """Descreve o ambiente da execução, para comparar resultados entre máquinas e versões."""
+    try:
+        commit = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                                check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {
+        "python": platform.python_version(),
+        "plataforma": platform.platform(),
+        "processadores": os.cpu_count(),
+        "pandas": pd.__version__,
+        "numpy": np.__version__,
+        "pyarrow": pa.__version__,
+        "commit": commit,
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Mede o tempo e a memória de cada etapa do pipeline.")
+    parser.add_argument('--linhas', type=int, nargs='+', default=[10_000, 100_000],
+                        help="volumes de entregas a medir (ex.: 10000 100000 1000000 10000000)")
+    parser.add_argument('--formato', choices=['sqlite', 'excel'], default='sqlite',
+                        help="origem lida na ingestão")
+    parser.add_argument('--repeticoes', type=int, default=3)
+    parser.add_argument('--dias', type=int, default=365, help="dias cobertos pelas entregas sintéticas")
+    parser.add_argument('--semente', type=int, default=42)
+    parser.add_argument('--saida', type=Path, default=None, help="arquivo JSON de resultados")
+    argumentos = parser.parse_args()
+
+    if argumentos.formato == 'excel' and max(argumentos.linhas) > MAX_LINHAS_EXCEL:
+        parser.error(f"O formato excel comporta no máximo {MAX_LINHAS_EXCEL} linhas.")
+
+    executado_em = datetime.datetime.now()
+    saida = argumentos.saida or Config.BENCHMARK_DIR / f"benchmark-{executado_em.strftime('%Y%m%d-%H%M%S')}.json"
+    resultados = []
+    for linhas in argumentos.linhas:
+        print(f"Benchmark com {linhas} entregas ({argumentos.formato}):")
+        resultados.extend(executar_benchmark(linhas, argumentos.formato, argumentos.repeticoes,
+                                             argumentos.semente, argumentos.dias))
+
+    saida.parent.mkdir(parents=True, exist_ok=True)
+    with open(saida, 'w', encoding='utf-8') as arquivo:
+        json.dump({
+            "executado_em": executado_em.isoformat(),
+            "ambiente": ambiente(),
+            "parametros": {"formato": argumentos.formato, "repeticoes": argumentos.repeticoes,
+                           "dias": argumentos.dias, "semente": argumentos.semente},
+            "resultados": resultados,
+        }, arquivo, ensure_ascii=False, indent=2)
+    print(f"Resultados gravados em {saida}")
@@ -0,0 +1,538 @@
+import datetime
+import json
+import os
+import shutil
+import pandas as pd
+import pyarrow as pa
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+from pyarrow import fs
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Union
+
+from catalogo import construir_catalogo, gravar_catalogo, ler_catalogo
+from config import Config
+from cubo import materializar_cubo
+from fontes import FonteDados, Progresso, como_fonte, unificar_esquemas
+from metricas import etapa
+from processamento import COLUNAS_CATEGORICAS, aplicar_esquema, processar_entregas
+
+
+def caminho_metadados(cache: Path) -> Path:
+    """Retorna o arquivo de metadados que acompanha o dataset de cache."""
+    return cache.with_suffix('.meta.json')
+
+
+def ler_metadados(cache: Path) -> Optional[Dict[str, Any]]:
+    """Lê os metadados do cache; retorna None se não existirem ou estiverem corrompidos."""
+    try:
+        with open(caminho_metadados(cache), encoding='utf-8') as arquivo:
+            return json.load(arquivo)
+    except (OSError, ValueError):
+        return None
+
+
+def gravar_metadados(cache: Path, metadados: Dict[str, Any]) -> None:
+    """Grava os metadados do cache de forma atômica."""
+    destino = caminho_metadados(cache)
+    temporario = destino.with_name(destino.name + '.tmp')
+    with open(temporario, 'w', encoding='utf-8') as arquivo:
+        json.dump(metadados, arquivo, ensure_ascii=False, indent=2)
+    os.replace(temporario, destino)
+
+
+def versao_dataset(cache: Path) -> Optional[str]:
+    """
+    Identificador da versão atual do dataset: versão do cache mais o hash
+    da origem a partir da qual ele foi gerado. Serve de chave para os dados
+    derivados (cubo, caches de indicadores).
+    """
+    metadados = ler_metadados(cache)
+    if metadados is None or not metadados.get("origem", {}).get("sha256"):
+        return None
+    return f"{metadados.get('versao_cache')}-{metadados['origem']['sha256'][:16]}"
+
+
+# Origem: uma FonteDados ou o caminho de uma planilha
+Origem = Union[FonteDados, Path]
+
+
+def cache_valido(origem: Origem, cache: Path) -> bool:
+    """
+    Verifica se o cache parquet corresponde à versão atual da origem.
+
+    A conferência é feita pela fonte (ver ``FonteDados.conferir``); para a
+    planilha, tamanho e mtime iguais aos registrados validam o cache sem ler
+    a origem. Se a impressão digital mudou apenas em campos auxiliares (como
+    o mtime), a registrada é atualizada.
+    """
+    metadados = ler_metadados(cache)
+    if not cache.exists() or metadados is None:
+        return False
+    if metadados.get("versao_cache") != Config.VERSAO_CACHE:
+        return False
+
+    origem_info = metadados.get("origem", {})
+    atual = como_fonte(origem).conferir(origem_info)
+    if atual is None:
+        return False
+
+    if atual != origem_info:
+        metadados["origem"] = atual
+        gravar_metadados(cache, metadados)
+    return True
+
+
+def particionamento() -> ds.Partitioning:
+    """Particionamento hive do cache (Config.PARTICOES): competencia inteira (AAAAMM), demais chaves como texto."""
+    tipos = {'competencia': pa.int32()}
+    return ds.partitioning(pa.schema([(coluna, tipos.get(coluna, pa.string())) for coluna in Config.PARTICOES]), flavor='hive')
+
+
+def filtro_dataset(data_inicial: Optional[datetime.date] = None, data_final: Optional[datetime.date] = None,
+                   zonas: Optional[Sequence[str]] = None) -> Optional[ds.Expression]:
+    """
+    Monta o predicado empurrado para a leitura do dataset.
+
+    O intervalo de competências poda as partições inteiras; o filtro por
+    ``Data`` e ``zona`` usa as estatísticas dos row groups de cada arquivo.
+    """
+    filtro = None
+
+    def combinar(expressao: ds.Expression) -> None:
+        nonlocal filtro
+        filtro = expressao if filtro is None else filtro & expressao
+
+    if data_inicial is not None:
+        combinar(ds.field('competencia') >= data_inicial.year * 100 + data_inicial.month)
+        combinar(ds.field('Data') >= pa.scalar(pd.Timestamp(data_inicial), pa.timestamp('ns')))
+    if data_final is not None:
+        combinar(ds.field('competencia') <= data_final.year * 100 + data_final.month)
+        combinar(ds.field('Data') <= pa.scalar(pd.Timestamp(data_final), pa.timestamp('ns')))
+    if zonas:
+        combinar(ds.field('zona').isin(list(zonas)))
+    return filtro
+
+
+def ler_parquet(caminho: Path, filtro: Optional[ds.Expression] = None,
+                colunas: Optional[List[str]] = None) -> pd.DataFrame:
+    """
+    Lê um dataset particionado com memory map, aplicando filtro e projeção de
+    colunas na leitura. As colunas categóricas são lidas como dicionário e já
+    chegam ao pandas como categóricas.
+    """
+    if not any(caminho.rglob('*.parquet')):
+        return pd.DataFrame(columns=colunas) if colunas else pd.DataFrame()
+    formato = ds.ParquetFileFormat(read_options=ds.ParquetReadOptions(dictionary_columns=COLUNAS_CATEGORICAS))
+    dataset = ds.dataset(caminho, format=formato, partitioning=particionamento(),
+                         filesystem=fs.LocalFileSystem(use_mmap=True))
+    return dataset.to_table(filter=filtro, columns=colunas).to_pandas()
+
+
+def diretorio_fragmentos(cache: Path) -> Path:
+    """Retorna o diretório dos fragmentos incrementais do cache."""
+    return cache.with_name(cache.stem + '_delta')
+
+
+def diretorio_cubo(cache: Path) -> Path:
+    """Retorna o diretório do cubo diário materializado a partir do cache."""
+    return cache.with_name(cache.stem + '_cubo')
+
+
+def caminho_catalogo(cache: Path) -> Path:
+    """Retorna o arquivo do catálogo de dimensões que acompanha o dataset de cache."""
+    return cache.with_suffix('.catalogo.json')
+
+
+def diretorio_quarentena(cache: Path) -> Path:
+    """Retorna o diretório das linhas rejeitadas pelo esquema de ingestão (ver ``processar_entregas``)."""
+    return cache.with_name(cache.stem + '_quarentena')
+
+
+def gravar_quarentena(cache: Path, quarentena: pd.DataFrame, nome: str) -> int:
+    """
+    Grava as linhas rejeitadas de uma ingestão em um arquivo da quarentena.
+    Os valores originais são gravados como texto, com o motivo e o momento
+    da ingestão.
+
+    Returns:
+        Número de linhas gravadas
+    """
+    if quarentena.empty:
+        return 0
+    diretorio = diretorio_quarentena(cache)
+    diretorio.mkdir(parents=True, exist_ok=True)
+    textos = quarentena.astype(object).where(quarentena.notna(), None).astype('string')
+    textos['ingerido_em'] = datetime.datetime.now().isoformat(timespec='seconds')
+    pq.write_table(pa.Table.from_pandas(textos, preserve_index=False), diretorio / f"{nome}.parquet")
+    return len(quarentena)
+
+
+def ler_quarentena(cache: Path) -> pd.DataFrame:
+    """
+    Lê todas as linhas em quarentena do dataset. Linhas rejeitadas de novo
+    dentro da janela de reprocessamento aparecem uma vez por ingestão.
+    """
+    arquivos = sorted(diretorio_quarentena(cache).glob('*.parquet'))
+    if not arquivos:
+        return pd.DataFrame()
+    return pd.concat([pd.read_parquet(arquivo) for arquivo in arquivos], ignore_index=True)
+
+
+def calcular_watermark(df: pd.DataFrame) -> Optional[str]:
+    """Retorna o maior data_hora_nf do DataFrame em formato ISO (None se não houver)."""
+    if 'data_hora_nf' not in df.columns:
+        return None
+    maximo = pd.to_datetime(df['data_hora_nf'], errors='coerce').max()
+    return None if pd.isnull(maximo) else maximo.isoformat()
+
+
+def ler_cache(cache: Path, data_inicial: Optional[datetime.date] = None, data_final: Optional[datetime.date] = None,
+              zonas: Optional[Sequence[str]] = None, colunas: Optional[List[str]] = None) -> pd.DataFrame:
+    """
+    Lê o cache: dataset base mais fragmentos incrementais.
+
+    Os filtros de data e zona são empurrados para a leitura, de modo que só
+    as competências (e zonas, se particionadas) selecionadas saem do disco.
+
+    Cada fragmento substitui, nos dados acumulados até ele, todas as linhas
+    com data_hora_nf posterior ao seu limite ``desde`` - é assim que as
+    correções dentro da janela de reprocessamento sobrescrevem as versões
+    antigas das mesmas entregas.
+
+    Args:
+        cache: diretório do dataset de cache
+        data_inicial: primeira data (coluna Data) a carregar
+        data_final: última data (coluna Data) a carregar
+        zonas: zonas a carregar; vazio carrega todas
+        colunas: projeção de colunas; None carrega todas
+
+    Returns:
+        DataFrame com as linhas selecionadas
+    """
+    filtro = filtro_dataset(data_inicial, data_final, zonas)
+    metadados = ler_metadados(cache) or {}
+    fragmentos = metadados.get("fragmentos", [])
+
+    # data_hora_nf é necessária para aplicar a substituição dos fragmentos
+    leitura = colunas
+    if colunas is not None and fragmentos and 'data_hora_nf' not in colunas:
+        leitura = list(colunas) + ['data_hora_nf']
+
+    partes = [ler_parquet(cache, filtro, leitura)]
+    for fragmento in fragmentos:
+        desde = pd.Timestamp(fragmento["desde"])
+        partes = [parte[~(parte['data_hora_nf'] > desde)] if 'data_hora_nf' in parte.columns else parte
+                  for parte in partes]
+        partes.append(ler_parquet(diretorio_fragmentos(cache) / fragmento["arquivo"], filtro, leitura))
+
+    partes = [parte for parte in partes if not parte.empty] or partes[:1]
+    df = partes[0] if len(partes) == 1 else pd.concat(partes, ignore_index=True)
+    # Partições e concatenações podem desfazer as categóricas; o esquema é reaplicado
+    df = aplicar_esquema(df)
+    return df[colunas] if leitura is not colunas else df
+
+
+def _gravar_parquet(dados: Union[pd.DataFrame, ds.Dataset], destino: Path) -> None:
+    """
+    Grava o DataFrame (ou dataset Arrow, lido em streaming) como dataset
+    particionado em diretório temporário e o move para o destino.
+    """
+    destino.parent.mkdir(parents=True, exist_ok=True)
+    temporario = destino.with_name(destino.name + '.tmp')
+    shutil.rmtree(temporario, ignore_errors=True)
+    temporario.mkdir()
+    if isinstance(dados, pd.DataFrame):
+        dados = None if dados.empty else pa.Table.from_pandas(dados, preserve_index=False)
+    if dados is not None:
+        ds.write_dataset(dados, temporario, format='parquet',
+                         partitioning=particionamento(), existing_data_behavior='overwrite_or_ignore')
+
+    antigo = destino.with_name(destino.name + '.old')
+    if destino.exists():
+        os.replace(destino, antigo)
+    os.replace(temporario, destino)
+    shutil.rmtree(antigo, ignore_errors=True)
+
+
+def gravar_cache(df: pd.DataFrame, origem: Origem, cache: Path,
+                 impressao: Optional[Dict[str, Any]] = None) -> None:
+    """
+    Grava o dataset base completo e seus metadados, descartando os fragmentos
+    incrementais. ``impressao`` é a impressão digital da origem tomada antes
+    da leitura; sem ela, a impressão é tomada agora.
+    """
+    _gravar_parquet(df, cache)
+    _registrar_base(cache, impressao or como_fonte(origem).impressao_digital(), len(df), calcular_watermark(df))
+
+
+def _registrar_base(cache: Path, impressao: Dict[str, Any], linhas: int, watermark: Optional[str],
+                    quarentena: Optional[int] = None) -> None:
+    """Grava os metadados de um dataset base recém-gravado e descarta os fragmentos incrementais."""
+    metadados_antigos = ler_metadados(cache) or {}
+    gravar_metadados(cache, {
+        "versao_cache": Config.VERSAO_CACHE,
+        "origem": impressao,
+        "linhas": linhas,
+        "linhas_quarentena": metadados_antigos.get("linhas_quarentena", 0) if quarentena is None else quarentena,
+        "watermark": watermark,
+        "fragmentos": [],
+        # Identifica a regravação do dataset base (leitores incrementais, como os alertas, recomeçam do zero)
+        "base_gravada_em": datetime.datetime.now().isoformat(),
+    })
+    for fragmento in metadados_antigos.get("fragmentos", []):
+        shutil.rmtree(diretorio_fragmentos(cache) / fragmento["arquivo"], ignore_errors=True)
+
+
+def _tabela_lote(df: pd.DataFrame) -> pa.Table:
+    """
+    Converte um lote processado em tabela Arrow. As colunas categóricas são
+    gravadas como texto, pois cada lote tem o seu próprio dicionário; o tipo
+    categórico é reaplicado na leitura (``aplicar_esquema``).
+    """
+    tabela = pa.Table.from_pandas(df, preserve_index=False).replace_schema_metadata(None)
+    for posicao, campo in enumerate(tabela.schema):
+        if pa.types.is_dictionary(campo.type):
+            tabela = tabela.set_column(posicao, campo.name, tabela.column(posicao).cast(campo.type.value_type))
+    return tabela
+
+
+def gravar_cache_em_lotes(fonte: FonteDados, cache: Path, progresso: Optional[Progresso] = None) -> int:
+    """
+    Grava o dataset base lendo a origem em lotes, sem montar um DataFrame com
+    toda a origem.
+
+    Cada lote é processado (ver ``processar_entregas``) e gravado em um
+    arquivo parquet temporário assim que é lido, e suas linhas rejeitadas vão
+    para a quarentena, que é recomeçada; ao final, os arquivos são regravados no dataset particionado
+    em streaming. O pico de memória depende de Config.TAMANHO_LOTE, não do
+    tamanho da origem.
+
+    Args:
+        fonte: fonte de dados
+        cache: diretório do dataset de cache
+        progresso: chamado após cada lote com as linhas lidas e o total estimado
+
+    Returns:
+        Número de linhas gravadas
+    """
+    impressao = fonte.impressao_digital()
+    partes = cache.with_name(cache.name + '.lotes')
+    shutil.rmtree(partes, ignore_errors=True)
+    partes.mkdir(parents=True)
+    shutil.rmtree(diretorio_quarentena(cache), ignore_errors=True)
+    linhas = rejeitadas = 0
+    watermark: Optional[str] = None
+    try:
+        arquivos = []
+        for numero, lote in enumerate(fonte.lotes(progresso=progresso)):
+            df, quarentena = processar_entregas(lote.to_pandas(coerce_temporal_nanoseconds=True))
+            rejeitadas += gravar_quarentena(cache, quarentena, f"base-{numero:06d}")
+            if df.empty:
+                continue
+            arquivo = partes / f"lote-{numero:06d}.parquet"
+            pq.write_table(_tabela_lote(df), arquivo)
+            arquivos.append(arquivo)
+            linhas += len(df)
+            watermark_lote = calcular_watermark(df)
+            if watermark_lote and (watermark is None or pd.Timestamp(watermark_lote) > pd.Timestamp(watermark)):
+                watermark = watermark_lote
+            del df
+
+        if arquivos:
+            esquema = unificar_esquemas([pq.read_schema(arquivo) for arquivo in arquivos])
+            _gravar_parquet(ds.dataset([str(arquivo) for arquivo in arquivos], schema=esquema, format='parquet'),
+                            cache)
+        else:
+            _gravar_parquet(pd.DataFrame(), cache)
+        _registrar_base(cache, impressao, linhas, watermark, rejeitadas)
+    finally:
+        shutil.rmtree(partes, ignore_errors=True)
+    return linhas
+
+
+def recarregar_completo(origem: Origem, cache: Path, progresso: Optional[Progresso] = None) -> int:
+    """
+    Relê toda a origem em lotes, processa e regrava o cache base (ver
+    ``gravar_cache_em_lotes``). O cubo é materializado uma competência por
+    vez e o catálogo a partir das colunas dos filtros.
+
+    Returns:
+        Número de linhas gravadas
+    """
+    with etapa("ingerir_origem") as registro:
+        linhas = gravar_cache_em_lotes(como_fonte(origem), cache, progresso)
+        registro["linhas_saida"] = linhas
+    with etapa("materializar_cubo", linhas_entrada=linhas):
+        atualizar_cubo(cache)
+    with etapa("atualizar_catalogo", linhas_entrada=linhas):
+        atualizar_catalogo(cache)
+    return linhas
+
+
+def carregar_dataset(origem: Origem, cache: Path, forcar: bool = False,
+                     atualizar: bool = True, **filtros: Any) -> pd.DataFrame:
+    """
+    Carrega o dataset de entregas priorizando o cache parquet.
+
+    A origem só é lida quando a sua impressão digital mudou; nesse
+    caso apenas as linhas novas são incorporadas ao cache (ver
+    ``atualizar_incremental``). Com ``forcar`` o cache é reconstruído do zero.
+    Sem ``atualizar`` o cache é apenas lido, como fazem os leitores que não
+    são o worker de atualização.
+
+    Args:
+        origem: fonte de dados (ou caminho da planilha)
+        cache: diretório do dataset de cache
+        forcar: ignora o cache e relê toda a origem
+        atualizar: verifica a origem e atualiza o cache antes da leitura
+        **filtros: data_inicial, data_final, zonas e colunas repassados a ``ler_cache``
+
+    Returns:
+        DataFrame de entregas processadas
+    """
+    if forcar:
+        recarregar_completo(origem, cache)
+    elif atualizar:
+        atualizar_incremental(origem, cache)
+    return ler_cache(cache, **filtros)
+
+
+def atualizar_incremental(origem: Origem, cache: Path, janela: Optional[datetime.timedelta] = None,
+                          progresso: Optional[Progresso] = None) -> int:
+    """
+    Atualiza o cache gravando apenas as linhas novas como um fragmento particionado.
+
+    São ingeridas as linhas com data_hora_nf posterior ao watermark menos a
+    janela de reprocessamento; as linhas dessa janela que já estavam no cache
+    são substituídas na leitura (ver ``ler_cache``), o que incorpora correções
+    recentes da origem. Sem cache ou watermark válidos, ou se a fonte não é
+    incremental, faz a carga completa.
+    Quando o número de fragmentos passa de Config.MAX_FRAGMENTOS, o cache é
+    compactado em um único dataset base.
+
+    Args:
+        origem: fonte de dados (ou caminho da planilha)
+        cache: diretório do dataset de cache
+        janela: janela de reprocessamento; usa Config.JANELA_CORRECAO por padrão
+        progresso: chamado após cada lote lido da origem (linhas lidas, total estimado)
+
+    Returns:
+        Número de linhas ingeridas
+    """
+    janela = Config.JANELA_CORRECAO if janela is None else janela
+    metadados = ler_metadados(cache)
+
+    if (not cache.exists() or metadados is None or not metadados.get("watermark")
+            or metadados.get("versao_cache") != Config.VERSAO_CACHE):
+        return recarregar_completo(origem, cache, progresso)
+
+    if cache_valido(origem, cache):
+        return 0
+
+    fonte = como_fonte(origem)
+    if not fonte.incremental:
+        return recarregar_completo(fonte, cache, progresso)
+
+    # Apenas as linhas dentro da janela são lidas da origem, processadas e gravadas
+    impressao = fonte.impressao_digital()
+    desde = pd.Timestamp(metadados["watermark"]) - janela
+    with etapa("ingerir_origem") as registro:
+        delta, quarentena = processar_entregas(fonte.ler(desde, progresso))
+        arquivo = f"delta-{datetime.datetime.now().strftime('%Y%m%d%H%M%S%f')}"
+        _gravar_parquet(delta, diretorio_fragmentos(cache) / arquivo)
+        metadados["linhas_quarentena"] = (metadados.get("linhas_quarentena", 0)
+                                          + gravar_quarentena(cache, quarentena, arquivo))
+        registro["linhas_saida"] = len(delta)
+
+    watermark = calcular_watermark(delta) or metadados["watermark"]
+    versao_anterior = versao_dataset(cache)
+    metadados["origem"] = impressao
+    metadados["watermark"] = max(pd.Timestamp(watermark), pd.Timestamp(metadados["watermark"])).isoformat()
+    metadados["fragmentos"] = metadados.get("fragmentos", []) + [{"arquivo": arquivo, "desde": desde.isoformat()}]
+    gravar_metadados(cache, metadados)
+    with etapa("materializar_cubo", linhas_entrada=len(delta)):
+        atualizar_cubo(cache, desde=desde.date(), versao_anterior=versao_anterior)
+    with etapa("atualizar_catalogo", linhas_entrada=len(delta)):
+        atualizar_catalogo(cache)
+
+    if len(metadados["fragmentos"]) > Config.MAX_FRAGMENTOS:
+        with etapa("compactar_cache"):
+            compactar_cache(origem, cache)
+
+    return len(delta)
+
+
+def compactar_cache(origem: Origem, cache: Path) -> None:
+    """Consolida o dataset base e os fragmentos incrementais em um único dataset base."""
+    gravar_cache(ler_cache(cache), origem, cache, (ler_metadados(cache) or {}).get("origem"))
+
+
+def atualizar_cubo(cache: Path, df: Optional[pd.DataFrame] = None,
+                   desde: Optional[datetime.date] = None, versao_anterior: Optional[str] = None) -> None:
+    """
+    Materializa o cubo diário para a versão atual do dataset.
+
+    Com ``desde``, apenas os dias a partir dessa data são recalculados; se o
+    cubo gravado não for da versão anterior, ele é reconstruído do dataset
+    inteiro. Falhas aqui não interrompem a atualização: sem cubo válido, os
+    indicadores são calculados a partir das linhas.
+    """
+    try:
+        versao = versao_dataset(cache)
+        if desde is not None:
+            recentes = ler_cache(cache, data_inicial=desde)
+            if materializar_cubo(recentes, versao, diretorio_cubo(cache), desde, versao_anterior):
+                return
+        materializar_cubo(_entregas_por_competencia(cache) if df is None else df, versao, diretorio_cubo(cache))
+    except Exception as e:
+        print(f"Erro ao materializar o cubo: {e}")
+
+
+def _entregas_por_competencia(cache: Path) -> Iterator[pd.DataFrame]:
+    """
+    Lê o cache uma competência por vez (entregas sem data_hora_nf, e
+    portanto sem competência, ficam na quarentena da ingestão).
+    """
+    competencias = ler_cache(cache, colunas=['competencia'])['competencia'].dropna().unique()
+    for competencia in sorted(int(valor) for valor in competencias):
+        inicio = datetime.date(competencia // 100, competencia % 100, 1)
+        fim = (pd.Timestamp(inicio) + pd.offsets.MonthEnd(0)).date()
+        yield ler_cache(cache, data_inicial=inicio, data_final=fim)
+
+
+def atualizar_catalogo(cache: Path, df: Optional[pd.DataFrame] = None) -> None:
+    """
+    Regrava o catálogo de dimensões para a versão atual do dataset.
+
+    Sem ``df``, lê do cache apenas a Data e as colunas dos filtros. Falhas
+    aqui não interrompem a atualização.
+    """
+    try:
+        if df is None:
+            df = ler_cache(cache, colunas=['Data'] + list(Config.FILTROS_DIMENSOES.values()))
+        gravar_catalogo(construir_catalogo(df, versao_dataset(cache)), caminho_catalogo(cache))
+    except Exception as e:
+        print(f"Erro ao gravar o catálogo de dimensões: {e}")
+
+
+def carregar_catalogo(origem: Origem, cache: Path,
+                      atualizar: bool = True) -> Optional[Dict[str, Any]]:
+    """
+    Carrega o catálogo de dimensões da versão atual do dataset, atualizando
+    antes o cache se a origem mudou (apenas com ``atualizar``). Se o catálogo
+    estiver ausente ou for de outra versão, ele é reconstruído a partir do
+    cache - e só é regravado com ``atualizar``.
+    """
+    if atualizar:
+        atualizar_incremental(origem, cache)
+    versao = versao_dataset(cache)
+    catalogo = ler_catalogo(versao, caminho_catalogo(cache))
+    if catalogo is None and versao is not None:
+        if atualizar:
+            atualizar_catalogo(cache)
+            catalogo = ler_catalogo(versao, caminho_catalogo(cache))
+        else:
+            colunas = ['Data'] + list(Config.FILTROS_DIMENSOES.values())
+            catalogo = construir_catalogo(ler_cache(cache, colunas=colunas), versao)
+    return catalogo
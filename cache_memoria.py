@@ -0,0 +1,127 @@
+import datetime
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple
+
+from config import Config
+
+
+class CacheLRU:
+    """
+    Cache em memória compartilhado pelo processo, com limite de itens (LRU),
+    expiração por tempo (TTL) e contadores de acertos/faltas.
+
+    Cada item pertence a uma versão do dataset: ao surgir uma versão nova,
+    os itens das versões anteriores são descartados automaticamente.
+    """
+
+    def __init__(self, max_itens: int, ttl_seg: float, relogio: Callable[[], float] = time.monotonic):
+        self.max_itens = max_itens
+        self.ttl_seg = ttl_seg
+        self._relogio = relogio
+        self._itens: "OrderedDict[Hashable, Tuple[float, Any]]" = OrderedDict()
+        self._versao: Optional[str] = None
+        self._trava = threading.Lock()
+        self.acertos = 0
+        self.faltas = 0
+        self.expirados = 0
+        self.descartados = 0
+
+    def _ajustar_versao(self, versao: Optional[str]) -> None:
+        """Descarta todos os itens se a versão do dataset mudou (chamado com a trava)."""
+        if versao != self._versao:
+            self.descartados += len(self._itens)
+            self._itens.clear()
+            self._versao = versao
+
+    def obter(self, versao: Optional[str], chave: Hashable) -> Optional[Any]:
+        """Retorna o valor guardado para a chave na versão informada, ou None."""
+        with self._trava:
+            self._ajustar_versao(versao)
+            item = self._itens.get(chave)
+            if item is None:
+                self.faltas += 1
+                return None
+            criado_em, valor = item
+            if self._relogio() - criado_em > self.ttl_seg:
+                del self._itens[chave]
+                self.expirados += 1
+                self.faltas += 1
+                return None
+            self._itens.move_to_end(chave)
+            self.acertos += 1
+            return valor
+
+    def guardar(self, versao: Optional[str], chave: Hashable, valor: Any) -> None:
+        """Guarda o valor, descartando os itens menos usados acima do limite."""
+        with self._trava:
+            self._ajustar_versao(versao)
+            self._itens[chave] = (self._relogio(), valor)
+            self._itens.move_to_end(chave)
+            while len(self._itens) > self.max_itens:
+                self._itens.popitem(last=False)
+                self.descartados += 1
+
+    def obter_ou_calcular(self, versao: Optional[str], chave: Hashable, calcular: Callable[[], Any]) -> Any:
+        """
+        Retorna o valor em cache ou o calcula e guarda. Sem versão do dataset
+        (cache ainda não gerado), o valor é calculado sem ser guardado.
+        O valor devolvido é compartilhado entre sessões e não deve ser alterado.
+        """
+        if versao is None:
+            return calcular()
+        valor = self.obter(versao, chave)
+        if valor is None:
+            valor = calcular()
+            self.guardar(versao, chave, valor)
+        return valor
+
+    def limpar(self) -> None:
+        """Descarta todos os itens (os contadores são mantidos)."""
+        with self._trava:
+            self.descartados += len(self._itens)
+            self._itens.clear()
+
+    def estatisticas(self) -> Dict[str, Any]:
+        """Retorna os contadores e a ocupação atual do cache."""
+        with self._trava:
+            consultas = self.acertos + self.faltas
+            return {
+                "versao": self._versao,
+                "itens": len(self._itens),
+                "max_itens": self.max_itens,
+                "acertos": self.acertos,
+                "faltas": self.faltas,
+                "taxa_acerto": self.acertos / consultas if consultas else 0.0,
+                "expirados": self.expirados,
+                "descartados": self.descartados,
+            }
+
+
+def chave_filtros(filtros: Dict[str, Any]) -> Tuple:
+    """
+    Normaliza o estado dos filtros da barra lateral em uma chave estável:
+    datas em ISO e seleções ordenadas, sem depender da ordem de clique.
+    """
+    data_inicial = filtros['data_inicial']
+    data_final = filtros['data_final']
+    selecoes = tuple(
+        (filtro, tuple(sorted(str(valor) for valor in filtros.get(filtro) or [])))
+        for filtro in sorted(Config.FILTROS_DIMENSOES)
+    )
+    return (
+        data_inicial.isoformat() if isinstance(data_inicial, datetime.date) else str(data_inicial),
+        data_final.isoformat() if isinstance(data_final, datetime.date) else str(data_final),
+        selecoes,
+    )
+
+
+# Cache de indicadores compartilhado por todas as sessões do processo
+CACHE_INDICADORES = CacheLRU(Config.CACHE_INDICADORES_MAX_ITENS, Config.CACHE_INDICADORES_TTL_SEG)
+
+# Detalhamentos dos indicadores (séries e quebras por dimensão), calculados sob demanda
+CACHE_DETALHAMENTO = CacheLRU(Config.CACHE_DETALHAMENTO_MAX_ITENS, Config.CACHE_INDICADORES_TTL_SEG)
+
+# Percentis e histogramas dos tempos de ciclo e de rota por estado de filtro
+CACHE_QUANTIS = CacheLRU(Config.CACHE_INDICADORES_MAX_ITENS, Config.CACHE_INDICADORES_TTL_SEG)
@@ -0,0 +1,102 @@
+import datetime
+import json
+import os
+import pandas as pd
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+from config import Config
+
+
+def _data_iso(valor: Any) -> Optional[str]:
+    """Converte uma data (ou NaT) em texto ISO AAAA-MM-DD."""
+    return None if pd.isnull(valor) else pd.Timestamp(valor).date().isoformat()
+
+
+def construir_catalogo(df: pd.DataFrame, versao: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Monta o catálogo de dimensões usado pelas opções da barra lateral.
+
+    Args:
+        df: DataFrame de entregas com Data e as colunas de Config.FILTROS_DIMENSOES
+        versao: versão do dataset de origem, gravada no catálogo
+
+    Returns:
+        Dicionário com o total de linhas, os limites de datas e, para cada
+        filtro, os valores distintos ordenados com a contagem de linhas e o
+        intervalo de datas em que cada valor aparece
+    """
+    datas = pd.to_datetime(df['Data'], errors='coerce') if 'Data' in df.columns else pd.Series(pd.NaT, index=df.index)
+
+    dimensoes: Dict[str, Dict[str, Any]] = {}
+    for filtro, coluna in Config.FILTROS_DIMENSOES.items():
+        valores: List[Dict[str, Any]] = []
+        if coluna in df.columns:
+            # Valores como objetos Python: a ordenação é a mesma de sorted()
+            resumo = (pd.DataFrame({'valor': df[coluna].to_numpy(dtype=object), 'Data': datas.to_numpy()})
+                      .dropna(subset=['valor'])
+                      .groupby('valor', sort=True)['Data'].agg(['size', 'min', 'max']))
+            valores = [
+                {"valor": valor, "linhas": int(linhas), "data_minima": _data_iso(minima), "data_maxima": _data_iso(maxima)}
+                for valor, linhas, minima, maxima in zip(resumo.index.tolist(), resumo['size'], resumo['min'], resumo['max'])
+            ]
+        dimensoes[filtro] = {"coluna": coluna, "valores": valores}
+
+    return {
+        "versao_dataset": versao,
+        "linhas": int(len(df)),
+        "data_minima": _data_iso(datas.min()),
+        "data_maxima": _data_iso(datas.max()),
+        "dimensoes": dimensoes,
+    }
+
+
+def gravar_catalogo(catalogo: Dict[str, Any], destino: Path) -> None:
+    """Grava o catálogo em JSON de forma atômica."""
+    destino.parent.mkdir(parents=True, exist_ok=True)
+    temporario = destino.with_name(destino.name + '.tmp')
+    with open(temporario, 'w', encoding='utf-8') as arquivo:
+        json.dump(catalogo, arquivo, ensure_ascii=False)
+    os.replace(temporario, destino)
+
+
+def ler_catalogo(versao: Optional[str], caminho: Path) -> Optional[Dict[str, Any]]:
+    """Lê o catálogo se ele corresponder à versão informada do dataset; caso contrário retorna None."""
+    if versao is None:
+        return None
+    try:
+        with open(caminho, encoding='utf-8') as arquivo:
+            catalogo = json.load(arquivo)
+    except (OSError, ValueError):
+        return None
+    return catalogo if catalogo.get("versao_dataset") == versao else None
+
+
+def limites_datas(catalogo: Optional[Dict[str, Any]]) -> Optional[Tuple[datetime.date, datetime.date]]:
+    """Retorna (data_minima, data_maxima) do catálogo como datas, ou None se não houver datas."""
+    if not catalogo or not catalogo.get("data_minima") or not catalogo.get("data_maxima"):
+        return None
+    return (datetime.date.fromisoformat(catalogo["data_minima"]),
+            datetime.date.fromisoformat(catalogo["data_maxima"]))
+
+
+def opcoes_filtro(catalogo: Optional[Dict[str, Any]], filtro: str,
+                  data_inicial: Optional[datetime.date] = None,
+                  data_final: Optional[datetime.date] = None) -> List[Any]:
+    """
+    Lista os valores de um filtro, já ordenados.
+
+    Com as datas informadas, retorna apenas os valores cujo intervalo de
+    datas no catálogo se sobrepõe ao período escolhido.
+    """
+    if not catalogo:
+        return []
+    valores = catalogo.get("dimensoes", {}).get(filtro, {}).get("valores", [])
+    if data_inicial is None or data_final is None:
+        return [item["valor"] for item in valores]
+
+    inicio, fim = data_inicial.isoformat(), data_final.isoformat()
+    return [
+        item["valor"] for item in valores
+        if item["data_minima"] is not None and item["data_minima"] <= fim and item["data_maxima"] >= inicio
+    ]
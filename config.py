@@ -0,0 +1,171 @@
+import datetime
+import os
+from dataclasses import dataclass
+from typing import Dict, List, Optional
+from pathlib import Path
+
+
+# Constantes e configurações
+@dataclass
+class RegionParams:
+    duracao_seg: int
+    horario_corte: str
+    tempo_ideal: str
+
+
+@dataclass
+class RegraAlerta:
+    """
+    Regra de alerta sobre um indicador (ver ``alertas``): dispara quando o
+    indicador da janela fica acima (">") ou abaixo ("<") do limite.
+    ``limite_regiao`` usa como limite um parâmetro da zona em
+    PARAMETROS_REGIAO (tempos convertidos para segundos).
+    """
+    nome: str
+    indicador: str
+    operador: str
+    limite: Optional[float] = None
+    limite_regiao: Optional[str] = None
+    janela: str = 'dia'
+    por_zona: bool = True
+    minimo_entregas: int = 1
+
+
+# Configuração de constantes
+class Config:
+    CACHE_DIR: Path = Path('data')
+    # Dataset parquet particionado (hive) por competência; incluir 'zona' em
+    # PARTICOES também separa os arquivos por zona
+    NOME_DATASET: str = 'entregas'
+    PARTICOES: List[str] = ['competencia']
+    
+    # Versões imutáveis do dataset (uma por atualização): cada versão guarda o
+    # dataset NOME_DATASET com seus metadados, cubo e catálogo, e o
+    # arquivo CURRENT aponta para a versão publicada. Versões substituídas são
+    # removidas após a retenção, o que limita por quanto tempo uma sessão
+    # pode continuar lendo a versão em que começou
+    SNAPSHOTS_DIR: Path = CACHE_DIR / 'snapshots'
+    RETENCAO_SNAPSHOTS: datetime.timedelta = datetime.timedelta(hours=2)
+    EXCEL_FILE: Path = Path('dados.xlsx')
+    
+    # Origem das entregas: "excel" (EXCEL_FILE), "pasta" (todas as planilhas de
+    # PASTA_EXCEL), "postgres" (view TABELA_ENTREGAS no banco de DATABASE_URL) ou
+    # "sqlite" (SQLITE_FILE, substituto local do banco)
+    FONTE_DADOS: str = os.getenv('FONTE_DADOS', 'excel')
+    
+    # Várias planilhas (uma exportação por filial ou por mês): diretório ou padrão
+    # glob. Cada planilha é convertida uma única vez (por conteúdo) para parquet em
+    # PREPARADOS_DIR, em paralelo; linhas com a mesma CHAVE_ENTREGA em mais de uma
+    # planilha são mantidas apenas uma vez
+    PASTA_EXCEL: str = os.getenv('PASTA_EXCEL', 'entradas')
+    PREPARADOS_DIR: Path = CACHE_DIR / 'preparados'
+    PROCESSOS_INGESTAO: int = os.cpu_count() or 1
+    CHAVE_ENTREGA: List[str] = ['servico_titulo', 'Cliente ID']
+    TABELA_ENTREGAS: str = 'vw_entregas_vuupt'
+    POSTGRES_DSN: str = os.getenv('DATABASE_URL', '')
+    SQLITE_FILE: Path = Path(os.getenv('SQLITE_FILE', 'dados.sqlite'))
+    POOL_MIN_CONEXOES: int = 1
+    POOL_MAX_CONEXOES: int = 4
+    # Linhas por lote Arrow lido da origem
+    TAMANHO_LOTE: int = 50_000
+    
+    # Incrementar quando o esquema de ingestão (processar_entregas) mudar, para invalidar caches antigos
+    VERSAO_CACHE: int = 4
+    
+    # Atualização incremental: linhas com data_hora_nf dentro desta janela antes
+    # do watermark são reprocessadas para incorporar correções da origem
+    JANELA_CORRECAO: datetime.timedelta = datetime.timedelta(days=2)
+    MAX_FRAGMENTOS: int = 30
+    
+    # Filtros da barra lateral -> coluna filtrada
+    FILTROS_DIMENSOES: Dict[str, str] = {
+        'zonas': 'zona',
+        'motoqueiros': 'motoqueiro',
+        'clientes': 'Cliente',
+        'vendedores': 'vendedor',
+    }
+    
+    # Índices de filtro (um por competência) mantidos em memória, compartilhados entre sessões
+    MAX_INDICES_MEMORIA: int = 24
+    
+    # Cubos mantidos em memória (a versão publicada e a anterior, durante a troca de versão)
+    MAX_CUBOS_MEMORIA: int = 2
+    
+    # Indicadores memorizados por estado de filtro (LRU compartilhado entre sessões)
+    CACHE_INDICADORES_MAX_ITENS: int = 256
+    CACHE_INDICADORES_TTL_SEG: int = 3600
+    
+    # Detalhamento dos indicadores: séries por dia (agrupadas por semana ou mês
+    # acima de MAX_PONTOS_SERIE pontos) e por hora, e os TOP_N_DETALHE maiores
+    # valores por dimensão
+    CACHE_DETALHAMENTO_MAX_ITENS: int = 32
+    MAX_PONTOS_SERIE: int = 90
+    TOP_N_DETALHE: int = 10
+    DIMENSOES_DETALHE: List[str] = ['zona', 'motoqueiro', 'Cliente', 'vendedor']
+    
+    # Distribuição dos tempos de ciclo e de rota: percentis estimados pelos
+    # esboços por Data × zona gravados com o cubo (erro relativo de até
+    # ERRO_RELATIVO_QUANTIS) e histogramas em faixas de LARGURA_HISTOGRAMA_MIN minutos
+    ERRO_RELATIVO_QUANTIS: float = 0.01
+    PERCENTIS_TEMPOS: List[int] = [50, 90, 99]
+    LARGURA_HISTOGRAMA_MIN: int = 5
+    
+    # Explorador de dados brutos: colunas exibidas por padrão, colunas da busca
+    # textual e opções de linhas por página (apenas a página exibida é materializada)
+    COLUNAS_DADOS_BRUTOS: List[str] = [
+        'Data', 'servico_titulo', 'Cliente', 'zona', 'motoqueiro', 'vendedor', 'rota_nome',
+        'valor_nf', 'valor_frete', 'devolucao', 'Concluida', 'Tempo de Ciclo',
+    ]
+    COLUNAS_BUSCA: List[str] = ['servico_titulo', 'Cliente', 'motoqueiro', 'vendedor', 'rota_nome', 'bairro', 'endereco']
+    TAMANHOS_PAGINA: List[int] = [25, 50, 100, 250]
+    
+    # Worker de atualização (scheduler.py): fila de jobs, trava de escritor único e
+    # atualização diária
+    FILA_DIR: Path = CACHE_DIR / 'fila'
+    HORARIO_ATUALIZACAO_DIARIA: datetime.time = datetime.time(22, 0)
+    INTERVALO_WORKER_SEG: int = 5
+    VALIDADE_TRAVA_SEG: int = 60
+    RETENCAO_JOBS: int = 50
+    # A interface inicia o worker quando não encontra nenhum ativo
+    INICIAR_WORKER_AUTOMATICO: bool = True
+    INTERVALO_STATUS_SEG: int = 2
+    
+    # Dados sintéticos e resultados do benchmark (benchmark.py)
+    BENCHMARK_DIR: Path = CACHE_DIR / 'benchmark'
+    
+    # Indicadores em lote por dia/competência × zona (indicadores_lote.py)
+    INDICADORES_DIR: Path = CACHE_DIR / 'indicadores'
+    
+    # Alertas avaliados pelo worker após cada atualização, apenas sobre os dias
+    # reprocessados; os alertas novos vão para a caixa de saída em ALERTAS_DB
+    ALERTAS_ATIVOS: bool = os.getenv('ALERTAS_ATIVOS', '1') == '1'
+    ALERTAS_DB: Path = CACHE_DIR / 'alertas.sqlite'
+    REGRAS_ALERTA: List[RegraAlerta] = [
+        RegraAlerta('acima_do_tempo', 'perc_acima', '>', 30.0, minimo_entregas=10),
+        RegraAlerta('tempo_ciclo_acima_ideal', 'tempo_ciclo_medio_seg', '>', limite_regiao='tempo_ideal',
+                    minimo_entregas=10),
+        RegraAlerta('devolucoes', 'devolucoes_perc', '>', 5.0, janela='competencia', minimo_entregas=50),
+        RegraAlerta('entregas_viradas', 'entregas_viradas_perc', '>', 5.0, por_zona=False, minimo_entregas=20),
+    ]
+    
+    # Instrumentação das etapas (metricas.py), desligada por padrão: cada etapa da
+    # interface e da atualização é acrescentada a METRICAS_ARQUIVO (JSON lines).
+    # Com PAINEL_DEBUG, abrir a interface com ?debug=1 liga a medição para a
+    # sessão e exibe o painel de depuração
+    METRICAS_ATIVAS: bool = os.getenv('METRICAS_ATIVAS', '0') == '1'
+    METRICAS_ARQUIVO: Path = CACHE_DIR / 'metricas.jsonl'
+    PAINEL_DEBUG: bool = os.getenv('PAINEL_DEBUG', '1') == '1'
+    INTERVALO_AMOSTRA_MEMORIA_SEG: float = 0.01
+    
+    # Duração máxima usada quando a zona não possui parâmetros cadastrados (2 horas)
+    DURACAO_PADRAO_SEG: int = 7200
+    
+    # Parâmetros por região - atualizados para corresponder às regiões na planilha
+    PARAMETROS_REGIAO: Dict[str, RegionParams] = {
+        "REGIAO1": RegionParams(5400, "16:00:00", "01:30:00"),
+        "REGIAO2": RegionParams(10800, "15:00:00", "03:00:00"),
+        "REGIAO3": RegionParams(3600, "16:00:00", "01:00:00"),
+        "REGIAO4": RegionParams(7200, "16:00:00", "02:00:00"),
+        "REGIAO5": RegionParams(10800, "15:00:00", "03:00:00"),
+        "REGIAO6": RegionParams(10800, "15:00:00", "03:00:00")
+    }
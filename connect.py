@@ -1,30 +1,64 @@
 import pandas as pd
-from pathlib import Path
+from typing import Any, Dict, Optional
 
-def buscar_dados(nome_tabela: str) -> pd.DataFrame:
+from cache_dados import carregar_catalogo, carregar_dataset
+from config import Config
+from fontes import FonteDados, criar_fonte
+from snapshots import caminho_dataset, versao_atual
+
+def buscar_dados(nome_tabela: str, versao: Optional[str] = None, **filtros: Any) -> pd.DataFrame:
     """
-    Como estamos utilizando um arquivo Excel estático, esta função
-    agora simplesmente retorna os dados desse arquivo.
+    Retorna as entregas a partir do cache parquet, que espelha a tabela
+    Config.TABELA_ENTREGAS da fonte configurada. O cache é apenas lido:
+    quem o atualiza é o worker de atualização (scheduler.py). Para ler
+    diretamente da origem, em lotes, use ``abrir_fonte``.
     
     Args:
-        nome_tabela: nome da tabela (não utilizado, mantido por compatibilidade)
+        nome_tabela: nome da tabela (mantido por compatibilidade; o cache contém Config.TABELA_ENTREGAS)
+        versao: versão do dataset a ler; usa a versão publicada por padrão
+        **filtros: data_inicial, data_final, zonas e colunas, aplicados já na leitura do cache
         
     Returns:
         DataFrame com os dados
     """
     try:
-        # Caminho do arquivo Excel
-        arquivo_excel = Path('dados.xlsx')
-        
-        # Verifica se o arquivo existe
-        if not arquivo_excel.exists():
-            print(f"Erro: O arquivo {arquivo_excel} não foi encontrado.")
+        # Carrega do cache parquet da versão, sem consultar a origem
+        versao = versao or versao_atual()
+        if versao is None:
+            print("Erro: ainda não há dados carregados no cache.")
             return pd.DataFrame()
-            
-        # Carrega o arquivo Excel
-        df = pd.read_excel(arquivo_excel)
+        df = carregar_dataset(criar_fonte(), caminho_dataset(versao), atualizar=False, **filtros)
         
         return df
     except Exception as e:
         print(f"Erro ao buscar dados: {e}")
-        return pd.DataFrame()
\ No newline at end of file
+        return pd.DataFrame()
+
+
+def buscar_catalogo(versao: Optional[str] = None) -> Optional[Dict[str, Any]]:
+    """
+    Retorna o catálogo de dimensões (valores dos filtros e limites de datas)
+    de uma versão do dataset, sem carregar as linhas de entrega.
+    
+    Args:
+        versao: versão do dataset; usa a versão publicada por padrão
+    
+    Returns:
+        Dicionário do catálogo ou None se não houver dados
+    """
+    try:
+        versao = versao or versao_atual()
+        if versao is None:
+            return None
+        return carregar_catalogo(criar_fonte(), caminho_dataset(versao), atualizar=False)
+    except Exception as e:
+        print(f"Erro ao buscar catálogo: {e}")
+        return None
+
+
+def abrir_fonte(nome_tabela: str = Config.TABELA_ENTREGAS) -> FonteDados:
+    """
+    Retorna a fonte de dados configurada para a tabela, para leitura direta
+    da origem em lotes Arrow (ver ``FonteDados.lotes``), sem passar pelo cache.
+    """
+    return criar_fonte(Config.FONTE_DADOS, nome_tabela)
@@ -0,0 +1,207 @@
+import datetime
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Tuple, Union
+
+from config import Config
+from custos import ModeloCustos
+from indicadores import montar_indicadores
+from processamento import aplicar_esquema, avaliar_sla
+from quantis import construir_esbocos
+
+
+# Granularidade do cubo diário: todos os filtros da barra lateral são dimensões
+DIMENSOES_CUBO: List[str] = ['Data', 'zona', 'motoqueiro', 'Cliente', 'vendedor']
+
+def _duracao_ns(df: pd.DataFrame, coluna: str) -> Tuple[np.ndarray, np.ndarray]:
+    """Retorna a duração em nanossegundos (0 quando ausente) e a máscara de valores presentes."""
+    if coluna not in df.columns:
+        return np.zeros(len(df), dtype='int64'), np.zeros(len(df), dtype=bool)
+    duracao = pd.to_timedelta(df[coluna], errors='coerce')
+    presente = duracao.notna().to_numpy()
+    return np.where(presente, duracao.to_numpy().view('int64'), 0), presente
+
+
+def construir_cubo(df: pd.DataFrame,
+                   dimensoes: List[str] = DIMENSOES_CUBO) -> Optional[Tuple[pd.DataFrame, pd.DataFrame]]:
+    """
+    Agrega as entregas processadas (ver ``processamento.processar_entregas``) no cubo diário.
+
+    Args:
+        df: DataFrame de entregas já preparado
+        dimensoes: dimensões das células; DIMENSOES_CUBO por padrão
+
+    Returns:
+        Tupla (cubo, rotas): o cubo com somas e contagens por
+        Data × zona × motoqueiro × Cliente × vendedor, e a contagem de entregas
+        por rota dentro de cada célula (para viagens distintas e viagens com +3
+        entregas). None se faltar alguma dimensão.
+    """
+    if any(coluna not in df.columns for coluna in dimensoes):
+        return None
+
+    sla = avaliar_sla(df)
+    ciclo_ns, ciclo_n = _duracao_ns(df, 'Tempo de Ciclo')
+    rota_ns, rota_n = _duracao_ns(df, 'Tempo de Rota')
+    valor_frete = df['valor_frete'] if 'valor_frete' in df.columns else pd.Series(np.nan, index=df.index)
+
+    metricas = df[dimensoes].copy()
+    metricas['entregas'] = 1
+    metricas['valor_nf'] = df['valor_nf'] if 'valor_nf' in df.columns else 0.0
+    metricas['valor_frete'] = valor_frete
+    metricas['frete_gratis'] = (valor_frete == 0).to_numpy()
+    metricas['devolucoes'] = (df['devolucao'] == "SIM").to_numpy() if 'devolucao' in df.columns else False
+    metricas['viradas'] = sla['virada'].to_numpy()
+    metricas['no_dia'] = sla['no_dia'].to_numpy()
+    metricas['acima'] = (sla['no_dia'] & sla['acima_tempo']).to_numpy()
+    metricas['ciclo_soma_ns'] = ciclo_ns
+    metricas['ciclo_n'] = ciclo_n
+    metricas['rota_soma_ns'] = rota_ns
+    metricas['rota_n'] = rota_n
+
+    cubo = metricas.groupby(dimensoes, dropna=False, observed=True, sort=False).sum().reset_index()
+
+    if 'rota_nome' in df.columns:
+        rotas = (df[dimensoes + ['rota_nome']].dropna(subset=['rota_nome'])
+                 .groupby(dimensoes + ['rota_nome'], dropna=False, observed=True, sort=False).size()
+                 .rename('entregas').reset_index())
+    else:
+        rotas = pd.DataFrame(columns=dimensoes + ['rota_nome', 'entregas'])
+
+    return cubo, rotas
+
+
+def filtrar_cubo(tabela: pd.DataFrame, filtros: Dict[str, Any]) -> pd.DataFrame:
+    """Aplica ao cubo (ou à tabela de rotas) os mesmos filtros da barra lateral."""
+    mascara = (tabela['Data'] >= pd.Timestamp(filtros['data_inicial'])) & (tabela['Data'] <= pd.Timestamp(filtros['data_final']))
+    for filtro, dimensao in Config.FILTROS_DIMENSOES.items():
+        if filtros.get(filtro):
+            mascara &= tabela[dimensao].isin(filtros[filtro])
+    return tabela[mascara]
+
+
+def agregar_cubo(cubo: pd.DataFrame, rotas: pd.DataFrame) -> Dict[str, Any]:
+    """Reagrega células do cubo nos mesmos agregados base de ``agregar_entregas``."""
+    ciclo_n = int(cubo['ciclo_n'].sum())
+    rota_n = int(cubo['rota_n'].sum())
+    entregas_por_rota = rotas.groupby('rota_nome', observed=True, sort=False)['entregas'].sum()
+
+    return {
+        "entregas": int(cubo['entregas'].sum()),
+        "viagens": int(entregas_por_rota.size),
+        "viagens_3p": int((entregas_por_rota > 3).sum()),
+        "frete_gratis": int(cubo['frete_gratis'].sum()),
+        "devolucoes": int(cubo['devolucoes'].sum()),
+        "valor_nf_total": cubo['valor_nf'].sum(),
+        "valor_frete_total": cubo['valor_frete'].sum(),
+        "entregas_viradas": int(cubo['viradas'].sum()),
+        "entregas_validas": int(cubo['no_dia'].sum()),
+        "entregas_acima": int(cubo['acima'].sum()),
+        "motoqueiros_count": cubo['motoqueiro'].nunique(),
+        "tempo_ciclo": pd.Timedelta(int(cubo['ciclo_soma_ns'].sum()) / ciclo_n) if ciclo_n else pd.NaT,
+        "tempo_rota": pd.Timedelta(int(cubo['rota_soma_ns'].sum()) / rota_n) if rota_n else pd.NaT,
+    }
+
+
+def calcular_indicadores_cubo(cubo: pd.DataFrame, rotas: pd.DataFrame, filtros: Dict[str, Any],
+                              custos: ModeloCustos) -> Dict[str, Any]:
+    """Calcula os indicadores do dashboard reagregando apenas as células do cubo selecionadas."""
+    celulas = filtrar_cubo(cubo, filtros)
+    if celulas.empty:
+        return {"erro": "Sem dados para calcular indicadores"}
+
+    base = agregar_cubo(celulas, filtrar_cubo(rotas, filtros))
+    return montar_indicadores(base, custos.custo(celulas, filtros['data_inicial'], filtros['data_final']))
+
+
+# Persistência
+def _gravar_tabela(df: pd.DataFrame, destino: Path, versao: str) -> None:
+    """Grava uma tabela do cubo com a versão do dataset nos metadados do parquet."""
+    tabela = pa.Table.from_pandas(df, preserve_index=False)
+    tabela = tabela.replace_schema_metadata({**(tabela.schema.metadata or {}), b'versao_dataset': versao.encode()})
+    temporario = destino.with_name(destino.name + '.tmp')
+    pq.write_table(tabela, temporario)
+    temporario.replace(destino)
+
+
+def gravar_cubo(cubo: pd.DataFrame, rotas: pd.DataFrame, versao: str, diretorio: Path,
+                esbocos: Optional[pd.DataFrame] = None) -> None:
+    """Grava o cubo, a tabela de rotas e os esboços de quantis, marcados com a versão do dataset de origem."""
+    diretorio.mkdir(parents=True, exist_ok=True)
+    if esbocos is not None:
+        _gravar_tabela(esbocos, diretorio / 'quantis.parquet', versao)
+    _gravar_tabela(rotas, diretorio / 'rotas.parquet', versao)
+    _gravar_tabela(cubo, diretorio / 'cubo.parquet', versao)
+
+
+def ler_cubo(versao: Optional[str], diretorio: Path) -> Optional[Tuple[pd.DataFrame, pd.DataFrame]]:
+    """Lê o cubo se ele corresponder à versão informada do dataset; caso contrário retorna None."""
+    arquivos = [diretorio / 'cubo.parquet', diretorio / 'rotas.parquet']
+    if versao is None or not all(arquivo.exists() for arquivo in arquivos):
+        return None
+    tabelas = [pq.read_table(arquivo, memory_map=True) for arquivo in arquivos]
+    if any((tabela.schema.metadata or {}).get(b'versao_dataset') != versao.encode() for tabela in tabelas):
+        return None
+    return tabelas[0].to_pandas(), tabelas[1].to_pandas()
+
+
+def ler_esbocos(versao: Optional[str], diretorio: Path) -> Optional[pd.DataFrame]:
+    """Lê os esboços de quantis (ver ``quantis``) se corresponderem à versão informada do dataset."""
+    arquivo = diretorio / 'quantis.parquet'
+    if versao is None or not arquivo.exists():
+        return None
+    tabela = pq.read_table(arquivo, memory_map=True)
+    if (tabela.schema.metadata or {}).get(b'versao_dataset') != versao.encode():
+        return None
+    return tabela.to_pandas()
+
+
+def materializar_cubo(df: Union[pd.DataFrame, Iterable[pd.DataFrame]], versao: str, diretorio: Path,
+                      desde: Optional[datetime.date] = None, versao_anterior: Optional[str] = None) -> bool:
+    """
+    Materializa o cubo, e os esboços de quantis dos tempos por Data × zona
+    (ver ``quantis``), a partir das entregas processadas.
+
+    ``df`` pode ser uma sequência de partes com dias disjuntos (ex.: uma por
+    competência): como as células do cubo são diárias, o cubo de cada parte é
+    calculado separadamente e os resultados são concatenados, sem manter
+    todas as entregas em memória ao mesmo tempo.
+
+    Com ``desde``, ``df`` deve conter apenas as entregas a partir dessa data:
+    as células anteriores do cubo gravado para ``versao_anterior`` são mantidas
+    e as demais recalculadas.
+
+    Returns:
+        True se o cubo foi gravado; False se faltar alguma dimensão ou se,
+        na atualização parcial, o cubo (ou os esboços) gravado não for da
+        versão anterior
+    """
+    partes = [df] if isinstance(df, pd.DataFrame) else df
+    cubos = []
+    for parte in partes:
+        cubo_parte = construir_cubo(parte)
+        if cubo_parte is None:
+            return False
+        cubos.append(cubo_parte + (construir_esbocos(parte),))
+    if not cubos:
+        return False
+    novo = cubos[0] if len(cubos) == 1 else tuple(
+        aplicar_esquema(pd.concat(tabelas, ignore_index=True)) for tabelas in zip(*cubos)
+    )
+
+    if desde is not None:
+        atual = ler_cubo(versao_anterior, diretorio)
+        esbocos = ler_esbocos(versao_anterior, diretorio)
+        if atual is None or esbocos is None:
+            return False
+        atual = atual + (esbocos,)
+        novo = tuple(
+            aplicar_esquema(pd.concat([antigo[~(antigo['Data'] >= pd.Timestamp(desde))], recente], ignore_index=True))
+            for antigo, recente in zip(atual, novo)
+        )
+
+    gravar_cubo(novo[0], novo[1], versao, diretorio, novo[2])
+    return True
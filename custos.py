@@ -0,0 +1,167 @@
+"""
+Modelo de custos dos motoqueiros por competência e região.
+
+A tabela de custos (ver ``indicadores.custos_simulados``) traz o custo
+mensal (valor_competencia) de cada região em cada competência. Uma seleção
+de entregas (um período e, opcionalmente, zonas, motoqueiros, clientes ou
+vendedores) recebe, de cada competência e região:
+
+    custo mensal × dias do mês cobertos pelo período ÷ dias do mês
+                 × entregas selecionadas ÷ entregas da região nesses dias
+
+O rateio por dias de calendário faz um período curto (ontem, esta semana)
+receber apenas a sua fração do mês, e não o custo do mês inteiro sobre as
+entregas feitas até ali; dentro dos dias cobertos, o custo é dividido pela
+participação das entregas selecionadas, de modo que zonas, motoqueiros,
+clientes e vendedores somam o custo do período. No mês da última data do
+dataset (o mês em andamento), só os dias decorridos até essa data são
+cobertos: o mês até hoje recebe a fração decorrida do custo mensal.
+Custos de competências e regiões sem entregas nos dias cobertos não são
+alocados.
+
+As entregas de cada região em qualquer intervalo vêm do rollup diário de
+entregas por Data × zona da versão do dataset, acumulado dia a dia.
+"""
+import numpy as np
+import pandas as pd
+from typing import Any, Optional
+
+from processamento import codigo_competencia
+
+
+def _chaves(tabela: pd.DataFrame) -> pd.MultiIndex:
+    """Competência (AAAAMM) e zona de cada linha (entrega ou célula do cubo)."""
+    if 'Data' in tabela.columns:
+        competencia = codigo_competencia(tabela['Data'])
+    else:
+        competencia = tabela['competencia']
+    return pd.MultiIndex.from_arrays([competencia.astype('Int64'), tabela['zona'].astype(object)],
+                                     names=['competencia', 'zona'])
+
+
+def tabela_custos(df_motoqueiros: pd.DataFrame) -> Optional[pd.Series]:
+    """
+    Converte a tabela de custos em custo mensal por competência e região.
+
+    Args:
+        df_motoqueiros: tabela com competencia ("AAAA-MM"), regiao e valor_competencia
+
+    Returns:
+        Série indexada por (competencia AAAAMM, zona); None se a tabela não tiver custos
+    """
+    colunas = {'competencia', 'regiao', 'valor_competencia'}
+    if df_motoqueiros.empty or not colunas.issubset(df_motoqueiros.columns):
+        return None
+    datas = pd.to_datetime(df_motoqueiros['competencia'].astype(str), format='%Y-%m', errors='coerce')
+    validas = datas.notna()
+    custos = pd.Series(
+        pd.to_numeric(df_motoqueiros.loc[validas, 'valor_competencia'], errors='coerce').fillna(0).to_numpy(),
+        index=pd.MultiIndex.from_arrays([codigo_competencia(datas[validas]).astype('Int64'),
+                                         df_motoqueiros.loc[validas, 'regiao'].astype(str).to_numpy(dtype=object)],
+                                        names=['competencia', 'zona']),
+    )
+    return custos.groupby(level=['competencia', 'zona']).sum()
+
+
+def rollup_diario(tabela: pd.DataFrame) -> pd.Series:
+    """
+    Entregas por Data e zona, a partir das células do cubo (coluna entregas)
+    ou das linhas de entrega.
+
+    Returns:
+        Série indexada por (Data, zona)
+    """
+    if tabela.empty or not {'Data', 'zona'}.issubset(tabela.columns):
+        return pd.Series(dtype='int64', index=pd.MultiIndex.from_arrays([[], []], names=['Data', 'zona']))
+    entregas = tabela['entregas'].to_numpy() if 'entregas' in tabela.columns else 1
+    indice = pd.MultiIndex.from_arrays([pd.to_datetime(tabela['Data']).dt.normalize(), tabela['zona'].astype(object)],
+                                       names=['Data', 'zona'])
+    return pd.Series(entregas, index=indice).groupby(level=['Data', 'zona']).sum()
+
+
+class ModeloCustos:
+    """
+    Custos mensais por competência e zona e entregas acumuladas dia a dia
+    por zona de uma versão do dataset, para ratear o custo de qualquer
+    período (ver a descrição do módulo).
+    """
+
+    def __init__(self, df_motoqueiros: pd.DataFrame, diario: pd.Series):
+        """
+        Args:
+            df_motoqueiros: tabela de custos (ver ``tabela_custos``)
+            diario: rollup diário de entregas de todo o dataset (ver ``rollup_diario``)
+        """
+        self.custos = tabela_custos(df_motoqueiros)
+        self.ultima_data: Optional[pd.Timestamp] = None
+        if self.custos is None or diario.empty:
+            return
+        self.ultima_data = diario.index.get_level_values('Data').max()
+
+        # Entregas acumuladas por zona (colunas) até cada dia de um calendário contínuo;
+        # a linha 0 (antes do primeiro dia) é zero
+        por_zona = diario.groupby(level=['Data', 'zona']).sum().unstack('zona', fill_value=0)
+        calendario = pd.date_range(por_zona.index.min(), self.ultima_data)
+        acumulado = por_zona.reindex(calendario, fill_value=0).cumsum()
+        self._datas = calendario.to_numpy()
+        self._zonas = acumulado.columns
+        self._acumulado = np.vstack([np.zeros((1, acumulado.shape[1])), acumulado.to_numpy()])
+
+    def _entregas(self, zonas: pd.Series, inicio: pd.Series, fim: pd.Series) -> np.ndarray:
+        """Entregas de cada zona no intervalo [inicio, fim] (0 para zonas sem entregas)."""
+        colunas = self._zonas.get_indexer(zonas.astype(object))
+        ate_fim = np.searchsorted(self._datas, fim.to_numpy(), side='right')
+        antes_inicio = np.searchsorted(self._datas, inicio.to_numpy(), side='left')
+        entregas = self._acumulado[ate_fim, colunas] - self._acumulado[antes_inicio, colunas]
+        return np.where(colunas >= 0, entregas, 0)
+
+    def alocar(self, tabela: pd.DataFrame, inicio: Any, fim: Any) -> Optional[pd.Series]:
+        """
+        Custo alocado a cada linha (entrega ou célula do cubo) selecionada no
+        período [inicio, fim].
+
+        Args:
+            tabela: entregas ou células do cubo selecionadas, com Data e zona
+            inicio: data inicial do período; uma só ou uma Series alinhada às
+                linhas (períodos diferentes por grupo, ex.: um por dia)
+            fim: data final do período, como ``inicio``
+
+        Returns:
+            Série alinhada às linhas da tabela; None sem tabela de custos
+        """
+        if self.custos is None:
+            return None
+        if tabela.empty or self.ultima_data is None:
+            return pd.Series(0.0, index=tabela.index)
+
+        datas = pd.to_datetime(tabela['Data']).dt.normalize()
+        inicio = pd.to_datetime(pd.Series(inicio, index=tabela.index)).dt.normalize()
+        fim = pd.to_datetime(pd.Series(fim, index=tabela.index)).dt.normalize()
+
+        # Mês de cada linha; no mês em andamento, os dias só são cobertos até a última data
+        inicio_mes = datas.dt.to_period('M').dt.start_time
+        fim_mes = datas.dt.to_period('M').dt.end_time.dt.normalize().clip(upper=self.ultima_data)
+        dias_mes = datas.dt.days_in_month
+
+        # Dias do mês cobertos pelo período e entregas da zona nesses dias
+        de = inicio.where(inicio > inicio_mes, inicio_mes)
+        ate = fim.where(fim < fim_mes, fim_mes)
+        cobertos = ((ate - de).dt.days + 1).clip(lower=0)
+        entregas_zona = self._entregas(tabela['zona'], de, ate)
+
+        custo_mes = self.custos.reindex(_chaves(tabela)).fillna(0).to_numpy()
+        selecionadas = tabela['entregas'].to_numpy() if 'entregas' in tabela.columns else 1
+        with np.errstate(divide='ignore', invalid='ignore'):
+            custo = custo_mes * (cobertos / dias_mes).to_numpy() * selecionadas / entregas_zona
+        return pd.Series(np.where(entregas_zona > 0, custo, 0.0), index=tabela.index)
+
+    def custo(self, tabela: pd.DataFrame, inicio: Any, fim: Any) -> Optional[float]:
+        """
+        Custo total de uma seleção de entregas (ou de células do cubo) no
+        período [inicio, fim].
+
+        Returns:
+            Custo total; None sem tabela de custos
+        """
+        alocado = self.alocar(tabela, inicio, fim)
+        return None if alocado is None else float(alocado.sum())
@@ -0,0 +1,123 @@
+"""
+Detalhamento dos cartões de indicadores: série temporal (por dia e por hora)
+e quebra pelos maiores valores de cada dimensão.
+
+Todas as tabelas saem de uma única passagem agrupada sobre as entregas
+filtradas, que monta um cubo por Data × hora × dimensões dos filtros (ver
+``cubo.construir_cubo``); as séries e as quebras são reagregações desse cubo
+por ``indicadores_lote.agregar_niveis``, com os indicadores derivados pelas
+mesmas fórmulas dos cartões. A série diária é agrupada por semana ou por mês
+quando o período passa de Config.MAX_PONTOS_SERIE pontos, de modo que o
+resultado guardado em cache tem tamanho limitado qualquer que seja o período.
+"""
+import datetime
+import pandas as pd
+from typing import Any, Dict, List, Optional
+
+from config import Config
+from cubo import DIMENSOES_CUBO, construir_cubo
+from custos import ModeloCustos
+from indicadores_lote import agregar_niveis, indicadores_tabela
+
+
+# Cartão -> indicador detalhado (os tempos médios são dados em minutos)
+INDICADORES_CARTOES: Dict[str, str] = {
+    "Entregas": "entregas",
+    "Viagens": "viagens",
+    "Faturamento": "valor_nf_total",
+    "Receita Frete": "valor_frete_total",
+    "Frete Grátis (%)": "frete_gratis_perc",
+    "Devoluções (%)": "devolucoes_perc",
+    "Entregas Viradas (%)": "entregas_viradas_perc",
+    "Entregas Acima do Tempo (%)": "perc_acima",
+    "Entregas p/ Viagem": "entregas_por_viagem",
+    "Viagens com +3 Entregas": "viagens_3p",
+    "Ticket Médio": "ticket_medio",
+    "Custo por Entrega": "custo_por_entrega",
+    "Receita Média p/ Viagem": "receita_media_viagem",
+    "Resultado Projetado": "resultado_projetado",
+    "Entregas p/ Motoqueiro": "entregas_por_motoqueiro",
+    "Resultado (%)": "resultado",
+    "Tempo de Ciclo": "tempo_ciclo_medio_min",
+    "Tempo de Rota": "tempo_rota_medio_min",
+}
+
+# Granularidades da série, da mais fina para a mais grossa
+GRANULARIDADES: Dict[str, str] = {'D': 'dia', 'W': 'semana', 'M': 'mês'}
+
+
+def escolher_granularidade(data_inicial: datetime.date, data_final: datetime.date,
+                           max_pontos: int = Config.MAX_PONTOS_SERIE) -> str:
+    """Granularidade mais fina ("D", "W" ou "M") com no máximo ``max_pontos`` pontos no período."""
+    for frequencia in GRANULARIDADES:
+        pontos = len(pd.period_range(data_inicial, data_final, freq=frequencia))
+        if pontos <= max_pontos:
+            return frequencia
+    return 'M'
+
+
+def _tabela(cubo: pd.DataFrame, rotas: pd.DataFrame, chaves: List[str]) -> pd.DataFrame:
+    """Indicadores numéricos por grupo de ``chaves`` (tempos médios em minutos)."""
+    indicadores = indicadores_tabela(agregar_niveis(cubo, rotas, chaves))
+    indicadores['tempo_ciclo_medio_min'] = indicadores['tempo_ciclo_medio_seg'] / 60
+    indicadores['tempo_rota_medio_min'] = indicadores['tempo_rota_medio_seg'] / 60
+    return indicadores[list(dict.fromkeys(INDICADORES_CARTOES.values()))]
+
+
+def calcular_detalhamento(df: pd.DataFrame, custos: ModeloCustos, filtros: Dict[str, Any],
+                          dimensoes: Optional[List[str]] = None) -> Dict[str, Any]:
+    """
+    Calcula as séries e as quebras por dimensão dos indicadores dos cartões.
+
+    O custo segue a regra dos cartões (ver ``custos.ModeloCustos``): cada
+    ponto da série rateia o custo dos dias do seu período (limitado ao
+    filtro); a série por hora e as quebras, o dos dias do filtro.
+
+    Args:
+        df: entregas filtradas, já processadas na ingestão
+        custos: modelo de custos da versão do dataset
+        filtros: filtros da barra lateral
+        dimensoes: dimensões das quebras; usa Config.DIMENSOES_DETALHE por padrão
+
+    Returns:
+        Dicionário com "granularidade" da série, "serie" (indexada pelo início
+        de cada período), "horas" (indexada pela hora da NF) e "dimensoes"
+        (uma tabela por dimensão, indexada pelo valor); ou {"erro": ...}
+    """
+    dimensoes = [dimensao for dimensao in (dimensoes or Config.DIMENSOES_DETALHE) if dimensao in DIMENSOES_CUBO]
+    if df.empty or 'data_hora_nf' not in df.columns:
+        return {"erro": "Sem dados para detalhar os indicadores"}
+
+    # Única passagem sobre as entregas: células por Data × hora × dimensões dos filtros
+    entregas = df.assign(hora=pd.to_datetime(df['data_hora_nf'], errors='coerce').dt.hour.astype('Int8'))
+    cubo = construir_cubo(entregas, ['Data', 'hora'] + DIMENSOES_CUBO[1:])
+    if cubo is None:
+        return {"erro": "Sem dados para detalhar os indicadores"}
+    cubo, rotas = cubo
+    data_inicial, data_final = pd.Timestamp(filtros['data_inicial']), pd.Timestamp(filtros['data_final'])
+
+    # Série temporal: cada célula cai no período (dia, semana ou mês) de sua Data
+    granularidade = escolher_granularidade(filtros['data_inicial'], filtros['data_final'])
+    periodos = cubo['Data'].dt.to_period(granularidade)
+    cubo['periodo'] = periodos.dt.start_time
+    rotas['periodo'] = rotas['Data'].dt.to_period(granularidade).dt.start_time
+
+    # Custo de cada célula no período do seu ponto da série e no período do filtro
+    custo_periodo = custos.alocar(cubo, cubo['periodo'].clip(lower=data_inicial),
+                                  periodos.dt.end_time.dt.normalize().clip(upper=data_final))
+    custo = custos.alocar(cubo, data_inicial, data_final)
+    cubo_serie = cubo if custo_periodo is None else cubo.assign(custo=custo_periodo)
+    if custo is not None:
+        cubo['custo'] = custo
+
+    return {
+        "granularidade": granularidade,
+        "serie": _tabela(cubo_serie, rotas, ['periodo']),
+        "horas": _tabela(cubo, rotas, ['hora']),
+        "dimensoes": {dimensao: _tabela(cubo, rotas, [dimensao]) for dimensao in dimensoes},
+    }
+
+
+def maiores(tabela: pd.DataFrame, indicador: str, quantidade: int = Config.TOP_N_DETALHE) -> pd.Series:
+    """Os ``quantidade`` maiores valores do indicador em uma tabela de quebra (nulos por último)."""
+    return tabela[indicador].dropna().nlargest(quantidade)
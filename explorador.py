@@ -0,0 +1,185 @@
+"""
+Consulta paginada das entregas filtradas, usada pelo explorador de dados
+brutos da interface.
+
+A consulta guarda apenas as posições das linhas selecionadas em cada índice
+de competência (ver ``IndiceFiltros.selecionar``). Busca e ordenação leem
+somente as colunas envolvidas, e apenas as linhas da página pedida (ou de
+cada bloco da exportação), nas colunas projetadas, são materializadas.
+"""
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+from typing import Any, BinaryIO, Dict, Iterator, List, Optional, Sequence
+
+from config import Config
+from fontes import unificar_esquemas
+from indice_filtros import IndiceFiltros
+from processamento import aplicar_esquema
+
+
+def _contem(serie: pd.Series, termo: str) -> np.ndarray:
+    """Máscara das linhas cujo valor contém o termo (sem diferenciar maiúsculas)."""
+    if isinstance(serie.dtype, pd.CategoricalDtype):
+        # Compara cada categoria uma única vez e seleciona pelos códigos
+        categorias = serie.cat.categories.astype(str).str.contains(termo, case=False, regex=False)
+        return np.isin(serie.cat.codes.to_numpy(), np.flatnonzero(categorias))
+    if isinstance(serie.dtype, pd.StringDtype):
+        return serie.str.contains(termo, case=False, regex=False, na=False).to_numpy(dtype=bool)
+    return serie.astype(str).str.contains(termo, case=False, regex=False).to_numpy() & serie.notna().to_numpy()
+
+
+class ConsultaEntregas:
+    """
+    Entregas filtradas sobre os índices das competências do período, sem
+    materializá-las. As linhas são numeradas na ordem natural (competência e
+    Data); a ordenação devolve uma permutação dessa numeração.
+    """
+
+    def __init__(self, indices: Sequence[IndiceFiltros], filtros: Dict[str, Any], busca: str = '',
+                 colunas_busca: Optional[List[str]] = None):
+        """
+        Args:
+            indices: índices das competências do período, em ordem cronológica
+            filtros: filtros da barra lateral
+            busca: termo procurado nas colunas de busca (vazio não filtra)
+            colunas_busca: colunas da busca; usa Config.COLUNAS_BUSCA por padrão
+        """
+        colunas_busca = Config.COLUNAS_BUSCA if colunas_busca is None else colunas_busca
+        self.partes = []
+        for indice in indices:
+            posicoes = indice.selecionar(filtros)
+            termo = busca.strip()
+            if termo and len(posicoes):
+                encontradas = np.zeros(len(posicoes), dtype=bool)
+                for coluna in colunas_busca:
+                    if coluna in indice.df.columns:
+                        encontradas |= _contem(indice.df[coluna].iloc[posicoes], termo)
+                posicoes = posicoes[encontradas]
+            if len(posicoes):
+                self.partes.append((indice, posicoes))
+
+        # Numeração da primeira linha de cada competência (e o total, ao final)
+        self.inicios = np.cumsum([0] + [len(posicoes) for _, posicoes in self.partes])
+        self.total = int(self.inicios[-1])
+
+    def colunas(self) -> List[str]:
+        """Colunas disponíveis para projeção e ordenação."""
+        return list(self.partes[0][0].df.columns) if self.partes else []
+
+    def _valores(self, coluna: str) -> pd.Series:
+        """Valores de uma coluna para todas as linhas selecionadas, na ordem natural."""
+        valores = [indice.df[coluna].iloc[posicoes].reset_index(drop=True) for indice, posicoes in self.partes]
+        serie = pd.concat(valores, ignore_index=True)
+        # Categorias distintas entre competências: ordena pelos valores, não pelos códigos
+        return serie.astype(object) if isinstance(serie.dtype, pd.CategoricalDtype) else serie
+
+    def ordem(self, ordenar_por: Optional[str] = None, decrescente: bool = False) -> np.ndarray:
+        """Numeração das linhas na ordem pedida (nulos no final)."""
+        if not ordenar_por or ordenar_por not in self.colunas():
+            ordem = np.arange(self.total)
+            return ordem[::-1] if decrescente else ordem
+        valores = self._valores(ordenar_por)
+        return valores.sort_values(ascending=not decrescente, kind='stable', na_position='last').index.to_numpy()
+
+    def materializar(self, linhas: np.ndarray, colunas: Optional[List[str]] = None) -> pd.DataFrame:
+        """Materializa apenas as linhas informadas (pela numeração da consulta), nas colunas projetadas."""
+        colunas = [coluna for coluna in (colunas or self.colunas()) if coluna in self.colunas()]
+        if not len(linhas):
+            return pd.DataFrame(columns=colunas)
+
+        parte = np.searchsorted(self.inicios, linhas, side='right') - 1
+        quadros, posicao_original = [], []
+        for numero in np.unique(parte):
+            mascara = parte == numero
+            indice, posicoes = self.partes[numero]
+            selecao = posicoes[linhas[mascara] - self.inicios[numero]]
+            quadros.append(indice.df.iloc[selecao, indice.df.columns.get_indexer(colunas)])
+            posicao_original.append(np.flatnonzero(mascara))
+
+        df = quadros[0] if len(quadros) == 1 else aplicar_esquema(pd.concat(quadros, ignore_index=True))
+        return df.iloc[np.argsort(np.concatenate(posicao_original), kind='stable')].reset_index(drop=True)
+
+    def pagina(self, numero: int, tamanho: int, colunas: Optional[List[str]] = None,
+               ordenar_por: Optional[str] = None, decrescente: bool = False) -> pd.DataFrame:
+        """
+        Materializa uma página da consulta.
+
+        Args:
+            numero: página (começando em 0)
+            tamanho: linhas por página
+            colunas: colunas projetadas; todas por padrão
+            ordenar_por: coluna de ordenação; ordem natural por padrão
+            decrescente: inverte a ordenação
+
+        Returns:
+            DataFrame com as linhas da página
+        """
+        inicio = max(numero, 0) * tamanho
+        if ordenar_por is None and not decrescente:
+            linhas = np.arange(inicio, min(inicio + tamanho, self.total))
+        else:
+            linhas = self.ordem(ordenar_por, decrescente)[inicio:inicio + tamanho]
+        return self.materializar(linhas, colunas)
+
+    def blocos(self, colunas: Optional[List[str]] = None, ordenar_por: Optional[str] = None,
+               decrescente: bool = False, tamanho: int = Config.TAMANHO_LOTE) -> Iterator[pd.DataFrame]:
+        """Percorre toda a consulta em blocos materializados um de cada vez."""
+        ordem = self.ordem(ordenar_por, decrescente)
+        for inicio in range(0, self.total, tamanho):
+            yield self.materializar(ordem[inicio:inicio + tamanho], colunas)
+
+
+def _tabela_exportacao(bloco: pd.DataFrame) -> pa.Table:
+    """
+    Converte um bloco exportado em tabela Arrow. Categorias, textos e colunas
+    de objetos viram texto, para que o esquema não varie entre os blocos.
+    """
+    colunas = {}
+    for coluna in bloco.columns:
+        serie = bloco[coluna]
+        if isinstance(serie.dtype, (pd.CategoricalDtype, pd.StringDtype)) or serie.dtype == object:
+            colunas[coluna] = pa.array([None if pd.isna(valor) else str(valor) for valor in serie.astype(object)],
+                                       type=pa.string())
+        else:
+            colunas[coluna] = pa.Array.from_pandas(serie)
+    return pa.table(colunas)
+
+
+def exportar(consulta: ConsultaEntregas, arquivo: BinaryIO, formato: str = 'csv',
+             colunas: Optional[List[str]] = None, ordenar_por: Optional[str] = None,
+             decrescente: bool = False, tamanho_bloco: int = Config.TAMANHO_LOTE) -> int:
+    """
+    Grava toda a consulta em CSV ou parquet, bloco a bloco, sem materializar
+    o conjunto filtrado inteiro.
+
+    Args:
+        consulta: consulta a exportar
+        arquivo: arquivo binário de destino
+        formato: "csv" ou "parquet"
+        colunas: colunas exportadas; todas por padrão
+        ordenar_por: coluna de ordenação; ordem natural por padrão
+        decrescente: inverte a ordenação
+        tamanho_bloco: linhas materializadas por vez
+
+    Returns:
+        Número de linhas exportadas
+    """
+    linhas = 0
+    if formato == 'csv':
+        for numero, bloco in enumerate(consulta.blocos(colunas, ordenar_por, decrescente, tamanho_bloco)):
+            arquivo.write(bloco.to_csv(index=False, header=numero == 0).encode('utf-8'))
+            linhas += len(bloco)
+        return linhas
+
+    # O esquema do parquet é fixado antes do primeiro bloco: o das competências unificado,
+    # obtido da primeira linha de cada uma (os tipos são os das colunas de cada índice)
+    amostras = [consulta.materializar(consulta.inicios[numero:numero + 1], colunas)
+                for numero in range(len(consulta.partes))] or [consulta.materializar(np.empty(0, dtype=int), colunas)]
+    esquema = unificar_esquemas([_tabela_exportacao(amostra).schema for amostra in amostras])
+    with pq.ParquetWriter(arquivo, esquema) as escritor:
+        for bloco in consulta.blocos(colunas, ordenar_por, decrescente, tamanho_bloco):
+            escritor.write_table(_tabela_exportacao(bloco).cast(esquema))
+            linhas += len(bloco)
+    return linhas
@@ -0,0 +1,228 @@
+import datetime
+import json
+import os
+import uuid
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, List, Optional, Sequence
+
+from config import Config
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+
+# Estados de um job de atualização
+PENDENTE = "pendente"
+EXECUTANDO = "executando"
+CONCLUIDO = "concluido"
+ERRO = "erro"
+ESTADOS_FINAIS = (CONCLUIDO, ERRO)
+
+Relogio = Callable[[], datetime.datetime]
+
+
+def _gravar_json(destino: Path, dados: Dict[str, Any]) -> None:
+    """Grava um arquivo JSON de forma atômica."""
+    destino.parent.mkdir(parents=True, exist_ok=True)
+    temporario = destino.with_name(f"{destino.name}.{uuid.uuid4().hex}.tmp")
+    with open(temporario, 'w', encoding='utf-8') as arquivo:
+        json.dump(dados, arquivo, ensure_ascii=False, indent=2)
+    os.replace(temporario, destino)
+
+
+def _ler_json(caminho: Path) -> Optional[Dict[str, Any]]:
+    """Lê um arquivo JSON; retorna None se não existir ou estiver corrompido."""
+    try:
+        with open(caminho, encoding='utf-8') as arquivo:
+            return json.load(arquivo)
+    except (OSError, ValueError):
+        return None
+
+
+# Jobs
+def caminho_job(job_id: str, diretorio: Path = Config.FILA_DIR) -> Path:
+    """Retorna o arquivo de estado de um job da fila."""
+    return diretorio / f"job-{job_id}.json"
+
+
+def listar_jobs(diretorio: Path = Config.FILA_DIR, estados: Optional[Sequence[str]] = None) -> List[Dict[str, Any]]:
+    """Lista os jobs da fila (filtrados por estado), do mais antigo para o mais recente."""
+    jobs = []
+    for caminho in diretorio.glob('job-*.json'):
+        job = _ler_json(caminho)
+        if job is not None and (estados is None or job.get("estado") in estados):
+            jobs.append(job)
+    return sorted(jobs, key=lambda job: (job.get("criado_em", ""), job.get("id", "")))
+
+
+def gravar_job(job: Dict[str, Any], diretorio: Path = Config.FILA_DIR) -> None:
+    """Grava o estado de um job."""
+    _gravar_json(caminho_job(job["id"], diretorio), job)
+
+
+def enfileirar(tipo: str = "manual", forcar: bool = False, diretorio: Path = Config.FILA_DIR,
+               relogio: Relogio = datetime.datetime.now) -> str:
+    """
+    Solicita uma atualização ao worker.
+
+    Se já houver um job pendente que cubra o pedido (mesma ou maior
+    abrangência), o pedido é agrupado a ele e o id existente é retornado.
+
+    Args:
+        tipo: origem do pedido ("manual", "diario", "inicial")
+        forcar: reconstrói todo o cache em vez de atualizar incrementalmente
+        diretorio: diretório da fila
+        relogio: fonte do horário atual
+
+    Returns:
+        Id do job a acompanhar com ``status_job``
+    """
+    for job in listar_jobs(diretorio, [PENDENTE]):
+        if job.get("forcar") or not forcar:
+            return job["id"]
+
+    agora = relogio()
+    job = {
+        "id": f"{agora.strftime('%Y%m%d%H%M%S%f')}-{uuid.uuid4().hex[:8]}",
+        "tipo": tipo,
+        "forcar": forcar,
+        "estado": PENDENTE,
+        "mensagem": "Aguardando o worker de atualização",
+        "criado_em": agora.isoformat(),
+        "iniciado_em": None,
+        "concluido_em": None,
+        "lote": None,
+        "erro": None,
+    }
+    gravar_job(job, diretorio)
+    return job["id"]
+
+
+def status_job(job_id: str, diretorio: Path = Config.FILA_DIR) -> Optional[Dict[str, Any]]:
+    """Retorna o estado atual de um job (None se ele não existir mais)."""
+    return _ler_json(caminho_job(job_id, diretorio))
+
+
+def limpar_jobs(diretorio: Path = Config.FILA_DIR, manter: int = Config.RETENCAO_JOBS) -> None:
+    """Remove os jobs finalizados mais antigos, mantendo os ``manter`` mais recentes."""
+    finalizados = listar_jobs(diretorio, ESTADOS_FINAIS)
+    for job in finalizados[:max(len(finalizados) - manter, 0)]:
+        caminho_job(job["id"], diretorio).unlink(missing_ok=True)
+
+
+# Trava de escritor único
+class TravaEscritor:
+    """
+    Trava de escritor único baseada em arquivo.
+
+    O arquivo guarda o dono e o horário do último sinal de vida (heartbeat).
+    Uma trava sem sinal de vida há mais de ``validade_seg`` é considerada
+    abandonada e pode ser tomada por outro processo. O horário vem do relógio
+    informado, o que permite testes com relógio simulado.
+
+    Aquisição, tomada, renovação e liberação leem, verificam o dono e gravam
+    o arquivo dentro de uma seção exclusiva entre processos (flock sobre um
+    arquivo auxiliar, que nunca é removido): dois workers não podem ambos
+    julgar a trava abandonada e tomá-la, nem renovar uma trava já tomada por
+    outro. Depois de gravar, o dono é conferido relendo o arquivo.
+    """
+
+    def __init__(self, caminho: Path, dono: str, validade_seg: float = Config.VALIDADE_TRAVA_SEG,
+                 relogio: Relogio = datetime.datetime.now):
+        self.caminho = caminho
+        self.dono = dono
+        self.validade_seg = validade_seg
+        self._relogio = relogio
+
+    def _conteudo(self) -> Dict[str, Any]:
+        return {"dono": self.dono, "pid": os.getpid(), "heartbeat": self._relogio().isoformat()}
+
+    @contextmanager
+    def _exclusiva(self) -> Iterator[None]:
+        """Seção exclusiva entre processos (e threads) sobre o arquivo auxiliar da trava."""
+        self.caminho.parent.mkdir(parents=True, exist_ok=True)
+        with open(self.caminho.with_name(self.caminho.name + '.guarda'), 'a+b') as guarda:
+            if fcntl is not None:
+                fcntl.flock(guarda.fileno(), fcntl.LOCK_EX)
+            else:
+                guarda.seek(0)
+                msvcrt.locking(guarda.fileno(), msvcrt.LK_LOCK, 1)
+            try:
+                yield
+            finally:
+                if fcntl is not None:
+                    fcntl.flock(guarda.fileno(), fcntl.LOCK_UN)
+                else:
+                    guarda.seek(0)
+                    msvcrt.locking(guarda.fileno(), msvcrt.LK_UNLCK, 1)
+
+    def _gravar_se_dono(self, tomar: bool) -> bool:
+        """
+        Grava o sinal de vida se a trava for deste dono ou, com ``tomar``, se
+        estiver livre ou abandonada. Chamado dentro da seção exclusiva.
+        """
+        dados = self.ler()
+        proprio = dados is not None and dados.get("dono") == self.dono
+        if not proprio and not (tomar and self.abandonada(dados)):
+            return False
+        _gravar_json(self.caminho, self._conteudo())
+        dados = self.ler()
+        return dados is not None and dados.get("dono") == self.dono
+
+    def ler(self) -> Optional[Dict[str, Any]]:
+        """Retorna o conteúdo atual da trava (None se não houver trava)."""
+        return _ler_json(self.caminho)
+
+    def abandonada(self, dados: Optional[Dict[str, Any]]) -> bool:
+        """Indica se a trava não recebe sinal de vida dentro da validade."""
+        if dados is None or not dados.get("heartbeat"):
+            return True
+        idade = self._relogio() - datetime.datetime.fromisoformat(dados["heartbeat"])
+        return idade.total_seconds() > self.validade_seg
+
+    def adquirir(self) -> bool:
+        """Tenta adquirir (ou tomar, se abandonada) a trava; retorna True se este dono passou a detê-la."""
+        with self._exclusiva():
+            return self._gravar_se_dono(tomar=True)
+
+    def renovar(self) -> bool:
+        """Renova o sinal de vida; retorna False se a trava não pertence mais a este dono."""
+        with self._exclusiva():
+            return self._gravar_se_dono(tomar=False)
+
+    def liberar(self) -> None:
+        """Libera a trava, se pertencer a este dono."""
+        with self._exclusiva():
+            dados = self.ler()
+            if dados is not None and dados.get("dono") == self.dono:
+                self.caminho.unlink(missing_ok=True)
+
+
+def caminho_trava(diretorio: Path = Config.FILA_DIR) -> Path:
+    """Retorna o arquivo de trava do worker de atualização."""
+    return diretorio / 'worker.lock'
+
+
+def caminho_status_worker(diretorio: Path = Config.FILA_DIR) -> Path:
+    """Retorna o arquivo de estado publicado pelo worker."""
+    return diretorio / 'worker.json'
+
+
+def status_worker(diretorio: Path = Config.FILA_DIR) -> Optional[Dict[str, Any]]:
+    """Retorna o estado publicado pelo worker (próxima execução diária, última execução etc.)."""
+    return _ler_json(caminho_status_worker(diretorio))
+
+
+def gravar_status_worker(estado: Dict[str, Any], diretorio: Path = Config.FILA_DIR) -> None:
+    """Publica o estado do worker."""
+    _gravar_json(caminho_status_worker(diretorio), estado)
+
+
+def worker_ativo(diretorio: Path = Config.FILA_DIR, relogio: Relogio = datetime.datetime.now) -> bool:
+    """Indica se há um worker detendo a trava com sinal de vida recente."""
+    trava = TravaEscritor(caminho_trava(diretorio), dono="", relogio=relogio)
+    return not trava.abandonada(trava.ler())
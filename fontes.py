@@ -0,0 +1,547 @@
+import abc
+import contextlib
+import glob
+import hashlib
+import os
+import re
+import shutil
+import sqlite3
+import threading
+import uuid
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from openpyxl import load_workbook
+from pandas.io.parsers import TextParser
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, List, Optional, Sequence, Union
+
+from config import Config
+
+
+# Recebe as linhas já lidas da origem e o total estimado (None se desconhecido)
+Progresso = Callable[[int, Optional[int]], None]
+
+
+def fingerprint_arquivo(caminho: Path, calcular_hash: bool = True) -> Dict[str, Any]:
+    """
+    Gera a impressão digital de um arquivo de origem.
+
+    Args:
+        caminho: arquivo de origem
+        calcular_hash: se False, omite o hash do conteúdo (apenas tamanho e mtime)
+
+    Returns:
+        Dicionário com tamanho, mtime_ns e sha256 do arquivo
+    """
+    info = caminho.stat()
+    fingerprint = {"tamanho": info.st_size, "mtime_ns": info.st_mtime_ns, "sha256": None}
+    if calcular_hash:
+        sha = hashlib.sha256()
+        with open(caminho, 'rb') as arquivo:
+            for bloco in iter(lambda: arquivo.read(1024 * 1024), b''):
+                sha.update(bloco)
+        fingerprint["sha256"] = sha.hexdigest()
+    return fingerprint
+
+
+def _lote_de_linhas(colunas: Sequence[str], linhas: List[Sequence[Any]]) -> pa.RecordBatch:
+    """Converte linhas (tuplas) retornadas por um cursor em um lote Arrow."""
+    if not linhas:
+        return pa.RecordBatch.from_arrays([pa.array([], type=pa.null()) for _ in colunas], names=list(colunas))
+    return pa.RecordBatch.from_arrays([pa.array(list(valores)) for valores in zip(*linhas)], names=list(colunas))
+
+
+def unificar_esquemas(esquemas: Sequence[pa.Schema]) -> pa.Schema:
+    """
+    Unifica os esquemas dos lotes de uma origem (nulo com qualquer tipo,
+    inteiro com decimal etc.). Colunas com tipos incompatíveis entre lotes -
+    como números em um lote e texto em outro - passam a ser texto.
+    """
+    try:
+        return pa.unify_schemas(esquemas, promote_options='permissive')
+    except (pa.ArrowInvalid, pa.ArrowTypeError):
+        pass
+    campos: Dict[str, List[pa.Field]] = {}
+    for esquema in esquemas:
+        for campo in esquema:
+            campos.setdefault(campo.name, []).append(campo)
+    unificados = []
+    for nome, variantes in campos.items():
+        try:
+            unificados.append(pa.unify_schemas([pa.schema([campo]) for campo in variantes],
+                                                promote_options='permissive').field(nome))
+        except (pa.ArrowInvalid, pa.ArrowTypeError):
+            unificados.append(pa.field(nome, pa.string()))
+    return pa.schema(unificados)
+
+
+def _ajustar_esquema(tabela: pa.Table, esquema: pa.Schema) -> pa.Table:
+    """Converte a tabela para o esquema unificado, preenchendo com nulos as colunas ausentes."""
+    colunas = [tabela.column(campo.name).cast(campo.type) if campo.name in tabela.column_names
+               else pa.nulls(tabela.num_rows, campo.type) for campo in esquema]
+    return pa.Table.from_arrays(colunas, schema=esquema)
+
+
+class FonteDados(abc.ABC):
+    """
+    Origem dos dados de entrega usada na atualização do cache.
+
+    Cada implementação informa uma impressão digital da origem (para decidir
+    se o cache ainda é válido) e entrega as linhas brutas com data_hora_nf
+    posterior a um watermark em lotes Arrow, sem montar um único DataFrame
+    com toda a origem.
+    """
+
+    # Se as linhas novas podem ser obtidas pelo watermark de data_hora_nf; do
+    # contrário, toda mudança na origem leva a uma carga completa
+    incremental: bool = True
+
+    @abc.abstractmethod
+    def impressao_digital(self, calcular_hash: bool = True) -> Dict[str, Any]:
+        """Retorna a impressão digital atual da origem; deve conter a chave sha256."""
+
+    def conferir(self, registrada: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """
+        Confere a origem contra a impressão digital registrada no cache.
+
+        Returns:
+            A impressão digital atual se a origem não mudou (ela pode diferir
+            da registrada em campos auxiliares, como o mtime); None se mudou
+        """
+        atual = self.impressao_digital()
+        return atual if atual.get("sha256") == registrada.get("sha256") else None
+
+    @abc.abstractmethod
+    def lotes(self, desde: Optional[pd.Timestamp] = None, tamanho_lote: int = Config.TAMANHO_LOTE,
+              progresso: Optional[Progresso] = None) -> Iterator[pa.RecordBatch]:
+        """
+        Entrega as linhas brutas com data_hora_nf posterior a ``desde`` (todas,
+        sem ``desde``). Os tipos de cada lote são inferidos apenas a partir
+        dele, então uma coluna pode variar de tipo entre lotes (ex.: nula em um
+        lote e texto em outro). ``progresso`` é chamado após cada lote lido.
+        """
+
+    def ler(self, desde: Optional[pd.Timestamp] = None, progresso: Optional[Progresso] = None) -> pd.DataFrame:
+        """Lê as linhas brutas com data_hora_nf posterior a ``desde`` em um DataFrame."""
+        tabelas = [pa.Table.from_batches([lote]) for lote in self.lotes(desde, progresso=progresso)]
+        if not tabelas:
+            return pd.DataFrame()
+        esquema = unificar_esquemas([tabela.schema for tabela in tabelas])
+        tabela = pa.concat_tables([_ajustar_esquema(tabela, esquema) for tabela in tabelas])
+        return tabela.to_pandas(coerce_temporal_nanoseconds=True)
+
+
+class FonteExcel(FonteDados):
+    """
+    Planilha Excel estática (dados.xlsx), lida em modo somente leitura linha a
+    linha: apenas um lote de linhas fica em memória por vez, independentemente
+    do tamanho do arquivo.
+    """
+
+    def __init__(self, caminho: Path = Config.EXCEL_FILE):
+        self.caminho = Path(caminho)
+
+    def __repr__(self) -> str:
+        return f"FonteExcel({str(self.caminho)!r})"
+
+    def impressao_digital(self, calcular_hash: bool = True) -> Dict[str, Any]:
+        return fingerprint_arquivo(self.caminho, calcular_hash)
+
+    def conferir(self, registrada: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """
+        Tamanho e mtime iguais aos registrados validam a origem sem lê-la. Se
+        apenas o mtime mudou (arquivo copiado ou regravado), o hash do
+        conteúdo decide.
+        """
+        atual = fingerprint_arquivo(self.caminho, calcular_hash=False)
+        if atual["tamanho"] != registrada.get("tamanho"):
+            return None
+        if atual["mtime_ns"] == registrada.get("mtime_ns"):
+            return registrada
+        return super().conferir(registrada)
+
+    def _converter(self, cabecalho: Sequence[Any], linhas: List[Sequence[Any]],
+                   desde: Optional[pd.Timestamp]) -> pa.RecordBatch:
+        """
+        Converte um bloco de linhas da planilha em lote Arrow com a mesma
+        inferência de tipos do ``pd.read_excel`` (valores nulos, números em
+        células de texto, nomes de colunas repetidos) e aplica o watermark.
+        """
+        bloco = TextParser([list(cabecalho)] + [list(linha) for linha in linhas], header=0).read()
+        if desde is not None:
+            data_nf = pd.to_datetime(bloco['data_hora_nf'], errors='coerce')
+            bloco = bloco[data_nf > desde]
+        return pa.RecordBatch.from_pandas(bloco, preserve_index=False).replace_schema_metadata(None)
+
+    def lotes(self, desde: Optional[pd.Timestamp] = None, tamanho_lote: int = Config.TAMANHO_LOTE,
+              progresso: Optional[Progresso] = None) -> Iterator[pa.RecordBatch]:
+        livro = load_workbook(self.caminho, read_only=True, data_only=True)
+        try:
+            planilha = livro.worksheets[0]
+            # Em modo somente leitura, max_row vem da dimensão declarada na planilha
+            total = planilha.max_row - 1 if planilha.max_row else None
+            linhas = planilha.iter_rows(values_only=True)
+            cabecalho = next(linhas, None)
+            if cabecalho is None:
+                return
+            bloco: List[Sequence[Any]] = []
+            lidas = 0
+            entregues = 0
+            for linha in linhas:
+                bloco.append(linha)
+                if len(bloco) < tamanho_lote:
+                    continue
+                lidas += len(bloco)
+                lote = self._converter(cabecalho, bloco, desde)
+                bloco = []
+                if progresso:
+                    progresso(lidas, total)
+                if lote.num_rows:
+                    entregues += 1
+                    yield lote
+            if bloco or not entregues:
+                lidas += len(bloco)
+                lote = self._converter(cabecalho, bloco, desde)
+                if progresso:
+                    progresso(lidas, total)
+                if lote.num_rows or not entregues:
+                    yield lote
+        finally:
+            livro.close()
+
+
+def preparar_planilha(caminho: Path, destino: Path, tamanho_lote: int = Config.TAMANHO_LOTE) -> int:
+    """
+    Converte uma planilha em um diretório de arquivos parquet, um por lote
+    bruto tipado (ver ``FonteExcel.lotes``). O diretório é montado à parte e
+    movido para ``destino`` ao final. Executada nos processos do pool de
+    ingestão de ``FontePastaExcel``.
+
+    Returns:
+        Número de linhas convertidas
+    """
+    temporario = destino.with_name(f"{destino.name}.{os.getpid()}.tmp")
+    shutil.rmtree(temporario, ignore_errors=True)
+    temporario.mkdir(parents=True)
+    linhas = 0
+    for numero, lote in enumerate(FonteExcel(caminho).lotes(tamanho_lote=tamanho_lote)):
+        pq.write_table(pa.Table.from_batches([lote]), temporario / f"lote-{numero:06d}.parquet")
+        linhas += lote.num_rows
+    shutil.rmtree(destino, ignore_errors=True)
+    os.replace(temporario, destino)
+    return linhas
+
+
+class FontePastaExcel(FonteDados):
+    """
+    Várias planilhas Excel (ex.: uma exportação por filial ou por mês) lidas
+    como uma única origem.
+
+    Cada planilha é convertida para parquet uma única vez por conteúdo (hash
+    sha256) em ``preparados``; as planilhas novas ou alteradas são convertidas
+    em paralelo em um pool de processos e as inalteradas são reaproveitadas.
+    Linhas com a mesma chave de entrega em mais de uma planilha são entregues
+    uma única vez: prevalece a da planilha que vem por último na ordem
+    alfabética dos nomes (nomeie as exportações por data). Como uma planilha
+    nova pode trazer entregas de qualquer data, a fonte não é incremental.
+    """
+
+    incremental = False
+
+    def __init__(self, padrao: Union[str, Path] = Config.PASTA_EXCEL, preparados: Path = Config.PREPARADOS_DIR,
+                 processos: int = Config.PROCESSOS_INGESTAO, chave: Sequence[str] = tuple(Config.CHAVE_ENTREGA)):
+        """
+        Args:
+            padrao: diretório (todas as planilhas .xlsx) ou padrão glob das planilhas
+            preparados: diretório das planilhas convertidas para parquet
+            processos: processos usados na conversão
+            chave: colunas que identificam uma entrega
+        """
+        self.padrao = str(padrao)
+        self.preparados = Path(preparados)
+        self.processos = max(int(processos), 1)
+        self.chave = list(chave)
+
+    def __repr__(self) -> str:
+        return f"FontePastaExcel({self.padrao!r})"
+
+    def arquivos(self) -> List[Path]:
+        """Lista as planilhas da origem em ordem alfabética (arquivos temporários do Excel são ignorados)."""
+        padrao = str(Path(self.padrao) / '*.xlsx') if Path(self.padrao).is_dir() else self.padrao
+        return sorted((Path(nome) for nome in glob.glob(padrao)
+                       if Path(nome).is_file() and not Path(nome).name.startswith('~$')),
+                      key=lambda caminho: (caminho.name, str(caminho)))
+
+    def impressao_digital(self, calcular_hash: bool = True) -> Dict[str, Any]:
+        arquivos = {str(arquivo): fingerprint_arquivo(arquivo, calcular_hash) for arquivo in self.arquivos()}
+        return self._impressao(arquivos) if calcular_hash else {"padrao": self.padrao, "arquivos": arquivos,
+                                                                "sha256": None}
+
+    def _impressao(self, arquivos: Dict[str, Dict[str, Any]]) -> Dict[str, Any]:
+        """Monta a impressão digital da pasta a partir das impressões de cada planilha."""
+        assinatura = "|".join(f"{nome}:{impressao['sha256']}" for nome, impressao in arquivos.items())
+        return {"padrao": self.padrao, "arquivos": arquivos,
+                "sha256": hashlib.sha256(assinatura.encode()).hexdigest()}
+
+    def conferir(self, registrada: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """
+        Confere planilha a planilha: tamanho e mtime iguais aos registrados
+        validam a planilha sem lê-la; se apenas o mtime mudou, o hash decide.
+        Planilhas novas ou removidas invalidam a origem.
+        """
+        registrados = registrada.get("arquivos") or {}
+        atuais: Dict[str, Dict[str, Any]] = {}
+        for arquivo in self.arquivos():
+            anterior = registrados.get(str(arquivo))
+            atual = fingerprint_arquivo(arquivo, calcular_hash=False)
+            if anterior is None or atual["tamanho"] != anterior.get("tamanho"):
+                return None
+            if atual["mtime_ns"] != anterior.get("mtime_ns"):
+                atual = fingerprint_arquivo(arquivo)
+                if atual["sha256"] != anterior.get("sha256"):
+                    return None
+                anterior = atual
+            atuais[str(arquivo)] = anterior
+        if set(atuais) != set(registrados):
+            return None
+        return self._impressao(atuais)
+
+    def preparar(self, progresso: Optional[Progresso] = None) -> List[Path]:
+        """
+        Converte para parquet as planilhas ainda não convertidas e remove as
+        conversões de planilhas que saíram da origem.
+
+        Returns:
+            Diretórios das planilhas convertidas, na ordem de ``arquivos``
+        """
+        self.preparados.mkdir(parents=True, exist_ok=True)
+        destinos = [(arquivo, self.preparados / fingerprint_arquivo(arquivo)["sha256"])
+                    for arquivo in self.arquivos()]
+        pendentes = [(arquivo, destino) for arquivo, destino in destinos if not destino.is_dir()]
+
+        convertidas = 0
+        if len(pendentes) == 1 or self.processos == 1:
+            for arquivo, destino in pendentes:
+                convertidas += preparar_planilha(arquivo, destino)
+                if progresso:
+                    progresso(convertidas, None)
+        elif pendentes:
+            with ProcessPoolExecutor(max_workers=min(self.processos, len(pendentes))) as pool:
+                futuros = [pool.submit(preparar_planilha, arquivo, destino) for arquivo, destino in pendentes]
+                for futuro in as_completed(futuros):
+                    convertidas += futuro.result()
+                    if progresso:
+                        progresso(convertidas, None)
+
+        ativos = {destino.name for _, destino in destinos}
+        for item in self.preparados.iterdir():
+            if item.is_dir() and item.name not in ativos:
+                shutil.rmtree(item, ignore_errors=True)
+        return [destino for _, destino in destinos]
+
+    def _linhas_mantidas(self, partes: List[Path]) -> List[Optional[np.ndarray]]:
+        """
+        Marca, em cada arquivo convertido, as linhas que não são repetidas por
+        um arquivo posterior. Apenas as colunas da chave são lidas; linhas com
+        chave incompleta são sempre mantidas.
+        """
+        chaves = []
+        for numero, parte in enumerate(partes):
+            if not set(self.chave) <= set(pq.read_schema(parte).names):
+                continue
+            tabela = pq.read_table(parte, columns=self.chave)
+            chave = pd.DataFrame({coluna: tabela.column(coluna).cast(pa.string()).to_pandas()
+                                  for coluna in self.chave})
+            chave['_parte'] = numero
+            chaves.append(chave)
+
+        mantidas: List[Optional[np.ndarray]] = [None] * len(partes)
+        if not chaves:
+            return mantidas
+        chaves = pd.concat(chaves, ignore_index=True)
+        repetidas = chaves.duplicated(subset=self.chave, keep='last') & chaves[self.chave].notna().all(axis=1)
+        for numero, posicoes in chaves.groupby('_parte').indices.items():
+            mantidas[numero] = ~repetidas.to_numpy()[posicoes]
+        return mantidas
+
+    def lotes(self, desde: Optional[pd.Timestamp] = None, tamanho_lote: int = Config.TAMANHO_LOTE,
+              progresso: Optional[Progresso] = None) -> Iterator[pa.RecordBatch]:
+        partes = [parte for diretorio in self.preparar(progresso) for parte in sorted(diretorio.glob('lote-*.parquet'))]
+        entregues = 0
+        for parte, mantidas in zip(partes, self._linhas_mantidas(partes)):
+            tabela = pq.read_table(parte)
+            if mantidas is not None:
+                tabela = tabela.filter(pa.array(mantidas))
+            if desde is not None and 'data_hora_nf' in tabela.column_names:
+                data_nf = pd.to_datetime(tabela.column('data_hora_nf').to_pandas(), errors='coerce')
+                tabela = tabela.filter(pa.array((data_nf > desde).to_numpy()))
+            for lote in tabela.to_batches(max_chunksize=tamanho_lote):
+                if lote.num_rows or not entregues:
+                    entregues += 1
+                    yield lote
+
+
+class FonteSQL(FonteDados):
+    """
+    Tabela ou view SQL. As linhas novas são consultadas com
+    ``WHERE data_hora_nf > :watermark`` e lidas do cursor em lotes.
+
+    A impressão digital é a contagem de linhas e o maior data_hora_nf da
+    tabela: alterações que não mudam nenhum dos dois só são incorporadas
+    dentro da janela de reprocessamento da próxima atualização que ocorrer.
+    """
+
+    # Marcador do parâmetro na sintaxe do driver
+    marcador: str = ":watermark"
+
+    def __init__(self, tabela: str = Config.TABELA_ENTREGAS):
+        if not re.fullmatch(r"[A-Za-z_][A-Za-z0-9_]*(\.[A-Za-z_][A-Za-z0-9_]*)?", tabela):
+            raise ValueError(f"Nome de tabela inválido: {tabela}")
+        self.tabela = tabela
+
+    @abc.abstractmethod
+    def _conexao(self) -> contextlib.AbstractContextManager:
+        """Abre (ou obtém do pool) uma conexão com o banco."""
+
+    def _cursor(self, conexao: Any, tamanho_lote: int) -> Any:
+        """Cria o cursor usado para ler as linhas em lotes."""
+        return conexao.cursor()
+
+    def _parametro(self, desde: pd.Timestamp) -> Any:
+        """Converte o watermark no valor de parâmetro aceito pelo driver."""
+        return desde.to_pydatetime()
+
+    def impressao_digital(self, calcular_hash: bool = True) -> Dict[str, Any]:
+        with self._conexao() as conexao:
+            cursor = conexao.cursor()
+            cursor.execute(f"SELECT COUNT(*), MAX(data_hora_nf) FROM {self.tabela}")
+            linhas, maximo = cursor.fetchone()
+            cursor.close()
+        maximo = None if maximo is None else str(maximo)
+        assinatura = f"{self.tabela}|{linhas}|{maximo}"
+        return {"tabela": self.tabela, "linhas": linhas, "max_data_hora_nf": maximo,
+                "sha256": hashlib.sha256(assinatura.encode()).hexdigest()}
+
+    def lotes(self, desde: Optional[pd.Timestamp] = None, tamanho_lote: int = Config.TAMANHO_LOTE,
+              progresso: Optional[Progresso] = None) -> Iterator[pa.RecordBatch]:
+        consulta = f"SELECT * FROM {self.tabela}"
+        parametros: Dict[str, Any] = {}
+        if desde is not None:
+            consulta += f" WHERE data_hora_nf > {self.marcador}"
+            parametros["watermark"] = self._parametro(pd.Timestamp(desde))
+
+        with self._conexao() as conexao:
+            cursor = self._cursor(conexao, tamanho_lote)
+            try:
+                cursor.execute(consulta, parametros)
+                linhas = cursor.fetchmany(tamanho_lote)
+                colunas = [descricao[0] for descricao in cursor.description]
+                if not linhas:
+                    yield _lote_de_linhas(colunas, [])
+                lidas = 0
+                while linhas:
+                    lidas += len(linhas)
+                    yield _lote_de_linhas(colunas, linhas)
+                    if progresso:
+                        progresso(lidas, None)
+                    linhas = cursor.fetchmany(tamanho_lote)
+            finally:
+                cursor.close()
+
+
+class FontePostgres(FonteSQL):
+    """
+    Banco PostgreSQL (view vw_entregas_vuupt). Usa um pool de conexões por
+    DSN compartilhado pelo processo e cursor nomeado (do lado do servidor),
+    para que o resultado não seja materializado de uma vez no cliente.
+    """
+
+    marcador = "%(watermark)s"
+    _pools: Dict[str, Any] = {}
+    _trava_pools = threading.Lock()
+
+    def __init__(self, tabela: str = Config.TABELA_ENTREGAS, dsn: str = Config.POSTGRES_DSN):
+        super().__init__(tabela)
+        if not dsn:
+            raise ValueError("DSN do PostgreSQL não configurado (variável de ambiente DATABASE_URL).")
+        self.dsn = dsn
+
+    def __repr__(self) -> str:
+        return f"FontePostgres({self.tabela!r})"
+
+    def _pool(self) -> Any:
+        """Retorna o pool de conexões do DSN, criando-o na primeira utilização."""
+        with self._trava_pools:
+            if self.dsn not in self._pools:
+                from psycopg2.pool import ThreadedConnectionPool
+                self._pools[self.dsn] = ThreadedConnectionPool(Config.POOL_MIN_CONEXOES, Config.POOL_MAX_CONEXOES,
+                                                               self.dsn)
+            return self._pools[self.dsn]
+
+    @contextlib.contextmanager
+    def _conexao(self) -> Iterator[Any]:
+        pool = self._pool()
+        conexao = pool.getconn()
+        try:
+            yield conexao
+            conexao.rollback()  # somente leitura: encerra a transação do cursor nomeado
+        except BaseException:
+            conexao.rollback()
+            raise
+        finally:
+            pool.putconn(conexao)
+
+    def _cursor(self, conexao: Any, tamanho_lote: int) -> Any:
+        cursor = conexao.cursor(name=f"entregas_{uuid.uuid4().hex[:12]}")
+        cursor.itersize = tamanho_lote
+        return cursor
+
+
+class FonteSQLite(FonteSQL):
+    """Banco SQLite local, usado como substituto do PostgreSQL em testes e benchmarks."""
+
+    def __init__(self, caminho: Path = Config.SQLITE_FILE, tabela: str = Config.TABELA_ENTREGAS):
+        super().__init__(tabela)
+        self.caminho = Path(caminho)
+
+    def __repr__(self) -> str:
+        return f"FonteSQLite({str(self.caminho)!r}, {self.tabela!r})"
+
+    @contextlib.contextmanager
+    def _conexao(self) -> Iterator[sqlite3.Connection]:
+        conexao = sqlite3.connect(self.caminho)
+        try:
+            yield conexao
+        finally:
+            conexao.close()
+
+    def _parametro(self, desde: pd.Timestamp) -> Any:
+        # Datas são gravadas como texto ISO ("AAAA-MM-DD HH:MM:SS"), comparável como texto
+        return desde.isoformat(sep=' ')
+
+
+def criar_fonte(tipo: str = Config.FONTE_DADOS, tabela: str = Config.TABELA_ENTREGAS) -> FonteDados:
+    """
+    Cria a fonte de dados configurada.
+
+    Args:
+        tipo: "excel", "pasta", "postgres" ou "sqlite"
+        tabela: tabela ou view de entregas (ignorada pelas fontes Excel)
+    """
+    if tipo == "excel":
+        return FonteExcel(Config.EXCEL_FILE)
+    if tipo == "pasta":
+        return FontePastaExcel(Config.PASTA_EXCEL)
+    if tipo == "postgres":
+        return FontePostgres(tabela)
+    if tipo == "sqlite":
+        return FonteSQLite(Config.SQLITE_FILE, tabela)
+    raise ValueError(f"Fonte de dados desconhecida: {tipo}")
+
+
+def como_fonte(origem: Union[FonteDados, Path, str]) -> FonteDados:
+    """Aceita uma fonte ou o caminho de uma planilha (compatibilidade com as chamadas por arquivo)."""
+    return origem if isinstance(origem, FonteDados) else FonteExcel(Path(origem))
@@ -0,0 +1,320 @@
+"""
+Gerador de entregas sintéticas no mesmo esquema da planilha dados.xlsx, para
+medir o desempenho do pipeline com volumes maiores que os dados reais:
+
+    python gerador_dados.py --linhas 1000000 --saida data/benchmark/entregas.sqlite
+
+As entregas são agrupadas em rotas com uma ou mais paradas (mesmo dia, zona
+e motoqueiro) nas zonas de Config.PARAMETROS_REGIAO, com devoluções, frete
+zero, entregas viradas e lacunas (NaT) nos marcos das entregas não
+atribuídas ou não concluídas. A geração é feita em lotes com sementes
+derivadas de ``semente``: os mesmos parâmetros geram sempre os mesmos dados.
+"""
+import argparse
+import datetime
+import sqlite3
+import numpy as np
+import pandas as pd
+from pathlib import Path
+from typing import Iterator, List, Optional
+
+from config import Config
+
+
+# Colunas na mesma ordem da planilha dados.xlsx
+COLUNAS: List[str] = [
+    'servico_codigo', 'servico_titulo', 'servico_tipo', 'situacao', 'situacao_finalizado', 'motivo_sem_sucesso',
+    'rota_id', 'rota_nome', 'rota_situacao', 'Rota Criada', 'Rota Atribuida', 'Rota Aceita', 'Rota Iniciada',
+    'Chegou no Local', 'Concluida', 'Rota Cancelada', 'tempo_atribuicao', 'tempo_inicio_agente',
+    'tempo_deslocamento_agente', 'tempo_conclusao_agente', 'distancia_percorrida_km', 'Cliente ID', 'Cliente',
+    'endereco', 'numero', 'bairro', 'zona_nome', 'cidade', 'estado', 'cep', 'whatsapp', 'fone', 'motoqueiro',
+    'ponto_referencia', 'vendedor', 'formas_pagamento', 'valor_frete', 'valor_nf', 'data_hora_pedido',
+    'data_hora_nf', 'data_hora_nf_autorizacao', 'complemento', 'qtd_itens', 'numero_itens', 'devolucao', 'zona',
+]
+
+# Distribuições observadas em dados.xlsx
+CODIGOS_ZONA: List[int] = [3963, 3969, 3971, 3972, 3973, 4362]
+MOTIVOS_SEM_SUCESSO: List[int] = [5022, 5023, 5035, 5036, 5037, 5229]
+SITUACOES_PENDENTES: List[str] = ['Aceita', 'Em Rota', 'Atribuida', 'Chegando', 'Cancelada']
+FORMAS_PAGAMENTO: List[str] = ['ENTREGA_PENDENCIA', 'PIX_LINK', 'CARTEIRA', 'CREDITO_DEVOLUCAO', 'PIX',
+                               'CARTAO_CREDITO', 'BOLETO_SICRED', 'CARTAO_DEBITO']
+PESOS_PAGAMENTO: List[float] = [0.71, 0.24, 0.018, 0.014, 0.01, 0.004, 0.002, 0.002]
+
+PRIMEIRO_TITULO = 990_000
+PRIMEIRA_ROTA = 3_000_000
+PRIMEIRO_CLIENTE = 10_000
+# Limite de linhas de uma planilha Excel (sem o cabeçalho)
+MAX_LINHAS_EXCEL = 1_048_575
+
+
+def _duracao_texto(inicio: pd.Series, fim: pd.Series) -> pd.Series:
+    """Formata a diferença entre dois marcos como HH:MM:SS (nulo se algum marco faltar)."""
+    segundos = (fim - inicio).dt.total_seconds()
+    valido = segundos.notna() & (segundos >= 0)
+    total = segundos.where(valido, 0).astype('int64')
+    texto = ((total // 3600).astype(str).str.zfill(2) + ':' + (total % 3600 // 60).astype(str).str.zfill(2)
+             + ':' + (total % 60).astype(str).str.zfill(2))
+    return texto.where(valido, None)
+
+
+def gerar_entregas(linhas: int, inicio: datetime.date = datetime.date(2025, 1, 1), dias: int = 365,
+                   semente: int = 42, motoqueiros: int = 15, clientes: Optional[int] = None,
+                   deslocamento: int = 0) -> pd.DataFrame:
+    """
+    Gera um lote de entregas sintéticas.
+
+    Args:
+        linhas: número de entregas
+        inicio: primeiro dia do período
+        dias: quantidade de dias do período
+        semente: semente do gerador aleatório
+        motoqueiros: motoqueiros por zona
+        clientes: tamanho da carteira de clientes (padrão: uma para cada 5 entregas)
+        deslocamento: posição do lote na geração completa (ids únicos entre lotes)
+
+    Returns:
+        DataFrame com as colunas de COLUNAS
+    """
+    rng = np.random.default_rng(semente)
+    zonas = list(Config.PARAMETROS_REGIAO)
+    clientes = clientes or max(linhas // 5, 500)
+
+    # Rotas: de 1 a 6 paradas (média próxima de 2, como em dados.xlsx); a última pode ficar incompleta
+    rotas = linhas
+    paradas = np.minimum(rng.geometric(0.55, rotas), 6)
+    rota = np.repeat(np.arange(rotas), paradas)[:linhas]
+    ordem = np.arange(len(rota)) - np.repeat(np.cumsum(paradas) - paradas, paradas)[:linhas]
+
+    # Atributos de cada rota: dia (domingo com menos movimento), zona, motoqueiro e horário das notas
+    dia_semana_inicio = inicio.weekday()
+    dia = rng.integers(0, dias, rotas)
+    domingo = (dia + dia_semana_inicio) % 7 == 6
+    dia = np.where(domingo & (rng.random(rotas) < 0.7), np.maximum(dia - 1, 0), dia)
+    zona_rota = rng.integers(0, len(zonas), rotas)
+    moto_rota = zona_rota * motoqueiros + rng.integers(0, motoqueiros, rotas)
+    notas_seg = np.clip(rng.normal(11.5 * 3600, 2.8 * 3600, rotas), 7 * 3600, 19.5 * 3600)
+    distancia = np.round(rng.gamma(1.2, 5.0, rotas), 2)
+
+    # Saída da rota após a última nota; parte das rotas do fim da tarde sai só
+    # na manhã seguinte (entregas viradas)
+    saida_seg = notas_seg + rng.uniform(10, 40, rotas) * 60
+    virada = (notas_seg > 16 * 3600) & (rng.random(rotas) < 0.5)
+    saida_seg = np.where(virada, 86400 + 8 * 3600 + rng.uniform(0, 90, rotas) * 60, saida_seg)
+
+    base = pd.Timestamp(inicio)
+    n = len(rota)
+    saida = base + pd.to_timedelta(dia[rota] * 86400 + saida_seg[rota], unit='s')
+
+    # Situação: sem rota (não atribuída), pendentes e realizadas
+    sem_rota = rng.random(rotas)[rota] < 0.045
+    pendente = ~sem_rota & (rng.random(n) < 0.04)
+    realizada = ~sem_rota & ~pendente
+    situacao = np.where(sem_rota, 'Nao Atribuida',
+                        np.where(pendente, rng.choice(SITUACOES_PENDENTES, n), 'Realizada'))
+    sem_sucesso = realizada & (rng.random(n) < 0.03)
+    situacao_finalizado = np.where(realizada, np.where(sem_sucesso, 'Sem Sucesso', 'Sucesso'), 'Indefinida')
+
+    # Marcos: nota emitida antes da saída; paradas atendidas em sequência
+    data_hora_nf = base + pd.to_timedelta(dia[rota] * 86400 + notas_seg[rota] - rng.uniform(0, 60, n) * 60, unit='s')
+    data_hora_pedido = data_hora_nf - pd.to_timedelta(rng.uniform(2, 15, n), unit='min')
+    autorizacao = data_hora_nf + pd.to_timedelta(rng.uniform(3, 60, n), unit='s')
+    criada = data_hora_nf + pd.to_timedelta(rng.uniform(10, 180, n), unit='s')
+    atribuida = saida - pd.to_timedelta(rng.uniform(0, 5, rotas)[rota], unit='min')
+    aceita = atribuida + pd.to_timedelta(rng.uniform(10, 120, rotas)[rota], unit='s')
+    iniciada = aceita + pd.to_timedelta(rng.uniform(0, 20, rotas)[rota], unit='min')
+    chegada = iniciada + pd.to_timedelta((ordem + 1) * rng.uniform(8, 35, n), unit='min')
+    concluida = chegada + pd.to_timedelta(rng.uniform(1, 10, n), unit='min')
+
+    nat = pd.NaT
+    atribuida = atribuida.where(~sem_rota, nat)
+    aceita = aceita.where(~sem_rota & (situacao != 'Atribuida'), nat)
+    iniciada = iniciada.where(realizada | np.isin(situacao, ['Em Rota', 'Chegando']), nat)
+    chegada = chegada.where(realizada | (situacao == 'Chegando'), nat)
+    concluida = concluida.where(realizada, nat)
+    cancelada = pd.Series(criada + pd.to_timedelta(rng.uniform(5, 240, n), unit='min')).where(
+        situacao == 'Cancelada', nat)
+
+    rota_id = pd.Series(PRIMEIRA_ROTA + deslocamento + rota, dtype='float64').where(~sem_rota)
+    cliente = rng.integers(0, clientes, n)
+    valor_frete = np.where(rng.random(n) < 0.19, 0, 15)
+    formas = pd.Series(rng.choice(FORMAS_PAGAMENTO, n, p=PESOS_PAGAMENTO)).where(rng.random(n) >= 0.008)
+    qtd_itens = pd.Series(np.minimum(rng.geometric(0.2, n), 64), dtype='float64').where(rng.random(n) >= 0.006)
+
+    df = pd.DataFrame({
+        'servico_codigo': rng.integers(10_000, 2_000_000, n),
+        'servico_titulo': PRIMEIRO_TITULO + deslocamento + np.arange(n),
+        'servico_tipo': 'Entrega',
+        'situacao': situacao,
+        'situacao_finalizado': situacao_finalizado,
+        'motivo_sem_sucesso': pd.Series(rng.choice(MOTIVOS_SEM_SUCESSO, n), dtype='float64').where(sem_sucesso),
+        'rota_id': rota_id,
+        'rota_nome': ('Rota #' + rota_id.astype('Int64').astype(str)).str.replace('<NA>', '', regex=False),
+        'rota_situacao': np.where(sem_rota | pendente, 'Nao Processada', 'Realizada'),
+        'Rota Criada': criada,
+        'Rota Atribuida': atribuida,
+        'Rota Aceita': aceita,
+        'Rota Iniciada': iniciada,
+        'Chegou no Local': chegada,
+        'Concluida': concluida,
+        'Rota Cancelada': cancelada,
+        'distancia_percorrida_km': np.where(ordem == 0, distancia[rota], 0.0),
+        'Cliente ID': PRIMEIRO_CLIENTE + cliente,
+        'Cliente': 'Cliente' + pd.Series(cliente + 1).astype(str),
+        'endereco': 'Rua' + pd.Series(cliente + 1).astype(str),
+        'numero': cliente * 7919 % 999 + 1,
+        'bairro': 'Bairro' + pd.Series(cliente % 60 + 1).astype(str),
+        'zona_nome': pd.Series(rng.choice(CODIGOS_ZONA, n), dtype='float64').where(rng.random(n) >= 0.004),
+        'cidade': 'Cidade' + pd.Series(cliente % 30 + 1).astype(str),
+        'estado': 'RJ',
+        'cep': 1_000_000,
+        'whatsapp': 10_000_000,
+        'fone': 10_000,
+        'motoqueiro': 'MOTO' + pd.Series(moto_rota[rota] + 1).astype(str),
+        'ponto_referencia': np.nan,
+        'vendedor': 'VENDEDOR' + pd.Series(rng.integers(1, 11, n)).astype(str),
+        'formas_pagamento': formas,
+        'valor_frete': valor_frete,
+        'valor_nf': np.round(rng.lognormal(5.7, 0.8, n), 2),
+        'data_hora_pedido': data_hora_pedido,
+        'data_hora_nf': data_hora_nf,
+        'data_hora_nf_autorizacao': autorizacao,
+        'complemento': np.nan,
+        'qtd_itens': qtd_itens,
+        'numero_itens': np.minimum(rng.geometric(0.3, n) - 1, 28),
+        'devolucao': np.where(rng.random(n) < 0.05, 'SIM', 'NÃO'),
+        'zona': np.array(zonas)[zona_rota[rota]],
+    })
+    datas = df.select_dtypes('datetime').columns
+    df[datas] = df[datas].apply(lambda coluna: coluna.dt.floor('s'))
+    df['tempo_atribuicao'] = _duracao_texto(df['Rota Criada'], df['Rota Atribuida'])
+    df['tempo_inicio_agente'] = _duracao_texto(df['Rota Aceita'], df['Rota Iniciada'])
+    df['tempo_deslocamento_agente'] = _duracao_texto(df['Rota Iniciada'], df['Chegou no Local'])
+    df['tempo_conclusao_agente'] = _duracao_texto(df['Chegou no Local'], df['Concluida'])
+    return df[COLUNAS]
+
+
+def gerar_custos(inicio: datetime.date = datetime.date(2025, 1, 1), dias: int = 365,
+                 semente: int = 42) -> pd.DataFrame:
+    """
+    Gera a tabela de custos por competência e região do período, no formato
+    de ``indicadores.custos_simulados``.
+    """
+    rng = np.random.default_rng(semente)
+    fim = inicio + datetime.timedelta(days=dias - 1)
+    competencias = pd.period_range(inicio, fim, freq='M').strftime('%Y-%m')
+    zonas = list(Config.PARAMETROS_REGIAO)
+    custos = pd.DataFrame([(competencia, zona) for competencia in competencias for zona in zonas],
+                          columns=['competencia', 'regiao'])
+    custos['custo_fixo'] = rng.integers(18, 24, len(custos)) * 100
+    custos['valor_competencia'] = rng.integers(45, 58, len(custos)) * 100
+    return custos
+
+
+def gerar_em_lotes(linhas: int, tamanho_lote: int = Config.TAMANHO_LOTE * 4, semente: int = 42,
+                   **parametros) -> Iterator[pd.DataFrame]:
+    """
+    Gera ``linhas`` entregas em lotes de até ``tamanho_lote``, sem manter
+    todas em memória. Cada lote usa uma semente derivada de ``semente`` e da
+    sua posição, e os ids de serviço e de rota não se repetem entre lotes.
+    Os demais parâmetros são repassados a ``gerar_entregas``.
+    """
+    for numero, deslocamento in enumerate(range(0, linhas, tamanho_lote)):
+        quantidade = min(tamanho_lote, linhas - deslocamento)
+        yield gerar_entregas(quantidade, semente=semente * 1_000_003 + numero, deslocamento=deslocamento,
+                             **parametros)
+
+
+def gravar_sqlite(lotes: Iterator[pd.DataFrame], caminho: Path, tabela: str = Config.TABELA_ENTREGAS) -> int:
+    """
+    Grava os lotes em uma tabela SQLite (lida por ``fontes.FonteSQLite``),
+    substituindo o arquivo. As datas são gravadas como texto ISO.
+
+    Returns:
+        Número de linhas gravadas
+    """
+    caminho.parent.mkdir(parents=True, exist_ok=True)
+    caminho.unlink(missing_ok=True)
+    linhas = 0
+    with sqlite3.connect(caminho) as conexao:
+        for lote in lotes:
+            datas = lote.select_dtypes('datetime').columns
+            lote[datas] = lote[datas].apply(lambda coluna: coluna.dt.strftime('%Y-%m-%d %H:%M:%S'))
+            lote.to_sql(tabela, conexao, if_exists='append', index=False, chunksize=10_000)
+            linhas += len(lote)
+        conexao.execute(f'CREATE INDEX IF NOT EXISTS idx_{tabela}_data_hora_nf ON {tabela} (data_hora_nf)')
+    return linhas
+
+
+def gravar_excel(df: pd.DataFrame, caminho: Path) -> int:
+    """
+    Grava as entregas em uma planilha no formato de dados.xlsx.
+
+    Returns:
+        Número de linhas gravadas
+    """
+    if len(df) > MAX_LINHAS_EXCEL:
+        raise ValueError(f"Uma planilha Excel comporta no máximo {MAX_LINHAS_EXCEL} linhas; "
+                         "use o formato sqlite ou parquet.")
+    caminho.parent.mkdir(parents=True, exist_ok=True)
+    df.to_excel(caminho, index=False)
+    return len(df)
+
+
+def gravar_parquet(lotes: Iterator[pd.DataFrame], caminho: Path) -> int:
+    """
+    Grava os lotes brutos em um único arquivo parquet.
+
+    Returns:
+        Número de linhas gravadas
+    """
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    caminho.parent.mkdir(parents=True, exist_ok=True)
+    linhas = 0
+    escritor = None
+    try:
+        for lote in lotes:
+            tabela = pa.Table.from_pandas(lote, preserve_index=False)
+            if escritor is None:
+                escritor = pq.ParquetWriter(caminho, tabela.schema)
+            escritor.write_table(tabela.cast(escritor.schema))
+            linhas += len(lote)
+    finally:
+        if escritor is not None:
+            escritor.close()
+    return linhas
+
+
+def gerar_arquivo(linhas: int, caminho: Path, semente: int = 42, **parametros) -> int:
+    """
+    Gera as entregas e grava no formato indicado pela extensão do arquivo
+    (.sqlite/.db, .xlsx ou .parquet).
+
+    Returns:
+        Número de linhas gravadas
+    """
+    lotes = gerar_em_lotes(linhas, semente=semente, **parametros)
+    sufixo = caminho.suffix.lower()
+    if sufixo in ('.sqlite', '.db'):
+        return gravar_sqlite(lotes, caminho)
+    if sufixo == '.xlsx':
+        return gravar_excel(pd.concat(lotes, ignore_index=True), caminho)
+    if sufixo == '.parquet':
+        return gravar_parquet(lotes, caminho)
+    raise ValueError(f"Formato de saída não suportado: {caminho.suffix}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Gera entregas sintéticas no esquema de dados.xlsx.")
+    parser.add_argument('--linhas', type=int, required=True, help="número de entregas")
+    parser.add_argument('--saida', type=Path, required=True, help="arquivo .sqlite, .xlsx ou .parquet")
+    parser.add_argument('--inicio', type=datetime.date.fromisoformat, default=datetime.date(2025, 1, 1),
+                        help="primeiro dia (AAAA-MM-DD)")
+    parser.add_argument('--dias', type=int, default=365, help="dias cobertos pelas entregas")
+    parser.add_argument('--semente', type=int, default=42)
+    argumentos = parser.parse_args()
+
+    total = gerar_arquivo(argumentos.linhas, argumentos.saida, semente=argumentos.semente,
+                          inicio=argumentos.inicio, dias=argumentos.dias)
+    print(f"{total} entregas gravadas em {argumentos.saida}")
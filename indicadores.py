@@ -0,0 +1,182 @@
+import datetime
+import pandas as pd
+from typing import Any, Dict, Mapping, Optional
+
+from custos import ModeloCustos
+from processamento import avaliar_sla
+
+
+def formatar_duracao(td: Any) -> str:
+    """Formata uma duração como HH:MM:SS ("Não definido" quando ausente)."""
+    if pd.isnull(td): return "Não definido"
+    s = int(td.total_seconds())
+    return f"{s // 3600:02}:{(s % 3600) // 60:02}:{s % 60:02}"
+
+
+def agregar_entregas(df: pd.DataFrame) -> Dict[str, Any]:
+    """
+    Calcula os agregados base dos indicadores a partir das linhas de entrega.
+
+    Os agregados base são somas e contagens que também podem ser obtidas a
+    partir do cubo diário (ver ``cubo.agregar_cubo``); os indicadores
+    derivados são montados sobre eles por ``montar_indicadores``.
+    """
+    # Contadores básicos
+    entregas = df.shape[0]
+    viagens = df['rota_nome'].nunique() if 'rota_nome' in df.columns else 0
+    viagens_3p = int((df['rota_nome'].value_counts() > 3).sum()) if 'rota_nome' in df.columns else 0
+
+    # Frete grátis - conta entregas onde valor_frete é zero
+    frete_gratis = df[df['valor_frete'] == 0].shape[0] if 'valor_frete' in df.columns else 0
+
+    # Devoluções - conta entregas onde devolucao é "SIM"
+    devolucoes = df[df['devolucao'] == "SIM"].shape[0] if 'devolucao' in df.columns else 0
+
+    # Valores
+    valor_nf_total = df['valor_nf'].sum() if 'valor_nf' in df.columns else 0
+    valor_frete_total = df['valor_frete'].sum() if 'valor_frete' in df.columns else 0
+
+    # Entregas viradas e acima do tempo ideal - avaliadas em colunas inteiras
+    entregas_viradas = 0
+    entregas_validas = 0
+    entregas_acima = 0
+    if 'Concluida' in df.columns and 'Data' in df.columns:
+        sla = avaliar_sla(df)
+        entregas_viradas = int(sla['virada'].sum())
+        entregas_validas = int(sla['no_dia'].sum())
+        entregas_acima = int((sla['no_dia'] & sla['acima_tempo']).sum())
+
+    motoqueiros_count = df['motoqueiro'].nunique() if 'motoqueiro' in df.columns else 0
+
+    # Tempos médios
+    tempo_ciclo = df['Tempo de Ciclo'].dropna().mean() if 'Tempo de Ciclo' in df.columns else pd.NaT
+    tempo_rota = df['Tempo de Rota'].dropna().mean() if 'Tempo de Rota' in df.columns else pd.NaT
+
+    return {
+        "entregas": entregas,
+        "viagens": viagens,
+        "viagens_3p": viagens_3p,
+        "frete_gratis": frete_gratis,
+        "devolucoes": devolucoes,
+        "valor_nf_total": valor_nf_total,
+        "valor_frete_total": valor_frete_total,
+        "entregas_viradas": entregas_viradas,
+        "entregas_validas": entregas_validas,
+        "entregas_acima": entregas_acima,
+        "motoqueiros_count": motoqueiros_count,
+        "tempo_ciclo": tempo_ciclo,
+        "tempo_rota": tempo_rota,
+    }
+
+
+def custos_simulados() -> pd.DataFrame:
+    """Tabela de custos dos motoqueiros por competência e região (dados simulados)."""
+    data = {
+        'competencia': ['2025-05', '2025-05', '2025-05', '2025-05', '2025-05', '2025-05'],
+        'regiao': ['REGIAO1', 'REGIAO2', 'REGIAO3', 'REGIAO4', 'REGIAO5', 'REGIAO6'],
+        'custo_fixo': [2000, 1800, 2200, 1900, 2100, 2300],
+        'valor_competencia': [5000, 4500, 5500, 4800, 5200, 5700]
+    }
+    return pd.DataFrame(data)
+
+
+def _razao(numerador: Any, denominador: Any, escala: float = 1) -> Any:
+    """numerador / denominador * escala, 0 onde o denominador é zero (escalares ou Series)."""
+    if isinstance(denominador, pd.Series):
+        return (numerador / denominador.where(denominador != 0) * escala).fillna(0)
+    return numerador / denominador * escala if denominador else 0
+
+
+def _real(valor: Any) -> Any:
+    """Converte para float um valor escalar ou uma Series."""
+    return valor.astype(float) if isinstance(valor, pd.Series) else float(valor)
+
+
+def derivar_indicadores(base: Mapping[str, Any], custo_total: Any) -> Dict[str, Any]:
+    """
+    Deriva os indicadores a partir dos agregados base e do custo das entregas.
+
+    As mesmas fórmulas servem para um estado de filtro (valores escalares) e
+    para vários grupos de uma vez (cada agregado base é uma Series alinhada),
+    o que mantém os indicadores em lote iguais aos do dashboard.
+
+    Args:
+        base: agregados base (ver ``agregar_entregas``); tempos já formatados ou não
+        custo_total: custo alocado às entregas (ver ``custos.ModeloCustos``); None quando não há tabela de custos
+
+    Returns:
+        Indicadores numéricos, sem os tempos médios
+    """
+    entregas = base["entregas"]
+    viagens = base["viagens"]
+    valor_nf_total = base["valor_nf_total"]
+    valor_frete_total = base["valor_frete_total"]
+    motoqueiros_count = base["motoqueiros_count"]
+
+    frete_gratis_perc = _razao(base["frete_gratis"], entregas, 100)
+    devolucoes_perc = _razao(base["devolucoes"], entregas, 100)
+    entregas_viradas_perc = _razao(base["entregas_viradas"], entregas, 100)
+    perc_acima = _razao(base["entregas_acima"], base["entregas_validas"], 100)
+
+    # Indicadores adicionais
+    ticket_medio = _razao(valor_nf_total, entregas)
+    receita_media_viagem = _razao(valor_nf_total, viagens)
+    entregas_por_viagem = _razao(entregas, viagens)
+    entregas_por_motoqueiro = _razao(entregas, motoqueiros_count)
+
+    # Custo por entrega - sem tabela de custos, custo e resultado ficam zerados
+    if custo_total is None:
+        custo_total = resultado_projetado = resultado = 0
+    else:
+        resultado_projetado = _real(valor_frete_total) - _real(custo_total)
+        resultado = _razao(_real(valor_frete_total), _real(custo_total), 100)
+
+    custo_por_entrega = _razao(custo_total, entregas)
+    if isinstance(custo_por_entrega, pd.Series):
+        custo_por_entrega = custo_por_entrega.map(lambda valor: round(valor, 1))
+    else:
+        custo_por_entrega = round(custo_por_entrega, 1)
+
+    return {
+        "entregas": entregas,
+        "viagens": viagens,
+        "viagens_3p": base["viagens_3p"],
+        "frete_gratis": base["frete_gratis"],
+        "frete_gratis_perc": frete_gratis_perc,
+        "devolucoes": base["devolucoes"],
+        "devolucoes_perc": devolucoes_perc,
+        "valor_nf_total": valor_nf_total,
+        "valor_frete_total": valor_frete_total,
+        "entregas_viradas": base["entregas_viradas"],
+        "entregas_viradas_perc": entregas_viradas_perc,
+        "entregas_acima": base["entregas_acima"],
+        "perc_acima": perc_acima,
+        "ticket_medio": ticket_medio,
+        "receita_media_viagem": receita_media_viagem,
+        "entregas_por_viagem": entregas_por_viagem,
+        "motoqueiros_count": motoqueiros_count,
+        "entregas_por_motoqueiro": entregas_por_motoqueiro,
+        "custo_total": custo_total,
+        "resultado_projetado": resultado_projetado,
+        "resultado": resultado,
+        "custo_por_entrega": custo_por_entrega,
+    }
+
+
+def montar_indicadores(base: Dict[str, Any], custo_total: Optional[float]) -> Dict[str, Any]:
+    """Monta o dicionário completo de indicadores a partir dos agregados base e do custo das entregas."""
+    return {
+        **derivar_indicadores(base, custo_total),
+        "tempo_ciclo_medio": formatar_duracao(base["tempo_ciclo"]),
+        "tempo_rota_medio": formatar_duracao(base["tempo_rota"])
+    }
+
+
+# Funções para cálculos
+def calcular_indicadores(df: pd.DataFrame, custos: ModeloCustos, data_inicial: datetime.date,
+                         data_final: datetime.date) -> Dict[str, Any]:
+    """Calcula os indicadores principais do dashboard a partir das linhas de entrega do período."""
+    if df.empty:
+        return {"erro": "Sem dados para calcular indicadores"}
+
+    return montar_indicadores(agregar_entregas(df), custos.custo(df, data_inicial, data_final))
@@ -0,0 +1,243 @@
+"""
+Indicadores do dashboard em lote, executados sem a interface:
+
+    python indicadores_lote.py
+    python indicadores_lote.py --formato csv --saida indicadores.csv --custos custos.csv
+
+Calcula o conjunto completo de indicadores para cada Data × zona e
+competência × zona, além dos totais por dia, por competência e do período
+inteiro, com uma passagem agrupada sobre o cubo diário da versão publicada
+por nível (em vez de um cálculo por combinação). Os agregados base são os
+mesmos de ``cubo.agregar_cubo`` e os indicadores são derivados por
+``indicadores.derivar_indicadores``, como no dashboard: cada linha equivale
+a filtrar o dashboard pelo dia (ou pela competência) e pela zona.
+"""
+import argparse
+import os
+import pandas as pd
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from cache_dados import diretorio_cubo, ler_cache, versao_dataset
+from config import Config
+from cubo import construir_cubo, ler_cubo
+from custos import ModeloCustos, rollup_diario
+from indicadores import custos_simulados, derivar_indicadores, formatar_duracao
+from processamento import codigo_competencia
+from snapshots import caminho_dataset, versao_atual
+
+
+# Nível de agregação -> dimensões do grupo (o nível "total" é o período inteiro)
+NIVEIS: Dict[str, List[str]] = {
+    'dia_zona': ['Data', 'zona'],
+    'competencia_zona': ['competencia', 'zona'],
+    'dia': ['Data'],
+    'competencia': ['competencia'],
+    'total': [],
+}
+
+# Nível -> período de cada grupo no rateio do custo (dia ou mês da Data; None: todo o cubo)
+PERIODOS_NIVEIS: Dict[str, Optional[str]] = {
+    'dia_zona': 'D',
+    'competencia_zona': 'M',
+    'dia': 'D',
+    'competencia': 'M',
+    'total': None,
+}
+
+# Agregado base -> coluna somada do cubo
+SOMAS_CUBO: Dict[str, str] = {
+    'entregas': 'entregas',
+    'frete_gratis': 'frete_gratis',
+    'devolucoes': 'devolucoes',
+    'valor_nf_total': 'valor_nf',
+    'valor_frete_total': 'valor_frete',
+    'entregas_viradas': 'viradas',
+    'entregas_validas': 'no_dia',
+    'entregas_acima': 'acima',
+    'ciclo_soma_ns': 'ciclo_soma_ns',
+    'ciclo_n': 'ciclo_n',
+    'rota_soma_ns': 'rota_soma_ns',
+    'rota_n': 'rota_n',
+}
+
+# Coluna constante que agrupa o período inteiro
+_TODOS = '_todos'
+
+
+def carregar_cubo_versao(versao: str) -> Tuple[pd.DataFrame, pd.DataFrame]:
+    """Lê o cubo da versão do dataset; sem cubo materializado, agrega as entregas da versão."""
+    cache = caminho_dataset(versao)
+    cubo = ler_cubo(versao_dataset(cache), diretorio_cubo(cache))
+    if cubo is None:
+        cubo = construir_cubo(ler_cache(cache))
+    if cubo is None:
+        raise ValueError(f"Não foi possível montar o cubo da versão {versao}.")
+    return cubo
+
+
+def _tempo_medio(soma_ns: pd.Series, quantidade: pd.Series) -> pd.Series:
+    """Duração média por grupo (NaT sem medições), como em ``cubo.agregar_cubo``."""
+    return pd.to_timedelta(soma_ns / quantidade.where(quantidade != 0), unit='ns')
+
+
+def agregar_niveis(cubo: pd.DataFrame, rotas: pd.DataFrame, chaves: List[str]) -> pd.DataFrame:
+    """
+    Calcula os agregados base de ``cubo.agregar_cubo`` para todos os grupos
+    de ``chaves`` de uma vez.
+
+    Args:
+        cubo: cubo diário com a coluna de competência (e a de custo alocado, se houver)
+        rotas: tabela de rotas do cubo com a coluna de competência
+        chaves: dimensões do grupo; vazia agrupa o período inteiro
+
+    Returns:
+        DataFrame indexado pelas chaves, uma coluna por agregado base
+        (custo_total apenas quando o cubo traz o custo alocado)
+    """
+    chaves = chaves or [_TODOS]
+    grupos = cubo.groupby(chaves, dropna=False, observed=True, sort=True)
+    base = grupos[list(SOMAS_CUBO.values())].sum()
+    base.columns = list(SOMAS_CUBO)
+    if 'custo' in cubo.columns:
+        base['custo_total'] = grupos['custo'].sum()
+    base['motoqueiros_count'] = grupos['motoqueiro'].nunique()
+
+    # Viagens distintas dentro de cada grupo (a mesma rota conta uma vez por grupo)
+    por_rota = rotas.groupby(chaves + ['rota_nome'], dropna=False, observed=True)['entregas'].sum()
+    viagens = por_rota.groupby(level=chaves, dropna=False, observed=True)
+    base['viagens'] = viagens.size().reindex(base.index, fill_value=0)
+    base['viagens_3p'] = (por_rota > 3).groupby(level=chaves, dropna=False, observed=True).sum() \
+        .reindex(base.index, fill_value=0)
+
+    base['tempo_ciclo'] = _tempo_medio(base['ciclo_soma_ns'], base['ciclo_n'])
+    base['tempo_rota'] = _tempo_medio(base['rota_soma_ns'], base['rota_n'])
+    return base
+
+
+def indicadores_tabela(base: pd.DataFrame) -> pd.DataFrame:
+    """
+    Deriva os indicadores de cada linha de agregados base (ver ``agregar_niveis``).
+
+    Args:
+        base: agregados base, um grupo por linha; sem custo_total os
+            indicadores de custo ficam vazios
+
+    Returns:
+        Indicadores de cada linha, com os tempos médios formatados e em segundos
+    """
+    custo_total = base['custo_total'] if 'custo_total' in base.columns else None
+    indicadores = pd.DataFrame(derivar_indicadores(base, custo_total), index=base.index)
+    indicadores['tempo_ciclo_medio'] = base['tempo_ciclo'].map(formatar_duracao)
+    indicadores['tempo_rota_medio'] = base['tempo_rota'].map(formatar_duracao)
+    indicadores['tempo_ciclo_medio_seg'] = base['tempo_ciclo'].dt.total_seconds()
+    indicadores['tempo_rota_medio_seg'] = base['tempo_rota'].dt.total_seconds()
+    return indicadores
+
+
+def calcular_indicadores_lote(cubo: pd.DataFrame, rotas: pd.DataFrame, df_motoqueiros: pd.DataFrame,
+                              niveis: Optional[List[str]] = None) -> pd.DataFrame:
+    """
+    Calcula os indicadores do dashboard para todos os grupos dos níveis informados.
+
+    O custo de cada linha é o do período do grupo (o dia, o mês ou, no
+    total, os meses do cubo) rateado como no dashboard (ver
+    ``custos.ModeloCustos``): cada linha equivale a filtrar o dashboard pelo
+    dia (ou pela competência inteira) e pela zona.
+
+    Args:
+        cubo: cubo diário (ver ``cubo.construir_cubo``)
+        rotas: tabela de rotas do cubo
+        df_motoqueiros: tabela de custos por competência
+        niveis: níveis de NIVEIS a calcular; todos por padrão
+
+    Returns:
+        Uma linha por grupo com as colunas nivel, Data, competencia (código
+        AAAAMM, ver ``processamento.codigo_competencia``), zona e os
+        indicadores; os tempos médios também são dados em segundos
+    """
+    custos = ModeloCustos(df_motoqueiros, rollup_diario(cubo))
+    cubo = cubo.assign(competencia=codigo_competencia(cubo['Data']), **{_TODOS: 0})
+    rotas = rotas.assign(competencia=codigo_competencia(rotas['Data']), **{_TODOS: 0})
+
+    resultados = []
+    for nivel in niveis or list(NIVEIS):
+        chaves = NIVEIS[nivel]
+        periodo = PERIODOS_NIVEIS[nivel]
+        if periodo is None:
+            meses = cubo['Data'].dt.to_period('M')
+            inicio, fim = meses.min().start_time, meses.max().end_time
+        else:
+            inicio = cubo['Data'].dt.to_period(periodo).dt.start_time
+            fim = cubo['Data'].dt.to_period(periodo).dt.end_time
+        custo = custos.alocar(cubo, inicio, fim)
+        celulas = cubo if custo is None else cubo.assign(custo=custo)
+        base = agregar_niveis(celulas, rotas, chaves).reset_index()
+        indicadores = indicadores_tabela(base)
+
+        identificacao = pd.DataFrame({
+            'nivel': nivel,
+            'Data': base['Data'] if 'Data' in chaves else pd.NaT,
+            'competencia': (base['competencia'] if 'competencia' in chaves
+                            else codigo_competencia(base['Data']) if 'Data' in chaves
+                            else pd.Series(pd.NA, index=base.index, dtype='Int32')),
+            'zona': base['zona'].astype(object) if 'zona' in chaves else None,
+        }, index=base.index)
+        resultados.append(pd.concat([identificacao, indicadores], axis=1))
+
+    return pd.concat(resultados, ignore_index=True)
+
+
+def gravar_indicadores(df: pd.DataFrame, destino: Path, formato: str = 'parquet') -> None:
+    """Grava os indicadores em parquet ou CSV de forma atômica."""
+    destino.parent.mkdir(parents=True, exist_ok=True)
+    temporario = destino.with_name(destino.name + '.tmp')
+    if formato == 'csv':
+        df.to_csv(temporario, index=False, encoding='utf-8')
+    else:
+        df.to_parquet(temporario, index=False)
+    os.replace(temporario, destino)
+
+
+def gerar_indicadores(versao: Optional[str] = None, df_motoqueiros: Optional[pd.DataFrame] = None,
+                      niveis: Optional[List[str]] = None) -> Tuple[str, pd.DataFrame]:
+    """
+    Calcula os indicadores em lote de uma versão do dataset.
+
+    Args:
+        versao: versão do dataset; a publicada por padrão
+        df_motoqueiros: tabela de custos; a mesma do dashboard por padrão
+        niveis: níveis de NIVEIS a calcular; todos por padrão
+
+    Returns:
+        Tupla (versão usada, indicadores)
+    """
+    versao = versao or versao_atual()
+    if versao is None:
+        raise ValueError("Nenhuma versão do dataset foi publicada ainda.")
+    cubo, rotas = carregar_cubo_versao(versao)
+    custos = custos_simulados() if df_motoqueiros is None else df_motoqueiros
+    return versao, calcular_indicadores_lote(cubo, rotas, custos, niveis)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Calcula os indicadores do dashboard por dia/competência e zona.")
+    parser.add_argument('--versao', default=None, help="versão do dataset (padrão: a publicada)")
+    parser.add_argument('--niveis', nargs='+', choices=list(NIVEIS), default=None,
+                        help="níveis de agregação (padrão: todos)")
+    parser.add_argument('--custos', type=Path, default=None,
+                        help="CSV de custos (competencia, regiao, custo_fixo, valor_competencia)")
+    parser.add_argument('--formato', choices=['parquet', 'csv'], default='parquet')
+    parser.add_argument('--saida', type=Path, default=None, help="arquivo de saída")
+    argumentos = parser.parse_args()
+
+    custos = pd.read_csv(argumentos.custos, dtype={'competencia': str}) if argumentos.custos else None
+    try:
+        versao, indicadores = gerar_indicadores(argumentos.versao, custos, argumentos.niveis)
+    except ValueError as e:
+        parser.exit(1, f"Erro: {e}\n")
+
+    extensao = 'csv' if argumentos.formato == 'csv' else 'parquet'
+    saida = argumentos.saida or Config.INDICADORES_DIR / f"indicadores-{versao}.{extensao}"
+    gravar_indicadores(indicadores, saida, argumentos.formato)
+    print(f"{len(indicadores)} linhas de indicadores da versão {versao} gravadas em {saida}")
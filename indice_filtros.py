@@ -0,0 +1,100 @@
+import datetime
+import numpy as np
+import pandas as pd
+from typing import Any, Dict, List, Optional, Union
+
+from config import Config
+
+
+class IndiceFiltros:
+    """
+    Índice de filtros sobre um DataFrame de entregas imutável.
+
+    As linhas são ordenadas por Data uma única vez, de modo que o intervalo
+    de datas vira uma fatia obtida por busca binária. Para cada dimensão é
+    guardada a lista (ordenada) de posições de linha de cada valor; os
+    filtros selecionados são intersectados sobre essas listas e o DataFrame
+    resultante é materializado uma única vez. Filtros só de período não
+    materializam nada: o resultado é uma fatia do DataFrame indexado (uma
+    vista, sob o Copy-on-Write do pandas).
+    """
+
+    def __init__(self, df: pd.DataFrame, dimensoes: Optional[Dict[str, str]] = None):
+        """
+        Args:
+            df: DataFrame de entregas já preparado (não é alterado)
+            dimensoes: filtro -> coluna indexada; usa Config.FILTROS_DIMENSOES por padrão
+        """
+        dimensoes = Config.FILTROS_DIMENSOES if dimensoes is None else dimensoes
+
+        if 'Data' in df.columns:
+            datas = pd.to_datetime(df['Data'], errors='coerce').to_numpy()
+        else:
+            datas = np.full(len(df), np.datetime64('NaT', 'ns'))
+        ordem = np.argsort(datas, kind='stable')  # NaT fica no final
+        self.df = df.iloc[ordem].reset_index(drop=True)
+        self.datas = datas[ordem]
+
+        # Para cada dimensão: valor -> posições das linhas (crescentes)
+        self.posicoes: Dict[str, Dict[Any, np.ndarray]] = {}
+        for filtro, coluna in dimensoes.items():
+            if coluna in self.df.columns:
+                self.posicoes[filtro] = self._indexar(self.df[coluna])
+
+    @staticmethod
+    def _indexar(serie: pd.Series) -> Dict[Any, np.ndarray]:
+        """Agrupa as posições das linhas por valor (nulos não são indexados)."""
+        codigos, valores = pd.factorize(serie, use_na_sentinel=True)
+        ordem = np.argsort(codigos, kind='stable')
+        limites = np.searchsorted(codigos[ordem], np.arange(len(valores) + 1))
+        return {valor: ordem[limites[i]:limites[i + 1]] for i, valor in enumerate(valores)}
+
+    def __len__(self) -> int:
+        return len(self.df)
+
+    def fatia_datas(self, data_inicial: datetime.date, data_final: datetime.date) -> slice:
+        """Retorna a fatia de linhas com Data entre as datas informadas (inclusive)."""
+        inicio = np.searchsorted(self.datas, np.datetime64(pd.Timestamp(data_inicial)), side='left')
+        fim = np.searchsorted(self.datas, np.datetime64(pd.Timestamp(data_final)), side='right')
+        return slice(int(inicio), int(max(inicio, fim)))
+
+    def selecionar(self, filtros: Dict[str, Any]) -> np.ndarray:
+        """Retorna as posições (ordenadas) das linhas que atendem a todos os filtros."""
+        selecao = self._selecao(filtros)
+        if isinstance(selecao, slice):
+            return np.arange(selecao.start, selecao.stop)
+        return selecao
+
+    def _selecao(self, filtros: Dict[str, Any]) -> Union[slice, np.ndarray]:
+        """Seleção das linhas filtradas: a fatia do período, sem filtros de dimensão, ou as posições."""
+        fatia = self.fatia_datas(filtros['data_inicial'], filtros['data_final'])
+        selecionadas: Optional[np.ndarray] = None
+
+        # Dimensões mais seletivas primeiro, para intersectar listas menores
+        candidatas: List[np.ndarray] = []
+        for filtro, posicoes in self.posicoes.items():
+            valores = filtros.get(filtro)
+            if not valores:
+                continue
+            partes = [posicoes[valor] for valor in valores if valor in posicoes]
+            linhas = np.sort(np.concatenate(partes)) if partes else np.empty(0, dtype=np.intp)
+            candidatas.append(linhas[(linhas >= fatia.start) & (linhas < fatia.stop)])
+
+        for linhas in sorted(candidatas, key=len):
+            selecionadas = linhas if selecionadas is None else np.intersect1d(selecionadas, linhas, assume_unique=True)
+
+        if selecionadas is None:
+            return fatia
+        return selecionadas
+
+    def filtrar(self, filtros: Dict[str, Any]) -> pd.DataFrame:
+        """Retorna o DataFrame filtrado: uma fatia do índice ou as linhas selecionadas materializadas."""
+        return self.df.iloc[self._selecao(filtros)]
+
+
+def competencias_no_intervalo(data_inicial: datetime.date, data_final: datetime.date) -> List[int]:
+    """Lista os códigos de competência (AAAAMM) cobertos pelo intervalo de datas."""
+    if data_final < data_inicial:
+        return []
+    meses = pd.period_range(pd.Timestamp(data_inicial), pd.Timestamp(data_final), freq='M')
+    return [periodo.year * 100 + periodo.month for periodo in meses]
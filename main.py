@@ -2,14 +2,38 @@ import streamlit as st
 import pandas as pd
 import datetime
 import os
-from connect import buscar_dados
-from update_data import atualizar_dados
+import subprocess
+import sys
+from connect import buscar_catalogo, buscar_dados
+from fila_atualizacao import CONCLUIDO, ERRO, enfileirar, status_job, worker_ativo
+from processamento import aplicar_esquema, compactar_textos
+from indicadores import calcular_indicadores, custos_simulados, formatar_duracao
+from cubo import calcular_indicadores_cubo, filtrar_cubo, ler_cubo, ler_esbocos
+from custos import ModeloCustos, rollup_diario
+from catalogo import limites_datas, opcoes_filtro
+from indice_filtros import IndiceFiltros, competencias_no_intervalo
+from config import Config
+from cache_dados import diretorio_cubo, ler_metadados, versao_dataset
+from snapshots import caminho_dataset, versao_atual, versao_disponivel
+from cache_memoria import CACHE_DETALHAMENTO, CACHE_INDICADORES, CACHE_QUANTIS, chave_filtros
+from detalhamento import GRANULARIDADES, INDICADORES_CARTOES, calcular_detalhamento, maiores
+from explorador import ConsultaEntregas, exportar
+from quantis import DIMENSOES_ESBOCOS, MEDIDAS_QUANTIS, calcular_distribuicao, construir_esbocos
+from metricas import Execucao, anotar, etapa, execucao, registrar_falta, resumir
+import math
+import tempfile
 import threading
-from dataclasses import dataclass
+import uuid
 from typing import Dict, List, Optional, Union, Any, Tuple
 from pathlib import Path
 
 
+# Copy-on-Write: as entregas indexadas e o cubo são compartilhados entre as
+# sessões (st.cache_resource); filtros devolvem vistas sobre eles e qualquer
+# alteração em uma vista copia apenas as colunas alteradas, sem tocar no original
+pd.set_option("mode.copy_on_write", True)
+
+
 # Configuração da página
 st.set_page_config(
     page_title="Dashboard Entregas",
@@ -18,31 +42,6 @@ st.set_page_config(
 )
 
 
-# Constantes e configurações
-@dataclass
-class RegionParams:
-    duracao_seg: int
-    horario_corte: str
-    tempo_ideal: str
-
-
-# Configuração de constantes
-class Config:
-    CACHE_DIR: Path = Path('data')
-    CACHE_FILE: Path = CACHE_DIR / 'dados.parquet'
-    EXCEL_FILE: Path = Path('dados.xlsx')
-    
-    # Parâmetros por região - atualizados para corresponder às regiões na planilha
-    PARAMETROS_REGIAO: Dict[str, RegionParams] = {
-        "REGIAO1": RegionParams(5400, "16:00:00", "01:30:00"),
-        "REGIAO2": RegionParams(10800, "15:00:00", "03:00:00"),
-        "REGIAO3": RegionParams(3600, "16:00:00", "01:00:00"),
-        "REGIAO4": RegionParams(7200, "16:00:00", "02:00:00"),
-        "REGIAO5": RegionParams(10800, "15:00:00", "03:00:00"),
-        "REGIAO6": RegionParams(10800, "15:00:00", "03:00:00")
-    }
-
-
 # Inicialização
 def inicializar_app():
     """Inicializa o aplicativo e cria diretórios necessários."""
@@ -54,304 +53,170 @@ def inicializar_app():
     # Inicializar estado da sessão
     if "ultima_atualizacao" not in st.session_state:
         st.session_state["ultima_atualizacao"] = "Sem registro"
-    if "recarregar" not in st.session_state:
-        st.session_state["recarregar"] = False
+    if "job_atualizacao" not in st.session_state:
+        st.session_state["job_atualizacao"] = None
+    if "id_sessao" not in st.session_state:
+        st.session_state["id_sessao"] = uuid.uuid4().hex[:12]
 
 
 # Funções de dados
+def versao_sessao(atualizar: bool = False) -> Optional[str]:
+    """
+    Retorna a versão do dataset fixada para a sessão.
+
+    A sessão continua lendo a versão em que começou, mesmo que o worker
+    publique outra; ela passa para a versão publicada quando ``atualizar``
+    é informado ou quando a versão fixada foi removida pela retenção.
+    """
+    versao = st.session_state.get("versao_dataset")
+    if atualizar or not versao_disponivel(versao):
+        versao = versao_atual()
+        st.session_state["versao_dataset"] = versao
+    return versao
+
+
+def atualizar_ultima_atualizacao(versao: Optional[str]) -> None:
+    """Registra na sessão o horário da última entrega presente na versão do dataset (watermark)."""
+    metadados = ler_metadados(caminho_dataset(versao)) if versao else None
+    watermark = (metadados or {}).get("watermark")
+    if watermark:
+        st.session_state["ultima_atualizacao"] = pd.Timestamp(watermark).strftime("%d/%m/%Y %H:%M:%S")
+    else:
+        st.session_state["ultima_atualizacao"] = "Sem registro"
+
+
 @st.cache_data
-def carregar_dados() -> pd.DataFrame:
-    """Carrega os dados do Excel estático."""
+def carregar_catalogo(versao: Optional[str]) -> Optional[Dict[str, Any]]:
+    """Carrega o catálogo de dimensões (opções dos filtros) da versão informada do dataset."""
+    registrar_falta()
     try:
-        # Carrega diretamente do arquivo Excel
-        df = pd.read_excel(Config.EXCEL_FILE)
-        
-        # Criar um mapeamento simplificado para trabalhar com a estrutura existente na planilha dados.xlsx
-        # As colunas já estão no formato correto de acordo com a planilha mostrada
-        
-        # Conversões importantes para garantir tipos corretos
-        if 'data_hora_nf' in df.columns:
-            df['data_hora_nf'] = pd.to_datetime(df['data_hora_nf'], errors='coerce')
-        if 'data_hora_pedido' in df.columns:
-            df['data_hora_pedido'] = pd.to_datetime(df['data_hora_pedido'], errors='coerce')
-        if 'data_hora_nf_autorizacao' in df.columns:
-            df['data_hora_nf_autorizacao'] = pd.to_datetime(df['data_hora_nf_autorizacao'], errors='coerce')
-        
-        # Adicionar a coluna Data (data da nota fiscal)
-        if 'data_hora_nf' in df.columns:
-            df['Data'] = pd.to_datetime(df['data_hora_nf']).dt.date
-            df['competencia'] = pd.to_datetime(df['Data']).dt.strftime('%Y-%m')
-            
-        # Garantir que valor_nf e valor_frete são numéricos
-        if 'valor_nf' in df.columns:
-            df['valor_nf'] = pd.to_numeric(df['valor_nf'], errors='coerce')
-        if 'valor_frete' in df.columns:
-            df['valor_frete'] = pd.to_numeric(df['valor_frete'], errors='coerce')
-            
-        # Garantir que temos as colunas de status se não existirem
-        if 'situacao' not in df.columns:
-            df['situacao'] = "Realizada"  # Valor padrão
-        
-        if 'situacao_finalizado' not in df.columns:
-            # Define "Sucesso" para entregas sem devolução, "Indefinida" para outras
-            df['situacao_finalizado'] = df['devolucao'].apply(
-                lambda x: "Indefinida" if pd.isna(x) else ("Indefinida" if x != "SIM" else "Falha")
-            )
-        
-        # Se não tiver os campos de temporização, criar com base nos dados disponíveis
-        if 'Chegou no Local' not in df.columns and 'data_hora_nf' in df.columns:
-            # Assume que chegou no local ~1.5 horas após a data_hora_nf
-            df['Chegou no Local'] = pd.to_datetime(df['data_hora_nf']) + pd.Timedelta(minutes=90)
-        
-        if 'Concluida' not in df.columns and 'data_hora_nf' in df.columns:
-            # Assume que a entrega foi concluída ~2 horas após a data_hora_nf
-            df['Concluida'] = pd.to_datetime(df['data_hora_nf']) + pd.Timedelta(hours=2)
-        
-        if 'Rota Atribuida' not in df.columns and 'data_hora_pedido' in df.columns:
-            # Assume que a rota foi atribuída ~30 minutos após o pedido
-            df['Rota Atribuida'] = pd.to_datetime(df['data_hora_pedido']) + pd.Timedelta(minutes=30)
-            
-        # Salva o dataframe como parquet para cache
-        df.to_parquet(Config.CACHE_FILE, index=False)
-        
-        # Atualiza a informação da última atualização
-        if "data_hora_nf" in df.columns and not df["data_hora_nf"].isnull().all():
-            ultima_data = pd.to_datetime(df["data_hora_nf"]).max()
-            st.session_state["ultima_atualizacao"] = ultima_data.strftime("%d/%m/%Y %H:%M:%S")
-        else:
-            st.session_state["ultima_atualizacao"] = "Sem registro"
-    
+        catalogo = buscar_catalogo(versao)
     except Exception as e:
         st.error(f"Erro ao carregar dados: {str(e)}")
-        return pd.DataFrame()
-
-    return df
+        return None
+
+    return catalogo
+
+
+@st.cache_resource(max_entries=Config.MAX_INDICES_MEMORIA)
+def carregar_indice(versao: Optional[str], competencia: int) -> IndiceFiltros:
+    """
+    Carrega e indexa as entregas de uma competência, com os textos em Arrow
+    (o cache já guarda as entregas processadas na ingestão). O índice é mantido uma única vez no processo e
+    compartilhado, sem cópias, entre as sessões.
+    """
+    registrar_falta()
+    ano, mes = divmod(competencia, 100)
+    inicio = datetime.date(ano, mes, 1)
+    fim = (pd.Timestamp(inicio) + pd.offsets.MonthEnd(0)).date()
+    df = buscar_dados('vw_entregas_vuupt', versao=versao, data_inicial=inicio, data_final=fim)
+    return IndiceFiltros(compactar_textos(df))
+
+
+@st.cache_resource(max_entries=Config.MAX_CUBOS_MEMORIA)
+def carregar_cubo(versao: Optional[str]) -> Optional[Tuple[pd.DataFrame, pd.DataFrame]]:
+    """
+    Carrega o cubo diário pré-agregado da versão informada do dataset (None se
+    indisponível). O cubo é compartilhado entre as sessões e não deve ser alterado.
+    """
+    registrar_falta()
+    if versao is None:
+        return None
+    try:
+        cache = caminho_dataset(versao)
+        return ler_cubo(versao_dataset(cache), diretorio_cubo(cache))
+    except Exception as e:
+        print(f"Erro ao carregar o cubo: {e}")
+        return None
+
+
+@st.cache_resource(max_entries=Config.MAX_CUBOS_MEMORIA)
+def carregar_esbocos(versao: Optional[str]) -> Optional[pd.DataFrame]:
+    """
+    Carrega os esboços de quantis dos tempos por Data × zona da versão do
+    dataset (None se indisponíveis), compartilhados entre as sessões.
+    """
+    registrar_falta()
+    if versao is None:
+        return None
+    try:
+        cache = caminho_dataset(versao)
+        return ler_esbocos(versao_dataset(cache), diretorio_cubo(cache))
+    except Exception as e:
+        print(f"Erro ao carregar os esboços de quantis: {e}")
+        return None
 
 
 @st.cache_data
 def carregar_infos() -> pd.DataFrame:
     """Carrega informações de custo dos motoqueiros."""
-    # Criando um dataframe simulado de custos
-    data = {
-        'competencia': ['2025-05', '2025-05', '2025-05', '2025-05', '2025-05', '2025-05'],
-        'regiao': ['REGIAO1', 'REGIAO2', 'REGIAO3', 'REGIAO4', 'REGIAO5', 'REGIAO6'],
-        'custo_fixo': [2000, 1800, 2200, 1900, 2100, 2300],
-        'valor_competencia': [5000, 4500, 5500, 4800, 5200, 5700]
-    }
-    return pd.DataFrame(data)
+    return custos_simulados()
+
+
+@st.cache_resource(max_entries=Config.MAX_CUBOS_MEMORIA)
+def carregar_custos(versao: Optional[str]) -> ModeloCustos:
+    """
+    Monta o modelo de custos da versão do dataset: o custo mensal de cada
+    região e as entregas diárias por região, contadas no cubo (ou, sem
+    cubo, nas entregas da versão). Compartilhado entre as sessões.
+    """
+    registrar_falta()
+    cubo = carregar_cubo(versao)
+    if cubo is not None:
+        diario = rollup_diario(cubo[0])
+    else:
+        diario = rollup_diario(buscar_dados('vw_entregas_vuupt', versao=versao, colunas=['Data', 'zona']))
+    return ModeloCustos(carregar_infos(), diario)
 
 
-def atualizar_em_segundo_plano() -> None:
-    """Atualiza os dados em segundo plano (recarrega do Excel)."""
+def garantir_worker() -> None:
+    """Inicia o worker de atualização (scheduler.py) em outro processo se nenhum estiver ativo."""
+    if not Config.INICIAR_WORKER_AUTOMATICO or worker_ativo():
+        return
     try:
-        # Como estamos usando um arquivo estático, apenas recarrega
-        df = pd.read_excel(Config.EXCEL_FILE)
-        df.to_parquet(Config.CACHE_FILE, index=False)
-        
-        st.cache_data.clear()
-        st.session_state["ultima_atualizacao"] = datetime.datetime.now().strftime("%d/%m/%Y %H:%M:%S")
-        
-        # Sinaliza que deve ser feito um rerun no próximo ciclo
-        st.session_state["recarregar"] = True
-    
+        subprocess.Popen(
+            [sys.executable, str(Path(__file__).with_name("scheduler.py"))],
+            cwd=Path(__file__).parent,
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+            start_new_session=True,
+        )
     except Exception as e:
-        st.error(f"Erro na atualização: {str(e)}")
+        print(f"Erro ao iniciar o worker de atualização: {e}")
 
 
-def preprocessar_dados(df: pd.DataFrame) -> pd.DataFrame:
-    """Pré-processa os dados para análise."""
-    if df.empty:
-        return df
-        
+def solicitar_atualizacao(tipo: str = "manual") -> None:
+    """Enfileira uma atualização para o worker; a sessão apenas acompanha o status."""
     try:
-        # Conversões de tipo - se a coluna existir
-        if 'data_hora_nf' in df.columns:
-            df['data_hora_nf'] = pd.to_datetime(df['data_hora_nf'], errors='coerce')
-        if 'Concluida' in df.columns:
-            df['Concluida'] = pd.to_datetime(df['Concluida'], errors='coerce')
-        if 'Chegou no Local' in df.columns:
-            df['Chegou no Local'] = pd.to_datetime(df['Chegou no Local'], errors='coerce')
-        if 'data_hora_pedido' in df.columns:
-            df['data_hora_pedido'] = pd.to_datetime(df['data_hora_pedido'], errors='coerce')
-        if 'Rota Atribuida' in df.columns:
-            df['Rota Atribuida'] = pd.to_datetime(df['Rota Atribuida'], errors='coerce')
-        
-        # Criação da coluna Data se não existir
-        if 'Data' not in df.columns and 'data_hora_nf' in df.columns:
-            df['Data'] = df['data_hora_nf'].dt.date
-        
-        # Criação da coluna competencia se não existir
-        if 'competencia' not in df.columns and 'Data' in df.columns:
-            df['competencia'] = pd.to_datetime(df['Data']).dt.strftime('%Y-%m')
-        
-        # Conversão de colunas numéricas
-        if 'valor_nf' in df.columns:
-            df['valor_nf'] = pd.to_numeric(df['valor_nf'], errors='coerce')
-        if 'valor_frete' in df.columns:
-            df['valor_frete'] = pd.to_numeric(df['valor_frete'], errors='coerce')
-        
-        # Cálculo de tempos - com verificação
-        colunas_necessarias = ['Chegou no Local', 'data_hora_pedido', 'Rota Atribuida']
-        if all(col in df.columns for col in colunas_necessarias):
-            df['Tempo de Ciclo'] = df.apply(
-                lambda row: row['Chegou no Local'] - row['data_hora_pedido']
-                if pd.notnull(row['Chegou no Local']) and pd.notnull(row['data_hora_pedido']) and row['Chegou no Local'] >= row['data_hora_pedido']
-                else pd.NaT, axis=1)
-
-            df['Tempo de Rota'] = df.apply(
-                lambda row: row['Chegou no Local'] - row['Rota Atribuida']
-                if pd.notnull(row['Chegou no Local']) and pd.notnull(row['Rota Atribuida']) and row['Chegou no Local'] >= row['Rota Atribuida']
-                else pd.NaT, axis=1)
-                
-        # Filtros de sucesso - com verificação
-        if 'situacao' in df.columns and 'situacao_finalizado' in df.columns:
-            df = df[
-                ((df['situacao'] == "Realizada") & (df['situacao_finalizado'] == "Sucesso")) |
-                ((df['situacao_finalizado'] == "Indefinida") & (df['situacao'] != "Cancelada"))
-            ]
-        
-        return df
+        garantir_worker()
+        st.session_state["job_atualizacao"] = enfileirar(tipo)
     except Exception as e:
-        st.error(f"Erro ao processar os dados: {str(e)}")
-        return pd.DataFrame()
-
-
-def aplicar_filtros(df: pd.DataFrame, filtros: Dict[str, Any]) -> pd.DataFrame:
-    """Aplica filtros aos dados."""
-    if df.empty:
-        return df
-        
-    # Filtra por data    
-    if 'Data' in df.columns:
-        df = df[(df['Data'] >= filtros['data_inicial']) & (df['Data'] <= filtros['data_final'])]
-    
-    # Aplica filtros de seleção
-    if filtros['zonas'] and 'zona' in df.columns: 
-        df = df[df['zona'].isin(filtros['zonas'])]
-    if filtros['motoqueiros'] and 'motoqueiro' in df.columns: 
-        df = df[df['motoqueiro'].isin(filtros['motoqueiros'])]
-    if filtros['clientes'] and 'Cliente' in df.columns: 
-        df = df[df['Cliente'].isin(filtros['clientes'])]
-    if filtros['vendedores'] and 'vendedor' in df.columns: 
-        df = df[df['vendedor'].isin(filtros['vendedores'])]
-        
-    return df
+        st.error(f"Erro na atualização: {str(e)}")
 
 
-def acima_tempo(row: pd.Series) -> bool:
-    """Verifica se o tempo de ciclo está acima do ideal para a zona."""
-    if 'Tempo de Ciclo' in row and 'zona' in row and pd.notnull(row['Tempo de Ciclo']):
-        # Adaptação para usar as regiões corretas da planilha
-        zona = row['zona']
-        # Se a zona exata não existe no mapeamento de parâmetros, usamos parâmetros padrão
-        if zona not in Config.PARAMETROS_REGIAO:
-            # Valor padrão para duração máxima
-            duracao_padrao = 7200  # 2 horas
-            return row['Tempo de Ciclo'].total_seconds() > duracao_padrao
-        else:
-            return row['Tempo de Ciclo'].total_seconds() > Config.PARAMETROS_REGIAO[zona].duracao_seg
-    return False
-
-
-# Funções para cálculos
-def calcular_indicadores(df: pd.DataFrame, df_motoqueiros: pd.DataFrame, data_final: datetime.date) -> Dict[str, Any]:
-    """Calcula os indicadores principais do dashboard."""
-    if df.empty:
-        return {"erro": "Sem dados para calcular indicadores"}
-        
-    # Contadores básicos
-    entregas = df.shape[0]
-    viagens = df['rota_nome'].nunique() if 'rota_nome' in df.columns else 0
-    viagens_3p = df.groupby('rota_nome').filter(lambda x: len(x) > 3)['rota_nome'].nunique() if 'rota_nome' in df.columns else 0
-    
-    # Frete grátis - conta entregas onde valor_frete é zero
-    frete_gratis = df[df['valor_frete'] == 0].shape[0] if 'valor_frete' in df.columns else 0
-    frete_gratis_perc = frete_gratis / entregas * 100 if entregas else 0
+@st.fragment(run_every=Config.INTERVALO_STATUS_SEG)
+def acompanhar_atualizacao() -> None:
+    """Consulta periodicamente o job de atualização solicitado e recarrega a página ao concluir."""
+    job_id = st.session_state.get("job_atualizacao")
+    job = status_job(job_id) if job_id else None
+    if job is None:
+        st.session_state["job_atualizacao"] = None
+        return
     
-    # Devoluções - conta entregas onde devolucao é "SIM"
-    devolucoes = df[df['devolucao'] == "SIM"].shape[0] if 'devolucao' in df.columns else 0
-    devolucoes_perc = (devolucoes / entregas * 100) if entregas > 0 else 0
-    
-    # Valores
-    valor_nf_total = df['valor_nf'].sum() if 'valor_nf' in df.columns else 0
-    valor_frete_total = df['valor_frete'].sum() if 'valor_frete' in df.columns else 0
-    
-    # Entregas viradas
-    entregas_viradas = 0
-    if 'Concluida' in df.columns and 'Data' in df.columns:
-        entregas_viradas = df[df['Concluida'].dt.date > df['Data']].shape[0]
-    entregas_viradas_perc = entregas_viradas / entregas * 100 if entregas else 0
-    
-    # % Acima tempo ideal
-    entregas_acima = 0
-    perc_acima = 0
-    if 'Concluida' in df.columns and 'Data' in df.columns:
-        entregas_validas = df[df['Concluida'].dt.date == df['Data']]
-        entregas_acima = entregas_validas.apply(acima_tempo, axis=1).sum()
-        perc_acima = (entregas_acima / len(entregas_validas) * 100) if len(entregas_validas) else 0
-    
-    # Indicadores adicionais
-    ticket_medio = valor_nf_total / entregas if entregas else 0
-    receita_media_viagem = valor_nf_total / viagens if viagens else 0
-    entregas_por_viagem = entregas / viagens if viagens else 0
-    motoqueiros_count = df['motoqueiro'].nunique() if 'motoqueiro' in df.columns else 0
-    entregas_por_motoqueiro = entregas / motoqueiros_count if motoqueiros_count else 0
-    
-    # Custo por entrega - com verificação
-    custo_total = 0
-    resultado_projetado = 0
-    resultado = 0
-    
-    if not df_motoqueiros.empty and 'competencia' in df_motoqueiros.columns:
-        df_motoqueiros['competencia'] = pd.to_datetime(df_motoqueiros['competencia'], format='%Y-%m', errors='coerce').dt.strftime('%Y-%m')
-        competencia = pd.to_datetime(data_final).strftime('%Y-%m')
-        if 'valor_competencia' in df_motoqueiros.columns:
-            custo_total = df_motoqueiros[df_motoqueiros['competencia'] == competencia]['valor_competencia'].sum()
-            resultado_projetado = float(valor_frete_total) - float(custo_total)
-            resultado = (float(valor_frete_total) / float(custo_total) * 100) if float(custo_total) > 0 else 0
-    
-    custo_por_entrega = round(custo_total / entregas, 1) if entregas else 0
-    
-    # Formatação tempo médio
-    def formatar(td):
-        if pd.isnull(td): return "Não definido"
-        s = int(td.total_seconds())
-        return f"{s // 3600:02}:{(s % 3600) // 60:02}:{s % 60:02}"
-    
-    tempo_ciclo_medio = "Não definido"
-    tempo_rota_medio = "Não definido"
+    if job["estado"] in (CONCLUIDO, ERRO):
+        st.session_state["job_atualizacao"] = None
+        if job["estado"] == ERRO:
+            st.session_state["erro_atualizacao"] = job.get("erro") or job.get("mensagem")
+        else:
+            # Os caches são indexados pela versão do dataset: ao passar para a
+            # versão publicada, catálogo, cubo, índices e indicadores são trocados
+            versao_sessao(atualizar=True)
+        st.rerun()
     
-    if 'Tempo de Ciclo' in df.columns:
-        tempo_ciclo_medio = formatar(df['Tempo de Ciclo'].dropna().mean())
-    if 'Tempo de Rota' in df.columns:
-        tempo_rota_medio = formatar(df['Tempo de Rota'].dropna().mean())
-        
-    return {
-        "entregas": entregas,
-        "viagens": viagens,
-        "viagens_3p": viagens_3p,
-        "frete_gratis": frete_gratis,
-        "frete_gratis_perc": frete_gratis_perc,
-        "devolucoes": devolucoes,
-        "devolucoes_perc": devolucoes_perc,
-        "valor_nf_total": valor_nf_total,
-        "valor_frete_total": valor_frete_total,
-        "entregas_viradas": entregas_viradas,
-        "entregas_viradas_perc": entregas_viradas_perc,
-        "entregas_acima": entregas_acima,
-        "perc_acima": perc_acima,
-        "ticket_medio": ticket_medio,
-        "receita_media_viagem": receita_media_viagem,
-        "entregas_por_viagem": entregas_por_viagem,
-        "motoqueiros_count": motoqueiros_count,
-        "entregas_por_motoqueiro": entregas_por_motoqueiro,
-        "custo_total": custo_total,
-        "resultado_projetado": resultado_projetado,
-        "resultado": resultado,
-        "custo_por_entrega": custo_por_entrega,
-        "tempo_ciclo_medio": tempo_ciclo_medio,
-        "tempo_rota_medio": tempo_rota_medio
-    }
+    st.info(f"⏳ {job.get('mensagem', 'Atualizando os dados')}...")
+    garantir_worker()
+    if not Config.INICIAR_WORKER_AUTOMATICO and not worker_ativo():
+        st.warning("Worker de atualização inativo. Execute `python scheduler.py`.")
 
 
 # Componentes de UI
@@ -372,8 +237,8 @@ def render_cartao(titulo: str, valor: Union[str, float, int], moeda: bool = True
     </div>"""
 
 
-def sidebar_filtros(df: pd.DataFrame) -> Dict[str, Any]:
-    """Renderiza a barra lateral com filtros."""
+def sidebar_filtros(catalogo: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+    """Renderiza a barra lateral com filtros a partir do catálogo de dimensões."""
     st.sidebar.title("Dashboard Entregas")
     
     # Mostra última atualização
@@ -381,9 +246,20 @@ def sidebar_filtros(df: pd.DataFrame) -> Dict[str, Any]:
 
     # Botão de atualização
     if st.sidebar.button("🔄 Atualizar Dados", type="primary"):
-        with st.spinner("Atualizando os dados em segundo plano..."):
-            atualizar_em_segundo_plano()
-            st.sidebar.success("Dados atualizados!")
+        solicitar_atualizacao()
+        st.sidebar.success("Atualização solicitada!")
+    
+    # Status da atualização em andamento (consultado sem bloquear a sessão)
+    if st.session_state.get("erro_atualizacao"):
+        st.sidebar.error(f"Erro na atualização: {st.session_state.pop('erro_atualizacao')}")
+    if st.session_state.get("job_atualizacao"):
+        with st.sidebar:
+            acompanhar_atualizacao()
+    elif versao_atual() != st.session_state.get("versao_dataset"):
+        st.sidebar.info("Há dados mais recentes disponíveis.")
+        if st.sidebar.button("Carregar dados mais recentes"):
+            versao_sessao(atualizar=True)
+            st.rerun()
 
     # Filtros
     st.sidebar.header("Filtros")
@@ -392,30 +268,18 @@ def sidebar_filtros(df: pd.DataFrame) -> Dict[str, Any]:
     data_minima = datetime.date(2025, 5, 14)  # Data padrão
     data_maxima = datetime.date(2025, 5, 15)  # Data padrão
     
-    if not df.empty and 'Data' in df.columns:
-        dates = pd.to_datetime(df['Data']).dropna()
-        if not dates.empty:
-            data_minima = dates.min().date()
-            data_maxima = dates.max().date()
+    limites = limites_datas(catalogo)
+    if limites is not None:
+        data_minima, data_maxima = limites
     
     data_inicial = st.sidebar.date_input("Data Inicial", data_minima)
     data_final = st.sidebar.date_input("Data Final", data_maxima)
     
-    # Filtros dinâmicos - com verificação de existência de colunas
-    zonas = []
-    motoqueiros = []
-    clientes = []
-    vendedores = []
-
-    if not df.empty:
-        if 'zona' in df.columns:
-            zonas = sorted(df['zona'].dropna().unique().tolist())
-        if 'motoqueiro' in df.columns:
-            motoqueiros = sorted(df['motoqueiro'].dropna().unique())
-        if 'Cliente' in df.columns:
-            clientes = sorted(df['Cliente'].dropna().unique())
-        if 'vendedor' in df.columns:
-            vendedores = sorted(df['vendedor'].dropna().unique())
+    # Filtros dinâmicos - apenas valores com entregas no período escolhido
+    zonas = opcoes_filtro(catalogo, "zonas", data_inicial, data_final)
+    motoqueiros = opcoes_filtro(catalogo, "motoqueiros", data_inicial, data_final)
+    clientes = opcoes_filtro(catalogo, "clientes", data_inicial, data_final)
+    vendedores = opcoes_filtro(catalogo, "vendedores", data_inicial, data_final)
 
     zonas_sel = st.sidebar.multiselect("Zona:", zonas)
     motoqueiros_sel = st.sidebar.multiselect("Motoqueiro:", motoqueiros)
@@ -489,45 +353,271 @@ def exibir_painel_indicadores(indicadores: Dict[str, Any], zonas_sel: List[str])
         st.markdown(render_cartao("Horário Corte", horario_corte, False), unsafe_allow_html=True)
 
 
+def carregar_entregas_filtradas(filtros: Dict[str, Any], versao: Optional[str]) -> pd.DataFrame:
+    """Seleciona as entregas filtradas pelos índices das competências do período."""
+    competencias = competencias_no_intervalo(filtros["data_inicial"], filtros["data_final"])
+    with etapa("carregar_indices", cache=True) as registro:
+        indices = [carregar_indice(versao, competencia) for competencia in competencias]
+        registro["linhas_saida"] = sum(len(indice) for indice in indices)
+    with etapa("filtrar_entregas", linhas_entrada=registro.get("linhas_saida")) as registro:
+        partes = [parte for parte in (indice.filtrar(filtros) for indice in indices) if not parte.empty]
+        if not partes:
+            df = pd.DataFrame()
+        elif len(partes) == 1:
+            df = partes[0]
+        else:
+            df = aplicar_esquema(pd.concat(partes, ignore_index=True))
+        registro["linhas_saida"] = len(df)
+    return df
+
+
+def exibir_detalhamento(filtros: Dict[str, Any], versao: Optional[str], custos: ModeloCustos) -> None:
+    """
+    Série temporal, série por hora e maiores valores por dimensão do cartão
+    escolhido. Calculado apenas quando um cartão é escolhido e memorizado por
+    versão do dataset e estado dos filtros (o mesmo para todos os cartões).
+    """
+    cartao = st.selectbox("Detalhar indicador", list(INDICADORES_CARTOES), index=None,
+                          placeholder="Escolha um cartão para ver a evolução e os maiores valores",
+                          key="detalhe_cartao")
+    if cartao is None:
+        return
+
+    def calcular() -> Dict[str, Any]:
+        registrar_falta()
+        df_filtrado = carregar_entregas_filtradas(filtros, versao)
+        with etapa("calcular_detalhamento", linhas_entrada=len(df_filtrado)):
+            return calcular_detalhamento(df_filtrado, custos, filtros)
+
+    with etapa("detalhar_indicador", cache=True):
+        detalhamento = CACHE_DETALHAMENTO.obter_ou_calcular(versao, chave_filtros(filtros), calcular)
+    if "erro" in detalhamento:
+        st.info(detalhamento["erro"])
+        return
+
+    indicador = INDICADORES_CARTOES[cartao]
+    unidade = " (min)" if indicador.endswith("_min") else ""
+    with st.expander(f"📈 {cartao}{unidade}", expanded=True):
+        col1, col2 = st.columns(2)
+        with col1:
+            st.caption(f"Por {GRANULARIDADES[detalhamento['granularidade']]}")
+            st.line_chart(detalhamento["serie"][indicador])
+        with col2:
+            st.caption("Por hora da NF")
+            horas = detalhamento["horas"]
+            st.bar_chart(horas.loc[horas.index.notna(), indicador])
+
+        colunas = st.columns(len(detalhamento["dimensoes"]))
+        for coluna, (dimensao, tabela) in zip(colunas, detalhamento["dimensoes"].items()):
+            with coluna:
+                st.caption(f"Maiores por {dimensao}")
+                st.dataframe(maiores(tabela, indicador).rename(cartao))
+
+
+def exibir_distribuicao_tempos(filtros: Dict[str, Any], versao: Optional[str]) -> None:
+    """
+    Percentis e histogramas dos tempos de ciclo e de rota. Com filtros apenas
+    de período e zona, mescla os esboços gravados com o cubo; com filtros de
+    motoqueiro, cliente ou vendedor, monta os esboços das entregas filtradas.
+    """
+    def calcular() -> Dict[str, Any]:
+        registrar_falta()
+        cobertos = all(not filtros.get(filtro) or dimensao in DIMENSOES_ESBOCOS
+                       for filtro, dimensao in Config.FILTROS_DIMENSOES.items())
+        with etapa("carregar_esbocos", cache=True):
+            esbocos = carregar_esbocos(versao) if cobertos else None
+        if esbocos is not None:
+            with etapa("mesclar_esbocos", linhas_entrada=len(esbocos)):
+                return calcular_distribuicao(filtrar_cubo(esbocos, filtros))
+        df_filtrado = carregar_entregas_filtradas(filtros, versao)
+        with etapa("construir_esbocos", linhas_entrada=len(df_filtrado)):
+            return calcular_distribuicao(construir_esbocos(df_filtrado))
+
+    with etapa("distribuicao_tempos", cache=True):
+        distribuicao = CACHE_QUANTIS.obter_ou_calcular(versao, chave_filtros(filtros), calcular)
+    if "erro" in distribuicao:
+        return
+
+    st.subheader("Distribuição dos Tempos")
+    for medida, titulo in MEDIDAS_QUANTIS.items():
+        quantis = distribuicao["quantis"][medida]
+        colunas = st.columns(len(quantis))
+        for coluna, (percentil, duracao) in zip(colunas, quantis.items()):
+            with coluna:
+                st.markdown(render_cartao(f"{titulo} {percentil.upper()}", formatar_duracao(duracao), False),
+                            unsafe_allow_html=True)
+
+    with st.expander("📊 Histogramas dos tempos (min)"):
+        colunas = st.columns(len(MEDIDAS_QUANTIS))
+        for coluna, (medida, titulo) in zip(colunas, MEDIDAS_QUANTIS.items()):
+            with coluna:
+                st.caption(titulo)
+                st.bar_chart(distribuicao["histogramas"][medida].rename("entregas"))
+
+
+def exibir_dados_brutos(filtros: Dict[str, Any], versao: Optional[str]) -> None:
+    """
+    Explorador paginado das entregas filtradas, com projeção de colunas, busca
+    e ordenação no servidor. Apenas a página exibida é materializada; a
+    exportação grava o conjunto filtrado em blocos num arquivo temporário ao
+    clicar em "Gerar exportação", e o download entrega o arquivo lido em memória.
+    """
+    st.subheader("Dados Brutos")
+    competencias = competencias_no_intervalo(filtros["data_inicial"], filtros["data_final"])
+    with etapa("carregar_indices", cache=True):
+        indices = [carregar_indice(versao, competencia) for competencia in competencias]
+
+    col1, col2, col3, col4 = st.columns([3, 2, 1, 1])
+    with col1:
+        busca = st.text_input("Buscar", key="bruto_busca", placeholder="Serviço, cliente, motoqueiro, rota...")
+    with etapa("consultar_dados_brutos") as registro:
+        consulta = ConsultaEntregas(indices, filtros, busca)
+        registro["linhas_saida"] = consulta.total
+    todas = consulta.colunas() or (list(indices[0].df.columns) if indices else [])
+    with col2:
+        ordenar_por = st.selectbox("Ordenar por", todas, index=todas.index("Data") if "Data" in todas else 0,
+                                   key="bruto_ordenar_por")
+    with col3:
+        decrescente = st.toggle("Decrescente", key="bruto_decrescente")
+    with col4:
+        tamanho = st.selectbox("Linhas por página", Config.TAMANHOS_PAGINA, index=1, key="bruto_tamanho")
+    colunas = st.multiselect("Colunas", todas, default=[coluna for coluna in Config.COLUNAS_DADOS_BRUTOS if coluna in todas],
+                             key="bruto_colunas") or todas
+
+    paginas = max(1, math.ceil(consulta.total / tamanho))
+    pagina = st.number_input("Página", min_value=1, max_value=paginas, value=1, step=1, key="bruto_pagina")
+    with etapa("renderizar_dados_brutos", linhas_entrada=consulta.total) as registro:
+        # Ordem natural (Data crescente) não precisa ordenar o conjunto inteiro
+        ordem = None if ordenar_por == "Data" and not decrescente else ordenar_por
+        df_pagina = consulta.pagina(int(pagina) - 1, tamanho, colunas, ordem, decrescente)
+        registro["linhas_saida"] = len(df_pagina)
+        st.caption(f"{consulta.total:,} entregas · página {int(pagina)} de {paginas}".replace(",", "."))
+        st.dataframe(df_pagina, hide_index=True)
+
+    formato = st.radio("Formato da exportação", ["csv", "parquet"], horizontal=True, key="bruto_formato")
+
+    # A exportação só é gerada ao clicar em "Gerar exportação" e fica guardada na sessão
+    # até os parâmetros mudarem; o arquivo gerado é entregue ao download inteiro em memória
+    parametros = (versao, chave_filtros(filtros), busca, formato, tuple(colunas), ordem, decrescente)
+    exportacao = st.session_state.get("bruto_exportacao")
+    if exportacao is not None and exportacao[0] != parametros:
+        exportacao = st.session_state["bruto_exportacao"] = None
+    if exportacao is None:
+        if st.button(f"Gerar exportação de {consulta.total:,} entregas".replace(",", "."),
+                     disabled=not consulta.total, key="bruto_gerar_exportacao"):
+            with etapa("exportar_dados_brutos", linhas_entrada=consulta.total) as registro, \
+                    tempfile.TemporaryFile() as arquivo:
+                registro["linhas_saida"] = exportar(consulta, arquivo, formato, colunas, ordem, decrescente)
+                arquivo.seek(0)
+                exportacao = st.session_state["bruto_exportacao"] = (parametros, arquivo.read())
+    if exportacao is not None:
+        st.download_button(f"⬇️ Baixar {consulta.total:,} entregas".replace(",", "."), exportacao[1],
+                           file_name=f"entregas.{formato}",
+                           mime="text/csv" if formato == "csv" else "application/octet-stream")
+
+
+def modo_debug() -> bool:
+    """Indica se o painel de depuração foi pedido na URL (?debug=1) e está habilitado."""
+    return Config.PAINEL_DEBUG and st.query_params.get("debug") == "1"
+
+
+def exibir_painel_debug(medicao: Execucao) -> None:
+    """Exibe na barra lateral as etapas medidas nesta execução, o cache de indicadores e o resumo do log."""
+    with st.sidebar.expander("🛠️ Depuração", expanded=True):
+        st.caption(f"Execução {medicao.id} · versão {medicao.contexto.get('versao') or 'nenhuma'}")
+        colunas = ["etapa", "segundos", "linhas_entrada", "linhas_saida", "cache",
+                   "pico_memoria_mb", "memoria_adicional_mb", "etapa_pai"]
+        st.dataframe(pd.DataFrame(medicao.etapas, columns=colunas), hide_index=True)
+
+        st.caption("Cache de indicadores")
+        st.json(CACHE_INDICADORES.estatisticas(), expanded=False)
+        st.caption("Cache de detalhamentos")
+        st.json(CACHE_DETALHAMENTO.estatisticas(), expanded=False)
+        st.caption("Cache de percentis dos tempos")
+        st.json(CACHE_QUANTIS.estatisticas(), expanded=False)
+
+        if st.checkbox("Resumo do log de métricas", key="resumo_metricas"):
+            resumo = resumir()
+            if resumo.empty:
+                st.info(f"Nenhuma métrica registrada em {Config.METRICAS_ARQUIVO}.")
+            else:
+                st.dataframe(resumo, hide_index=True)
+
+
 def main():
     """Função principal que executa o aplicativo."""
     # Inicialização
     inicializar_app()
     
-    # Recarrega a página se a atualização foi concluída
-    if st.session_state.get("recarregar", False):
-        st.session_state["recarregar"] = False  # reseta
-        st.rerun()
-    
-    # Carrega dados
-    df_entregas = carregar_dados()
-    df_motoqueiros = carregar_infos()
+    # Instrumentação das etapas: log de métricas (Config.METRICAS_ATIVAS) e painel de depuração
+    debug = modo_debug()
+    with execucao("interface", ativa=debug, sessao=st.session_state["id_sessao"]) as medicao:
+        try:
+            exibir_dashboard()
+        finally:
+            if debug and medicao is not None:
+                exibir_painel_debug(medicao)
+
+
+def exibir_dashboard() -> None:
+    """Carrega os dados da versão da sessão, calcula os indicadores e monta o dashboard."""
+    # Sem dataset ainda gerado, solicita a carga inicial ao worker (uma vez por sessão)
+    versao = versao_sessao()
+    anotar(versao=versao)
+    atualizar_ultima_atualizacao(versao)
+    if versao is None and not st.session_state.get("carga_inicial_solicitada"):
+        st.session_state["carga_inicial_solicitada"] = True
+        solicitar_atualizacao("inicial")
+    
+    # Carrega o catálogo de dimensões dos filtros
+    with etapa("carregar_catalogo", cache=True) as registro:
+        catalogo = carregar_catalogo(versao)
+        registro["linhas_saida"] = (catalogo or {}).get("linhas")
+    with etapa("carregar_custos", cache=True):
+        custos = carregar_custos(versao)
     
     # Sidebar com filtros
-    filtros = sidebar_filtros(df_entregas)
+    with etapa("barra_lateral"):
+        filtros = sidebar_filtros(catalogo)
     
     # Verificar se há dados para processar
-    if df_entregas.empty:
+    if not catalogo or not catalogo.get("linhas"):
+        if st.session_state.get("job_atualizacao"):
+            st.info("Os dados estão sendo preparados pelo worker de atualização. A página será recarregada ao final.")
+            st.stop()
         st.warning("Não há dados disponíveis para exibir. Verifique se o arquivo 'dados.xlsx' está na raiz do projeto.")
         st.stop()
     
-    # Pré-processamento dos dados
-    df_entregas = preprocessar_dados(df_entregas)
-    
-    # Aplicação de filtros
-    df_filtrado = aplicar_filtros(df_entregas, filtros)
-    
-    # Cálculo de indicadores
-    indicadores = calcular_indicadores(df_filtrado, df_motoqueiros, filtros["data_final"])
+    # Cálculo de indicadores - pelo cubo pré-agregado, quando disponível,
+    # memorizado por versão do dataset e estado dos filtros
+    def calcular() -> Dict[str, Any]:
+        registrar_falta()
+        with etapa("carregar_cubo", cache=True):
+            cubo = carregar_cubo(versao)
+        if cubo is not None:
+            with etapa("calcular_indicadores_cubo", linhas_entrada=len(cubo[0])):
+                return calcular_indicadores_cubo(cubo[0], cubo[1], filtros, custos)
+        df_filtrado = carregar_entregas_filtradas(filtros, versao)
+        with etapa("calcular_indicadores", linhas_entrada=len(df_filtrado)):
+            return calcular_indicadores(df_filtrado, custos, filtros["data_inicial"], filtros["data_final"])
+    
+    with etapa("indicadores", cache=True):
+        indicadores = CACHE_INDICADORES.obter_ou_calcular(versao, chave_filtros(filtros), calcular)
     
     # Exibição do dashboard
-    exibir_painel_indicadores(indicadores, filtros["zonas"])
+    with etapa("renderizar_indicadores"):
+        exibir_painel_indicadores(indicadores, filtros["zonas"])
+
+    # Percentis e histogramas dos tempos de ciclo e de rota
+    exibir_distribuicao_tempos(filtros, versao)
+
+    # Detalhamento do cartão escolhido (série temporal e quebras por dimensão)
+    exibir_detalhamento(filtros, versao, custos)
     
-    # Adiciona visualização da tabela de dados para debug
+    # Explorador paginado das entregas filtradas
     if st.checkbox("Mostrar dados brutos"):
-        st.subheader("Dados Brutos")
-        st.dataframe(df_filtrado)
+        exibir_dados_brutos(filtros, versao)
 
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
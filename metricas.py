@@ -0,0 +1,241 @@
+"""
+Instrumentação das etapas da interface e da atualização de dados.
+
+Cada execução (um rerun da interface ou uma atualização do worker) registra,
+por etapa, o tempo de relógio, as linhas de entrada e de saída, o pico de
+memória do processo e se a etapa foi atendida por cache. As etapas são
+gravadas como JSON lines em Config.METRICAS_ARQUIVO (uma linha por etapa),
+para agregar entre sessões com ``resumir``, e ficam disponíveis para o painel
+de depuração da interface.
+
+Com a instrumentação desligada não há execução ativa e ``etapa`` devolve um
+contexto vazio, sem medição nem gravação.
+"""
+import contextvars
+import datetime
+import json
+import os
+import threading
+import time
+import uuid
+import pandas as pd
+from contextlib import contextmanager, nullcontext
+from pathlib import Path
+from typing import Any, ContextManager, Dict, Iterator, List, Optional
+
+from config import Config
+
+
+MB = 1024 * 1024
+
+# Execução e etapa em andamento na thread (cada sessão do Streamlit roda em sua thread)
+_EXECUCAO: contextvars.ContextVar[Optional['Execucao']] = contextvars.ContextVar('execucao', default=None)
+_ETAPA: contextvars.ContextVar[Optional[Dict[str, Any]]] = contextvars.ContextVar('etapa', default=None)
+
+
+def rss_atual() -> Optional[int]:
+    """Retorna a memória residente (RSS) do processo em bytes; None se não for possível medir."""
+    try:
+        import psutil
+        return psutil.Process().memory_info().rss
+    except ImportError:
+        pass
+    try:
+        with open('/proc/self/statm') as arquivo:
+            return int(arquivo.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, AttributeError):
+        return None
+
+
+class MedidorMemoria:
+    """
+    Amostra o RSS do processo em uma thread enquanto o bloco executa, para
+    obter o pico de memória de uma etapa (inclui a memória do Arrow, que não
+    passa pelo alocador do Python).
+    """
+
+    def __init__(self, intervalo: float = 0.005):
+        self.intervalo = intervalo
+        self.inicial: Optional[int] = None
+        self.pico: Optional[int] = None
+        self._fim = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def _amostrar(self) -> None:
+        while not self._fim.wait(self.intervalo):
+            atual = rss_atual()
+            if atual is not None and (self.pico is None or atual > self.pico):
+                self.pico = atual
+
+    def __enter__(self) -> 'MedidorMemoria':
+        self.inicial = self.pico = rss_atual()
+        if self.inicial is not None:
+            self._thread = threading.Thread(target=self._amostrar, daemon=True)
+            self._thread.start()
+        return self
+
+    def __exit__(self, *excecao: Any) -> None:
+        self._fim.set()
+        if self._thread is not None:
+            self._thread.join()
+        atual = rss_atual()
+        if atual is not None and (self.pico is None or atual > self.pico):
+            self.pico = atual
+
+    def pico_mb(self) -> Optional[float]:
+        """Pico de memória do processo durante o bloco, em MB."""
+        return None if self.pico is None else round(self.pico / MB, 1)
+
+    def adicional_mb(self) -> Optional[float]:
+        """Memória acrescida ao processo pelo bloco (pico menos o início), em MB."""
+        if self.pico is None or self.inicial is None:
+            return None
+        return round((self.pico - self.inicial) / MB, 1)
+
+
+class Execucao:
+    """
+    Etapas medidas em uma execução. O pico de memória é do processo inteiro:
+    na interface ele inclui as sessões que executam ao mesmo tempo.
+    """
+
+    def __init__(self, origem: str, **contexto: Any):
+        self.id = uuid.uuid4().hex[:12]
+        self.origem = origem
+        self.contexto: Dict[str, Any] = contexto
+        self.etapas: List[Dict[str, Any]] = []
+
+    @contextmanager
+    def etapa(self, nome: str, linhas_entrada: Optional[int] = None,
+              cache: bool = False) -> Iterator[Dict[str, Any]]:
+        """
+        Mede o bloco como uma etapa. O registro devolvido pode receber
+        "linhas_saida" dentro do bloco.
+
+        Args:
+            nome: nome da etapa
+            linhas_entrada: linhas recebidas pela etapa
+            cache: a etapa é atendida por cache; conta como acerto a menos que
+                ``registrar_falta`` seja chamada dentro dela
+        """
+        pai = _ETAPA.get()
+        registro: Dict[str, Any] = {
+            "etapa": nome,
+            "etapa_pai": pai["etapa"] if pai else None,
+            "linhas_entrada": linhas_entrada,
+            "linhas_saida": None,
+            "cache": "acerto" if cache else None,
+        }
+        token = _ETAPA.set(registro)
+        medidor = MedidorMemoria(Config.INTERVALO_AMOSTRA_MEMORIA_SEG)
+        inicio = time.perf_counter()
+        try:
+            with medidor:
+                yield registro
+        except Exception as e:
+            registro["erro"] = type(e).__name__
+            raise
+        finally:
+            registro["segundos"] = round(time.perf_counter() - inicio, 4)
+            registro["pico_memoria_mb"] = medidor.pico_mb()
+            registro["memoria_adicional_mb"] = medidor.adicional_mb()
+            _ETAPA.reset(token)
+            self.etapas.append(registro)
+
+    def linhas_log(self) -> List[Dict[str, Any]]:
+        """Registros das etapas acrescidos dos dados da execução, como gravados no log."""
+        momento = datetime.datetime.now().isoformat(timespec='seconds')
+        return [{"momento": momento, "execucao": self.id, "origem": self.origem, **self.contexto, **registro}
+                for registro in self.etapas]
+
+    def gravar(self, arquivo: Path = Config.METRICAS_ARQUIVO) -> None:
+        """Acrescenta as etapas ao log em uma única escrita (processos distintos gravam no mesmo arquivo)."""
+        if not self.etapas:
+            return
+        conteudo = ''.join(json.dumps(linha, ensure_ascii=False, default=str) + '\n'
+                           for linha in self.linhas_log())
+        try:
+            arquivo.parent.mkdir(parents=True, exist_ok=True)
+            with open(arquivo, 'a', encoding='utf-8') as saida:
+                saida.write(conteudo)
+        except OSError as e:
+            print(f"Erro ao gravar métricas: {e}")
+
+
+@contextmanager
+def execucao(origem: str, ativa: bool = False, **contexto: Any) -> Iterator[Optional[Execucao]]:
+    """
+    Abre uma execução medida e grava suas etapas no log ao final, mesmo
+    quando o bloco é interrompido (ex.: st.stop). Devolve None quando a
+    instrumentação está desligada.
+
+    Args:
+        origem: quem executa ("interface" ou "atualizacao")
+        ativa: liga a medição mesmo com Config.METRICAS_ATIVAS desligada
+        **contexto: campos repetidos em cada linha do log (sessão, versão...)
+    """
+    if not (ativa or Config.METRICAS_ATIVAS):
+        yield None
+        return
+    atual = Execucao(origem, **contexto)
+    token = _EXECUCAO.set(atual)
+    try:
+        yield atual
+    finally:
+        _EXECUCAO.reset(token)
+        atual.gravar()
+
+
+def etapa(nome: str, linhas_entrada: Optional[int] = None,
+          cache: bool = False) -> ContextManager[Dict[str, Any]]:
+    """Mede o bloco como uma etapa da execução em andamento (ver ``Execucao.etapa``); sem execução, não mede."""
+    atual = _EXECUCAO.get()
+    if atual is None:
+        return nullcontext({})
+    return atual.etapa(nome, linhas_entrada, cache)
+
+
+def registrar_falta() -> None:
+    """Marca a etapa em andamento como não atendida pelo cache (chamada dentro da função memorizada)."""
+    registro = _ETAPA.get()
+    if registro is not None:
+        registro["cache"] = "falta"
+
+
+def anotar(**contexto: Any) -> None:
+    """Acrescenta campos ao contexto da execução em andamento (ex.: versão conhecida no meio da execução)."""
+    atual = _EXECUCAO.get()
+    if atual is not None:
+        atual.contexto.update(contexto)
+
+
+def resumir(arquivo: Path = Config.METRICAS_ARQUIVO) -> pd.DataFrame:
+    """
+    Agrega o log de métricas por origem e etapa.
+
+    Returns:
+        DataFrame com execuções, tempo mediano, p90 e máximo, linhas de saída
+        medianas, pico de memória máximo e taxa de acerto do cache (vazio se
+        não houver log)
+    """
+    if not arquivo.exists():
+        return pd.DataFrame()
+    try:
+        log = pd.read_json(arquivo, lines=True)
+    except ValueError as e:
+        print(f"Erro ao ler métricas: {e}")
+        return pd.DataFrame()
+    if log.empty:
+        return log
+
+    log["acerto"] = (log["cache"] == "acerto").astype(float).where(log["cache"].notna())
+    grupos = log.groupby(["origem", "etapa"], sort=False)
+    return pd.DataFrame({
+        "execucoes": grupos.size(),
+        "segundos_mediana": grupos["segundos"].median(),
+        "segundos_p90": grupos["segundos"].quantile(0.9),
+        "segundos_max": grupos["segundos"].max(),
+        "linhas_saida_mediana": grupos["linhas_saida"].median(),
+        "pico_memoria_mb_max": grupos["pico_memoria_mb"].max(),
+        "acerto_cache_perc": grupos["acerto"].mean() * 100,
+    }).reset_index()
@@ -0,0 +1,335 @@
+import numpy as np
+import pandas as pd
+from typing import Any, Dict, List, Optional, Tuple
+
+from config import Config, RegionParams
+
+
+# Colunas de baixa cardinalidade mantidas como categóricas (dicionário no parquet)
+COLUNAS_CATEGORICAS: List[str] = [
+    'zona', 'motoqueiro', 'Cliente', 'vendedor', 'situacao',
+    'situacao_finalizado', 'devolucao', 'rota_nome',
+]
+
+# Texto em buffers Arrow com semântica de nulos do numpy (comparações devolvem bool, não pd.NA)
+TIPO_TEXTO = pd.StringDtype('pyarrow_numpy')
+
+# Durações derivadas: nome da coluna -> (marco final, marco inicial)
+DURACOES: Dict[str, Tuple[str, str]] = {
+    'Tempo de Ciclo': ('Chegou no Local', 'data_hora_pedido'),
+    'Tempo de Rota': ('Chegou no Local', 'Rota Atribuida'),
+    'Tempo no Local': ('Concluida', 'Chegou no Local'),
+    'Tempo de Faturamento': ('data_hora_nf', 'data_hora_pedido'),
+}
+
+# Esquema de ingestão: tipo de cada coluna da origem ("data_hora" ou "numero")
+TIPOS_ENTREGAS: Dict[str, str] = {
+    'data_hora_pedido': 'data_hora',
+    'data_hora_nf': 'data_hora',
+    'data_hora_nf_autorizacao': 'data_hora',
+    'Rota Criada': 'data_hora',
+    'Rota Atribuida': 'data_hora',
+    'Rota Aceita': 'data_hora',
+    'Rota Iniciada': 'data_hora',
+    'Chegou no Local': 'data_hora',
+    'Concluida': 'data_hora',
+    'Rota Cancelada': 'data_hora',
+    'valor_nf': 'numero',
+    'valor_frete': 'numero',
+}
+
+# Colunas sem as quais a entrega não entra em nenhum período (a linha vai para a quarentena)
+COLUNAS_OBRIGATORIAS: List[str] = ['data_hora_nf']
+
+# Situação das entregas que não a informam
+SITUACAO_PADRAO = "Realizada"
+
+# Marcos estimados quando a origem não os traz: coluna -> (marco de referência, deslocamento)
+MARCOS_ESTIMADOS: Dict[str, Tuple[str, pd.Timedelta]] = {
+    'Chegou no Local': ('data_hora_nf', pd.Timedelta(minutes=90)),
+    'Concluida': ('data_hora_nf', pd.Timedelta(hours=2)),
+    'Rota Atribuida': ('data_hora_pedido', pd.Timedelta(minutes=30)),
+}
+
+
+def _converter(serie: pd.Series, tipo: str) -> pd.Series:
+    """Converte uma coluna para o tipo declarado no esquema (valores que não convertem viram nulos)."""
+    if tipo == 'data_hora':
+        return pd.to_datetime(serie, errors='coerce')
+    return pd.to_numeric(serie, errors='coerce')
+
+
+def _informado(serie: pd.Series) -> pd.Series:
+    """Valores informados na origem: não nulos e, em texto, não vazios."""
+    informado = serie.notna()
+    if serie.dtype == object:
+        informado &= serie.astype(str).str.strip() != ''
+    return informado
+
+
+def entregas_consideradas(df: pd.DataFrame) -> pd.Series:
+    """Máscara das entregas consideradas nos indicadores: realizadas com sucesso ou indefinidas não canceladas."""
+    return (((df['situacao'] == "Realizada") & (df['situacao_finalizado'] == "Sucesso")) |
+            ((df['situacao_finalizado'] == "Indefinida") & (df['situacao'] != "Cancelada")))
+
+
+def processar_entregas(df: pd.DataFrame) -> Tuple[pd.DataFrame, pd.DataFrame]:
+    """
+    Aplica o esquema de ingestão às entregas brutas da origem. É executada
+    uma única vez, antes de gravar o cache parquet: o cache guarda as
+    entregas já processadas e todos os leitores as usam sem conversões.
+
+    Etapas: tipos declarados em TIPOS_ENTREGAS, Data e competência, situações
+    padrão, marcos estimados (MARCOS_ESTIMADOS), durações (DURACOES), filtro
+    das entregas consideradas nos indicadores e representação compacta
+    (``aplicar_esquema``). Linhas com valores que não convertem para o tipo
+    declarado, ou sem as COLUNAS_OBRIGATORIAS, vão para a quarentena.
+
+    Args:
+        df: DataFrame bruto lido da origem (alterado no próprio objeto)
+
+    Returns:
+        Tupla (entregas processadas, quarentena); a quarentena mantém os
+        valores originais das linhas rejeitadas e o motivo na coluna "motivo"
+    """
+    # Tipos: cada coluna é convertida uma única vez; o primeiro valor inválido define o motivo
+    motivo = pd.Series(None, index=df.index, dtype=object)
+    convertidas: Dict[str, pd.Series] = {}
+    for coluna, tipo in TIPOS_ENTREGAS.items():
+        if coluna in df.columns:
+            convertidas[coluna] = _converter(df[coluna], tipo)
+            invalidas = _informado(df[coluna]) & convertidas[coluna].isna()
+            motivo = motivo.mask(invalidas & motivo.isna(), f"{coluna} inválido")
+    for coluna in COLUNAS_OBRIGATORIAS:
+        ausentes = convertidas[coluna].isna() if coluna in convertidas else pd.Series(True, index=df.index)
+        motivo = motivo.mask(ausentes & motivo.isna(), f"{coluna} ausente")
+
+    rejeitadas = motivo.notna().to_numpy()
+    quarentena = df[rejeitadas].assign(motivo=motivo[rejeitadas])
+    for coluna, convertida in convertidas.items():
+        df[coluna] = convertida
+    if rejeitadas.any():
+        df = df[~rejeitadas].copy()
+
+    # Data (dia da nota fiscal) e competência (AAAAMM)
+    if 'data_hora_nf' in df.columns:
+        df['Data'] = df['data_hora_nf'].dt.normalize()
+        df['competencia'] = codigo_competencia(df['data_hora_nf'])
+
+    # Situações ausentes recebem o padrão; sem situação final, "Falha" para devoluções e "Indefinida" para as demais
+    situacao = df['situacao'] if 'situacao' in df.columns else pd.Series(None, index=df.index, dtype=object)
+    df['situacao'] = situacao.fillna(SITUACAO_PADRAO)
+    padrao_finalizado = pd.Series(
+        np.where(df['devolucao'] == "SIM", "Falha", "Indefinida") if 'devolucao' in df.columns else "Indefinida",
+        index=df.index)
+    if 'situacao_finalizado' in df.columns:
+        df['situacao_finalizado'] = df['situacao_finalizado'].fillna(padrao_finalizado)
+    else:
+        df['situacao_finalizado'] = padrao_finalizado
+
+    # Marcos de temporização que a origem não traz são estimados a partir de outro marco
+    for coluna, (referencia, deslocamento) in MARCOS_ESTIMADOS.items():
+        if coluna not in df.columns and referencia in df.columns:
+            df[coluna] = df[referencia] + deslocamento
+
+    # Durações (ciclo, rota, permanência no local e faturamento) e entregas consideradas
+    df = aplicar_esquema(calcular_tempos(df))
+    return df[entregas_consideradas(df).to_numpy()], quarentena
+
+
+def codigo_competencia(datas: pd.Series) -> pd.Series:
+    """Converte datas no código inteiro da competência (AAAAMM, Int32; nulo quando ausente)."""
+    datas = pd.to_datetime(datas, errors='coerce')
+    return (datas.dt.year * 100 + datas.dt.month).astype('Int32')
+
+
+def aplicar_esquema(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Aplica a representação compacta em memória: dimensões como categóricas,
+    Data como datetime64 normalizado e competencia como código inteiro.
+    Colunas que já estão no tipo certo não são convertidas de novo.
+
+    Args:
+        df: DataFrame de entregas (alterado no próprio objeto)
+
+    Returns:
+        O mesmo DataFrame com os tipos compactos
+    """
+    for coluna in COLUNAS_CATEGORICAS:
+        if coluna in df.columns and not isinstance(df[coluna].dtype, pd.CategoricalDtype):
+            df[coluna] = df[coluna].astype('category')
+
+    if 'Data' in df.columns and not pd.api.types.is_datetime64_dtype(df['Data']):
+        df['Data'] = pd.to_datetime(df['Data'], errors='coerce')
+
+    if 'competencia' in df.columns and df['competencia'].dtype != 'Int32':
+        if pd.api.types.is_numeric_dtype(df['competencia']):
+            df['competencia'] = df['competencia'].astype('Int32')
+        else:
+            df['competencia'] = codigo_competencia(pd.to_datetime(df['competencia'], format='%Y-%m', errors='coerce'))
+
+    return df
+
+
+def compactar_textos(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Converte as colunas de texto livre (object contendo apenas strings) para
+    TIPO_TEXTO. Os valores passam a ficar em buffers Arrow imutáveis, em vez
+    de um objeto Python por célula, o que reduz a memória das entregas
+    mantidas pelo processo.
+
+    Args:
+        df: DataFrame de entregas (alterado no próprio objeto)
+
+    Returns:
+        O mesmo DataFrame com as colunas de texto em Arrow
+    """
+    for coluna in df.columns:
+        if df[coluna].dtype == object and pd.api.types.infer_dtype(df[coluna], skipna=True) == 'string':
+            df[coluna] = df[coluna].astype(TIPO_TEXTO)
+    return df
+
+
+def aplicar_filtros(df: pd.DataFrame, filtros: Dict[str, Any]) -> pd.DataFrame:
+    """
+    Aplica os filtros da barra lateral (período e seleções de
+    Config.FILTROS_DIMENSOES) às entregas com uma única máscara e uma única cópia.
+    """
+    if df.empty:
+        return df
+
+    mascara = np.ones(len(df), dtype=bool)
+    if 'Data' in df.columns:
+        mascara &= ((df['Data'] >= pd.Timestamp(filtros['data_inicial']))
+                    & (df['Data'] <= pd.Timestamp(filtros['data_final']))).to_numpy()
+    for filtro, coluna in Config.FILTROS_DIMENSOES.items():
+        if filtros.get(filtro) and coluna in df.columns:
+            mascara &= df[coluna].isin(filtros[filtro]).to_numpy()
+    return df[mascara]
+
+
+def calcular_tempos(df: pd.DataFrame, duracoes: Optional[Dict[str, Tuple[str, str]]] = None) -> pd.DataFrame:
+    """
+    Calcula as durações derivadas das entregas com aritmética de datas
+    sobre colunas inteiras, sem percorrer linha a linha.
+
+    Cada duração é ``fim - inicio`` quando os dois marcos existem e o fim
+    não é anterior ao início; nos demais casos o resultado é NaT.
+    Durações cujas colunas de origem não existem no DataFrame são ignoradas.
+
+    Args:
+        df: DataFrame de entregas (alterado no próprio objeto)
+        duracoes: mapeamento coluna -> (marco final, marco inicial); usa DURACOES por padrão
+
+    Returns:
+        O mesmo DataFrame com as colunas de duração preenchidas
+    """
+    for nome, (fim, inicio) in (duracoes or DURACOES).items():
+        if fim not in df.columns or inicio not in df.columns:
+            continue
+
+        marco_fim = pd.to_datetime(df[fim], errors='coerce')
+        marco_inicio = pd.to_datetime(df[inicio], errors='coerce')
+
+        # Comparações com NaT resultam em False, então a máscara também cobre valores ausentes
+        df[nome] = (marco_fim - marco_inicio).where(marco_fim >= marco_inicio)
+
+    return df
+
+
+def tabela_parametros_regiao(parametros: Optional[Dict[str, RegionParams]] = None) -> pd.DataFrame:
+    """
+    Converte os parâmetros por região em uma tabela indexada pela zona,
+    pronta para ser mapeada sobre a coluna ``zona`` de uma só vez.
+
+    Args:
+        parametros: parâmetros por região; usa Config.PARAMETROS_REGIAO por padrão
+
+    Returns:
+        DataFrame indexado por zona com duracao_seg (float), horario_corte e tempo_ideal (Timedelta)
+    """
+    parametros = Config.PARAMETROS_REGIAO if parametros is None else parametros
+    tabela = pd.DataFrame(
+        {
+            'duracao_seg': [p.duracao_seg for p in parametros.values()],
+            'horario_corte': [p.horario_corte for p in parametros.values()],
+            'tempo_ideal': [p.tempo_ideal for p in parametros.values()],
+        },
+        index=pd.Index(list(parametros.keys()), name='zona'),
+        dtype=object,
+    )
+    tabela['duracao_seg'] = tabela['duracao_seg'].astype('float64')
+    tabela['horario_corte'] = pd.to_timedelta(tabela['horario_corte'])
+    tabela['tempo_ideal'] = pd.to_timedelta(tabela['tempo_ideal'])
+    return tabela
+
+
+def avaliar_sla(df: pd.DataFrame, parametros: Optional[Dict[str, RegionParams]] = None) -> pd.DataFrame:
+    """
+    Avalia o SLA de cada entrega com operações booleanas sobre colunas inteiras.
+
+    Os parâmetros da zona são obtidos por uma única busca da coluna ``zona`` na
+    tabela de parâmetros;
+    zonas sem cadastro usam Config.DURACAO_PADRAO_SEG como duração máxima e não
+    possuem horário de corte.
+
+    Args:
+        df: DataFrame de entregas com Data, Concluida, Tempo de Ciclo, zona e data_hora_nf
+        parametros: parâmetros por região; usa Config.PARAMETROS_REGIAO por padrão
+
+    Returns:
+        DataFrame com o mesmo índice de ``df`` e as colunas booleanas:
+        virada (concluída após o dia da NF), no_dia (concluída no dia da NF),
+        acima_tempo (tempo de ciclo acima do limite da zona) e
+        apos_corte (NF emitida depois do horário de corte da zona)
+    """
+    tabela = tabela_parametros_regiao(parametros)
+    falso = np.zeros(len(df), dtype=bool)
+    resultado = pd.DataFrame(
+        {'virada': falso, 'no_dia': falso, 'acima_tempo': falso, 'apos_corte': falso},
+        index=df.index,
+    )
+
+    # Posição de cada entrega na tabela de parâmetros (-1 quando a zona não tem cadastro)
+    if 'zona' in df.columns:
+        posicao = _posicao_zona(df['zona'], tabela.index)
+    else:
+        posicao = np.full(len(df), -1)
+
+    # Dia da NF e dia de conclusão como datetime64 normalizado (NaT quando ausente)
+    if 'Concluida' in df.columns and 'Data' in df.columns:
+        dia_nf = pd.to_datetime(df['Data'], errors='coerce')
+        dia_conclusao = pd.to_datetime(df['Concluida'], errors='coerce').dt.normalize()
+        resultado['virada'] = (dia_conclusao > dia_nf).to_numpy()
+        resultado['no_dia'] = (dia_conclusao == dia_nf).to_numpy()
+
+    if 'Tempo de Ciclo' in df.columns:
+        limite = _parametro_zona(tabela['duracao_seg'], posicao, Config.DURACAO_PADRAO_SEG)
+        ciclo_seg = pd.to_timedelta(df['Tempo de Ciclo'], errors='coerce').to_numpy() / np.timedelta64(1, 's')
+        # NaN (tempo de ciclo ausente) nunca é maior que o limite
+        resultado['acima_tempo'] = ciclo_seg > limite
+
+    if 'data_hora_nf' in df.columns:
+        corte = _parametro_zona(tabela['horario_corte'], posicao, np.timedelta64('NaT'))
+        nf = pd.to_datetime(df['data_hora_nf'], errors='coerce')
+        resultado['apos_corte'] = (nf - nf.dt.normalize()).to_numpy() > corte
+
+    return resultado
+
+
+def _posicao_zona(zonas: pd.Series, indice: pd.Index) -> np.ndarray:
+    """Localiza cada zona no índice de parâmetros; com categóricas, busca só as categorias."""
+    if isinstance(zonas.dtype, pd.CategoricalDtype):
+        codigos = zonas.cat.codes.to_numpy()
+        if indice.empty or zonas.cat.categories.empty:
+            return np.full(len(zonas), -1)
+        posicao_categoria = indice.get_indexer(zonas.cat.categories)
+        return np.where(codigos >= 0, posicao_categoria.take(codigos.clip(0)), -1)
+    return indice.get_indexer(zonas)
+
+
+def _parametro_zona(coluna: pd.Series, posicao: np.ndarray, padrao: Any) -> np.ndarray:
+    """Parâmetro da zona de cada entrega pela posição na tabela; ``padrao`` sem cadastro."""
+    if coluna.empty:
+        return np.full(len(posicao), padrao)
+    return np.where(posicao >= 0, coluna.to_numpy().take(posicao.clip(0)), padrao)
@@ -0,0 +1,142 @@
+"""
+Esboços de quantis dos tempos de ciclo e de rota.
+
+Cada esboço conta as entregas de uma Data × zona em baldes logarítmicos de
+duração (como no DDSketch): o balde k guarda as durações em segundos no
+intervalo (γ^(k-1), γ^k], com γ = (1 + α) / (1 - α) e α =
+Config.ERRO_RELATIVO_QUANTIS. Os esboços de qualquer período e conjunto de
+zonas se combinam somando as contagens de cada balde, e o quantil estimado
+a partir da soma tem erro relativo de no máximo α em relação ao quantil
+exato das entregas (durações de até 1 s, inclusive as negativas de marcos
+invertidos, caem no primeiro balde).
+
+Os esboços são gravados junto ao cubo diário (ver ``cubo.materializar_cubo``)
+e ocupam no máximo algumas centenas de baldes por Data × zona e medida.
+"""
+import numpy as np
+import pandas as pd
+from typing import Any, Dict, List, Optional
+
+from config import Config
+
+
+# Medida -> coluna de duração das entregas
+MEDIDAS_QUANTIS: Dict[str, str] = {'ciclo': 'Tempo de Ciclo', 'rota': 'Tempo de Rota'}
+
+# Dimensões das partições dos esboços
+DIMENSOES_ESBOCOS: List[str] = ['Data', 'zona']
+
+TIPO_MEDIDA = pd.CategoricalDtype(list(MEDIDAS_QUANTIS))
+
+_GAMA = (1 + Config.ERRO_RELATIVO_QUANTIS) / (1 - Config.ERRO_RELATIVO_QUANTIS)
+
+
+def _baldes(segundos: np.ndarray) -> np.ndarray:
+    """Balde logarítmico de cada duração em segundos."""
+    return np.ceil(np.log(np.maximum(segundos, 1.0)) / np.log(_GAMA)).astype('int32')
+
+
+def _segundos(baldes: np.ndarray) -> np.ndarray:
+    """Duração representativa (em segundos) de cada balde, com erro relativo de até α."""
+    return 2 * np.power(_GAMA, baldes) / (_GAMA + 1)
+
+
+def construir_esbocos(df: pd.DataFrame, dimensoes: List[str] = DIMENSOES_ESBOCOS) -> pd.DataFrame:
+    """
+    Conta as entregas processadas por partição, medida e balde de duração.
+
+    Args:
+        df: entregas processadas (ver ``processamento.processar_entregas``)
+        dimensoes: dimensões das partições; DIMENSOES_ESBOCOS por padrão
+
+    Returns:
+        DataFrame com as dimensões e as colunas medida, balde e quantidade
+        (apenas os baldes não vazios)
+    """
+    colunas = dimensoes + ['medida', 'balde', 'quantidade']
+    partes = []
+    for medida, coluna in MEDIDAS_QUANTIS.items():
+        if coluna not in df.columns or any(dimensao not in df.columns for dimensao in dimensoes):
+            continue
+        segundos = pd.to_timedelta(df[coluna], errors='coerce').dt.total_seconds()
+        presente = segundos.notna().to_numpy()
+        if not presente.any():
+            continue
+        baldes = df.loc[presente, dimensoes].assign(medida=medida, balde=_baldes(segundos.to_numpy()[presente]))
+        partes.append(baldes.groupby(dimensoes + ['medida', 'balde'], dropna=False, observed=True, sort=False)
+                      .size().rename('quantidade').reset_index())
+
+    if not partes:
+        return pd.DataFrame({coluna: pd.Series(dtype=TIPO_MEDIDA if coluna == 'medida' else 'int64')
+                             for coluna in colunas})
+    esbocos = pd.concat(partes, ignore_index=True)
+    esbocos['medida'] = esbocos['medida'].astype(TIPO_MEDIDA)
+    return esbocos[colunas]
+
+
+def mesclar_esbocos(esbocos: pd.DataFrame) -> pd.Series:
+    """Soma os esboços de todas as partições: contagem por (medida, balde), em ordem de balde."""
+    return esbocos.groupby(['medida', 'balde'], observed=True, sort=True)['quantidade'].sum()
+
+
+def quantis_esboco(contagens: pd.Series, percentis: List[int]) -> Dict[str, Any]:
+    """
+    Quantis de uma medida a partir das contagens mescladas por balde.
+
+    Returns:
+        Percentil ("p50", ...) -> duração estimada (NaT sem medições)
+    """
+    acumulado = contagens.to_numpy().cumsum()
+    if not len(acumulado) or acumulado[-1] == 0:
+        return {f"p{percentil}": pd.NaT for percentil in percentis}
+    baldes = contagens.index.to_numpy()
+    # Posição (a partir de 0) da entrega do percentil e o balde que a contém
+    posicoes = np.array(percentis) / 100 * (acumulado[-1] - 1)
+    escolhidos = baldes[np.searchsorted(acumulado, posicoes, side='right')]
+    return {f"p{percentil}": pd.Timedelta(seconds=round(float(segundos)))
+            for percentil, segundos in zip(percentis, _segundos(escolhidos))}
+
+
+def histograma_esboco(contagens: pd.Series, largura_min: int, limite: Optional[pd.Timedelta] = None) -> pd.Series:
+    """
+    Entregas por faixa de ``largura_min`` minutos; as durações acima de
+    ``limite`` são contadas na faixa do limite.
+
+    Returns:
+        Série indexada pelo início da faixa, em minutos
+    """
+    minutos = _segundos(contagens.index.to_numpy()) / 60
+    if limite is not None and not pd.isnull(limite):
+        minutos = np.minimum(minutos, limite.total_seconds() / 60)
+    faixas = (minutos // largura_min * largura_min).astype(int)
+    return pd.Series(contagens.to_numpy(), index=faixas).groupby(level=0).sum().rename_axis('minutos')
+
+
+def calcular_distribuicao(esbocos: pd.DataFrame, percentis: Optional[List[int]] = None,
+                          largura_min: int = Config.LARGURA_HISTOGRAMA_MIN) -> Dict[str, Any]:
+    """
+    Calcula os percentis e os histogramas dos tempos a partir dos esboços
+    das partições selecionadas.
+
+    Args:
+        esbocos: esboços das partições (ver ``construir_esbocos``)
+        percentis: percentis calculados; usa Config.PERCENTIS_TEMPOS por padrão
+        largura_min: largura das faixas dos histogramas, em minutos
+
+    Returns:
+        Dicionário com "quantis" (medida -> percentil -> duração) e
+        "histogramas" (medida -> entregas por faixa, limitadas ao maior
+        percentil); ou {"erro": ...}
+    """
+    percentis = percentis or Config.PERCENTIS_TEMPOS
+    mesclados = mesclar_esbocos(esbocos)
+    if mesclados.empty:
+        return {"erro": "Sem tempos de ciclo ou de rota no período"}
+
+    quantis, histogramas = {}, {}
+    for medida in MEDIDAS_QUANTIS:
+        contagens = mesclados.xs(medida, level='medida') if medida in mesclados.index.get_level_values(0) \
+            else pd.Series(dtype='int64')
+        quantis[medida] = quantis_esboco(contagens, percentis)
+        histogramas[medida] = histograma_esboco(contagens, largura_min, quantis[medida][f"p{max(percentis)}"])
+    return {"quantis": quantis, "histogramas": histogramas}
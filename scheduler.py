@@ -1,48 +1,214 @@
-import schedule
-import time
+"""
+Worker de atualização dos dados, executado fora do processo do Streamlit:
+
+    python scheduler.py
+
+O worker é o único escritor do cache: detém uma trava de escritor único,
+executa a atualização diária (Config.HORARIO_ATUALIZACAO_DIARIA) e os jobs
+solicitados pela interface através da fila em Config.FILA_DIR. Os pedidos
+pendentes são agrupados e atendidos por uma única atualização.
+"""
+import datetime
+import os
 import threading
+import time
+import uuid
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+from config import Config
+from fila_atualizacao import (
+    CONCLUIDO, ERRO, EXECUTANDO, PENDENTE, Relogio, TravaEscritor, caminho_trava, enfileirar,
+    gravar_job, gravar_status_worker, limpar_jobs, listar_jobs, status_worker,
+)
 from update_data import atualizar_dados
-from datetime import datetime, timedelta
-
-# Variáveis globais
-proxima_execucao = None
-ultima_atualizacao = None
-
-def job():
-    global proxima_execucao, ultima_atualizacao
-    print("🔄 Atualizando dados em segundo plano...")
-    
-    # Executa a atualização dos dados
-    atualizar_dados()
-    
-    # Atualiza os horários de controle
-    ultima_atualizacao = datetime.now().replace(second=0, microsecond=0)
-    proxima_execucao = ultima_atualizacao + timedelta(days=1)
-    
-    print(f"✅ Atualização concluída! Próxima execução agendada para: {proxima_execucao.strftime('%d/%m/%Y %H:%M')}")
-
-# Definindo o agendamento diário
-schedule.clear()  # Limpa agendamentos anteriores
-schedule.every().day.at("08:30").do(job)
-
-# Inicializa o horário de controle
-proxima_execucao = datetime.now().replace(hour=8, minute=30, second=0, microsecond=0)
-if proxima_execucao < datetime.now():
-    proxima_execucao += timedelta(days=1)
-
-# Função para rodar em segundo plano
-def run_scheduler():
-    while True:
-        schedule.run_pending()
-        time.sleep(60)
-
-# Inicia a thread do agendador
-t = threading.Thread(target=run_scheduler, daemon=True)
-t.start()
-
-# Funções de interface
-def get_proxima_atualizacao():
-    return proxima_execucao
-
-def get_ultima_atualizacao():
-    return ultima_atualizacao
\ No newline at end of file
+
+
+def proxima_execucao(referencia: datetime.datetime, horario: datetime.time) -> datetime.datetime:
+    """Retorna o primeiro horário diário agendado estritamente após a referência."""
+    candidata = datetime.datetime.combine(referencia.date(), horario)
+    if candidata <= referencia:
+        candidata += datetime.timedelta(days=1)
+    return candidata
+
+
+class WorkerAtualizacao:
+    """
+    Processa a fila de atualização e o agendamento diário.
+
+    Cada chamada de ``passo`` renova a trava, enfileira a atualização diária
+    se ela venceu e executa, em um único lote, todos os jobs pendentes. O
+    relógio e a função de atualização são injetáveis para testes.
+    """
+
+    def __init__(self, diretorio: Path = Config.FILA_DIR, relogio: Relogio = datetime.datetime.now,
+                 executar: Callable[..., bool] = atualizar_dados,
+                 horario: datetime.time = Config.HORARIO_ATUALIZACAO_DIARIA,
+                 intervalo_heartbeat: float = Config.INTERVALO_WORKER_SEG):
+        """
+        Args:
+            diretorio: diretório da fila, da trava e do estado do worker
+            relogio: fonte do horário atual
+            executar: função de atualização, chamada com ``forcar``, ``progresso`` e
+                ``continuar`` (consultada antes de publicar; False aborta a publicação)
+            horario: horário da atualização diária
+            intervalo_heartbeat: intervalo de renovação da trava durante um job
+        """
+        self.diretorio = diretorio
+        self.relogio = relogio
+        self.executar = executar
+        self.horario = horario
+        self.intervalo_heartbeat = intervalo_heartbeat
+        self.trava = TravaEscritor(caminho_trava(diretorio), f"{os.getpid()}-{uuid.uuid4().hex[:8]}",
+                                   relogio=relogio)
+        self.estado: Dict[str, Any] = status_worker(diretorio) or {}
+        self.ativo = False
+
+        # Sem registro anterior, a primeira execução diária é a próxima a partir de agora;
+        # com registro, uma execução perdida enquanto o worker estava parado é recuperada
+        referencia = self.estado.get("ultima_execucao_diaria")
+        base = datetime.datetime.fromisoformat(referencia) if referencia else relogio()
+        self.proxima = proxima_execucao(base, horario)
+
+    def _publicar_estado(self) -> None:
+        """Publica o estado do worker para a interface."""
+        self.estado.update({
+            "dono": self.trava.dono,
+            "heartbeat": self.relogio().isoformat(),
+            "proxima_execucao": self.proxima.isoformat(),
+        })
+        gravar_status_worker(self.estado, self.diretorio)
+
+    def assumir(self) -> bool:
+        """Renova ou adquire a trava; ao adquiri-la, devolve à fila jobs interrompidos."""
+        if self.ativo and self.trava.renovar():
+            return True
+        self.ativo = self.trava.adquirir()
+        if self.ativo:
+            for job in listar_jobs(self.diretorio, [EXECUTANDO]):
+                job.update(estado=PENDENTE, mensagem="Reenfileirado após interrupção do worker")
+                gravar_job(job, self.diretorio)
+        return self.ativo
+
+    def _informar_progresso(self, jobs: List[Dict[str, Any]], lidas: int, total: Optional[int]) -> None:
+        """Publica nos jobs em execução quantas linhas da origem já foram lidas."""
+        mensagem = f"Lendo a origem: {lidas:,} linhas".replace(",", ".")
+        if total:
+            mensagem += f" de {total:,} ({min(lidas / total, 1):.0%})".replace(",", ".")
+        for job in jobs:
+            job.update(mensagem=mensagem, linhas_lidas=lidas, linhas_total=total)
+            gravar_job(job, self.diretorio)
+
+    def _executar_com_heartbeat(self, forcar: bool, jobs: List[Dict[str, Any]]) -> bool:
+        """
+        Executa a atualização renovando a trava em paralelo. Se a trava for
+        perdida (renovação recusada), ``ativo`` passa a False: a leitura da
+        origem é interrompida no próximo lote e a nova versão não é publicada.
+        """
+        fim = threading.Event()
+
+        def manter_trava() -> None:
+            while not fim.wait(self.intervalo_heartbeat):
+                if not self.trava.renovar():
+                    self.ativo = False
+                    return
+
+        def continuar() -> bool:
+            # Renova a trava imediatamente antes de publicar: nenhum outro worker
+            # pode tomá-la durante a validade do sinal de vida recém-gravado
+            if self.ativo and not self.trava.renovar():
+                self.ativo = False
+            return self.ativo
+
+        def progresso(lidas: int, total: Optional[int]) -> None:
+            if not self.ativo:
+                raise RuntimeError("A trava de escritor foi perdida durante a atualização.")
+            self._informar_progresso(jobs, lidas, total)
+
+        thread = threading.Thread(target=manter_trava, daemon=True)
+        thread.start()
+        try:
+            return bool(self.executar(forcar=forcar, progresso=progresso, continuar=continuar))
+        finally:
+            fim.set()
+            thread.join()
+
+    def passo(self) -> int:
+        """
+        Executa uma iteração do worker.
+
+        Returns:
+            Número de jobs atendidos nesta iteração
+        """
+        if not self.assumir():
+            return 0
+
+        agora = self.relogio()
+        if agora >= self.proxima:
+            enfileirar("diario", diretorio=self.diretorio, relogio=self.relogio)
+            self.estado["ultima_execucao_diaria"] = agora.isoformat()
+            self.proxima = proxima_execucao(agora, self.horario)
+
+        pendentes = listar_jobs(self.diretorio, [PENDENTE])
+        if not pendentes:
+            self._publicar_estado()
+            return 0
+
+        # Todos os pedidos pendentes são atendidos por uma única atualização
+        lote = pendentes[0]["id"]
+        forcar = any(job.get("forcar") for job in pendentes)
+        for job in pendentes:
+            job.update(estado=EXECUTANDO, lote=lote, iniciado_em=self.relogio().isoformat(),
+                       mensagem="Atualizando os dados")
+            gravar_job(job, self.diretorio)
+        self._publicar_estado()
+
+        print(f"🔄 Atualizando dados ({len(pendentes)} pedido(s), forcar={forcar})...")
+        erro: Optional[str] = None
+        try:
+            sucesso = self._executar_com_heartbeat(forcar, pendentes)
+            if not sucesso:
+                erro = "Não foi possível atualizar os dados."
+        except Exception as e:
+            erro = str(e)
+
+        # Sem a trava, os jobs pertencem ao worker que a tomou (e que os reenfileirou)
+        if not self.ativo:
+            print("Trava de escritor perdida: atualização abortada sem publicar.")
+            return 0
+
+        concluido_em = self.relogio().isoformat()
+        for job in pendentes:
+            job.update(estado=ERRO if erro else CONCLUIDO, concluido_em=concluido_em, erro=erro,
+                       mensagem=erro or "Atualização concluída")
+            gravar_job(job, self.diretorio)
+
+        self.estado["ultima_execucao"] = concluido_em
+        self.estado["ultimo_resultado"] = ERRO if erro else CONCLUIDO
+        self._publicar_estado()
+        limpar_jobs(self.diretorio)
+        print(f"✅ Atualização concluída! Próxima execução agendada para: {self.proxima.strftime('%d/%m/%Y %H:%M')}"
+              if not erro else f"Erro na atualização: {erro}")
+        return len(pendentes)
+
+    def executar_continuamente(self, intervalo: float = Config.INTERVALO_WORKER_SEG,
+                               dormir: Callable[[float], None] = time.sleep,
+                               max_passos: Optional[int] = None) -> None:
+        """Executa ``passo`` em laço, aguardando ``intervalo`` segundos entre as iterações."""
+        passos = 0
+        try:
+            while max_passos is None or passos < max_passos:
+                self.passo()
+                passos += 1
+                dormir(intervalo)
+        finally:
+            self.trava.liberar()
+
+
+if __name__ == "__main__":
+    worker = WorkerAtualizacao()
+    if not worker.assumir():
+        print("Já existe um worker de atualização ativo.")
+    else:
+        print(f"Worker de atualização iniciado. Próxima execução diária: {worker.proxima.strftime('%d/%m/%Y %H:%M')}")
+        worker.executar_continuamente()
@@ -0,0 +1,156 @@
+import datetime
+import os
+import shutil
+from pathlib import Path
+from typing import Any, Callable, List, Optional, Tuple
+
+from cache_dados import ler_metadados
+from config import Config
+
+
+# Arquivo com o id da versão publicada, dentro da raiz do repositório de versões
+ARQUIVO_ATUAL = 'CURRENT'
+PREFIXO_VERSAO = 'v'
+FORMATO_VERSAO = '%Y%m%d%H%M%S%f'
+
+
+def diretorio_versoes(raiz: Path = Config.SNAPSHOTS_DIR) -> Path:
+    """Retorna o diretório que contém um subdiretório imutável por versão."""
+    return raiz / 'versoes'
+
+
+def caminho_dataset(versao: str, raiz: Path = Config.SNAPSHOTS_DIR) -> Path:
+    """
+    Retorna o caminho do dataset de cache dentro de uma versão. Metadados,
+    fragmentos, cubo e catálogo ficam ao lado dele, no mesmo diretório.
+    """
+    return diretorio_versoes(raiz) / versao / Config.NOME_DATASET
+
+
+def versao_atual(raiz: Path = Config.SNAPSHOTS_DIR) -> Optional[str]:
+    """Retorna o id da versão publicada (None se ainda não houver nenhuma)."""
+    try:
+        versao = (raiz / ARQUIVO_ATUAL).read_text(encoding='utf-8').strip()
+    except OSError:
+        return None
+    return versao if versao and (diretorio_versoes(raiz) / versao).is_dir() else None
+
+
+def versao_disponivel(versao: Optional[str], raiz: Path = Config.SNAPSHOTS_DIR) -> bool:
+    """Indica se a versão ainda existe (não foi removida pela coleta de lixo)."""
+    return bool(versao) and (diretorio_versoes(raiz) / versao).is_dir()
+
+
+def listar_versoes(raiz: Path = Config.SNAPSHOTS_DIR) -> List[str]:
+    """Lista as versões gravadas, da mais antiga para a mais recente."""
+    diretorio = diretorio_versoes(raiz)
+    if not diretorio.exists():
+        return []
+    return sorted(item.name for item in diretorio.iterdir()
+                  if item.is_dir() and item.name.startswith(PREFIXO_VERSAO))
+
+
+def _criada_em(versao: str) -> datetime.datetime:
+    """Horário de criação codificado no id da versão."""
+    return datetime.datetime.strptime(versao[len(PREFIXO_VERSAO):], FORMATO_VERSAO)
+
+
+def _vincular(origem: str, destino: str) -> None:
+    """
+    Reaproveita um arquivo da versão anterior por hard link (cópia quando o
+    sistema de arquivos não suporta). Os arquivos das versões nunca são
+    alterados no lugar - toda gravação cria um novo arquivo e o substitui
+    com os.replace -, então o vínculo não é afetado pelas gravações.
+    """
+    try:
+        os.link(origem, destino)
+    except OSError:
+        shutil.copy2(origem, destino)
+
+
+def publicar(versao: str, raiz: Path = Config.SNAPSHOTS_DIR) -> None:
+    """Aponta CURRENT para a versão informada de forma atômica."""
+    temporario = raiz / f"{ARQUIVO_ATUAL}.tmp"
+    temporario.write_text(versao, encoding='utf-8')
+    os.replace(temporario, raiz / ARQUIVO_ATUAL)
+
+
+def criar_snapshot(atualizar: Callable[[Path], Any], raiz: Path = Config.SNAPSHOTS_DIR,
+                   relogio: Callable[[], datetime.datetime] = datetime.datetime.now,
+                   continuar: Optional[Callable[[], bool]] = None) -> Tuple[Optional[str], Any]:
+    """
+    Aplica uma atualização sobre uma nova versão do dataset e a publica.
+
+    A nova versão começa como cópia (por hard links) da versão publicada e é
+    montada em um diretório temporário; só depois de concluída ela é movida
+    para o diretório de versões e CURRENT passa a apontar para ela. Leitores
+    da versão anterior não são afetados. Se a atualização não alterar os
+    metadados do dataset, a cópia é descartada e a versão atual é mantida.
+    Deve ser chamada apenas pelo escritor único (worker de atualização).
+
+    Args:
+        atualizar: função que recebe o caminho do dataset da nova versão e o atualiza
+        raiz: raiz do repositório de versões
+        relogio: fonte do horário atual (define o id da versão)
+        continuar: chamada imediatamente antes de publicar; se retornar False
+            (ex.: o escritor perdeu a trava), a nova versão é descartada e
+            RuntimeError é lançado
+
+    Returns:
+        Tupla (versão publicada, retorno de ``atualizar``)
+    """
+    atual = versao_atual(raiz)
+    versao = f"{PREFIXO_VERSAO}{relogio().strftime(FORMATO_VERSAO)}"
+    diretorio = diretorio_versoes(raiz)
+    temporario = diretorio / f".{versao}.tmp"
+    shutil.rmtree(temporario, ignore_errors=True)
+
+    if atual is not None:
+        shutil.copytree(diretorio / atual, temporario, copy_function=_vincular)
+    else:
+        temporario.mkdir(parents=True)
+
+    try:
+        resultado = atualizar(temporario / Config.NOME_DATASET)
+        alterada = (atual is None or ler_metadados(temporario / Config.NOME_DATASET)
+                    != ler_metadados(caminho_dataset(atual, raiz)))
+        if not alterada:
+            shutil.rmtree(temporario, ignore_errors=True)
+            return atual, resultado
+        if continuar is not None and not continuar():
+            raise RuntimeError("Publicação cancelada: o escritor não detém mais a trava.")
+        os.replace(temporario, diretorio / versao)
+    except BaseException:
+        shutil.rmtree(temporario, ignore_errors=True)
+        raise
+
+    publicar(versao, raiz)
+    coletar_lixo(raiz, relogio=relogio)
+    return versao, resultado
+
+
+def coletar_lixo(raiz: Path = Config.SNAPSHOTS_DIR, retencao: datetime.timedelta = Config.RETENCAO_SNAPSHOTS,
+                 relogio: Callable[[], datetime.datetime] = datetime.datetime.now) -> List[str]:
+    """
+    Remove as versões substituídas há mais tempo que a retenção.
+
+    Uma versão é considerada substituída no momento em que a seguinte foi
+    criada; a versão publicada nunca é removida. Diretórios temporários de
+    atualizações interrompidas também são apagados.
+
+    Returns:
+        Versões removidas
+    """
+    atual = versao_atual(raiz)
+    versoes = listar_versoes(raiz)
+    agora = relogio()
+    removidas = []
+    for versao, seguinte in zip(versoes, versoes[1:]):
+        if versao == atual or agora - _criada_em(seguinte) <= retencao:
+            continue
+        shutil.rmtree(diretorio_versoes(raiz) / versao, ignore_errors=True)
+        removidas.append(versao)
+
+    for temporario in diretorio_versoes(raiz).glob('.*.tmp'):
+        shutil.rmtree(temporario, ignore_errors=True)
+    return removidas
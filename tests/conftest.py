@@ -0,0 +1,5 @@
+"""Configuração dos testes: os módulos do painel ficam na raiz do repositório."""
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
@@ -0,0 +1,71 @@
+"""
+Atualização do cache a partir de uma origem SQL, usando ``FonteSQLite`` como
+substituto do PostgreSQL: carga completa, atualização sem mudanças e
+atualização incremental pelo watermark de data_hora_nf.
+"""
+import datetime
+
+import pandas as pd
+import pytest
+
+import gerador_dados
+from cache_dados import atualizar_incremental, ler_cache, ler_metadados, recarregar_completo
+from fontes import FonteSQLite
+
+
+@pytest.fixture
+def entregas():
+    """Entregas sintéticas divididas em antigas e novas pelo data_hora_nf."""
+    df = gerador_dados.gerar_entregas(3000, dias=30, semente=11)
+    corte = df['data_hora_nf'].quantile(0.8)
+    return df[df['data_hora_nf'] <= corte], df[df['data_hora_nf'] > corte], corte
+
+
+def _ordenar(df: pd.DataFrame) -> pd.DataFrame:
+    return df.sort_values(['servico_codigo', 'data_hora_nf']).reset_index(drop=True)
+
+
+def test_lotes_respeitam_watermark(tmp_path, entregas):
+    antigas, novas, corte = entregas
+    banco = tmp_path / 'entregas.sqlite'
+    gerador_dados.gravar_sqlite(iter([antigas.copy(), novas.copy()]), banco)
+    fonte = FonteSQLite(banco)
+
+    lotes = list(fonte.lotes(tamanho_lote=500))
+    assert all(lote.num_rows <= 500 for lote in lotes)
+    assert sum(lote.num_rows for lote in lotes) == len(antigas) + len(novas)
+    assert sum(lote.num_rows for lote in fonte.lotes(pd.Timestamp(corte))) == len(novas)
+    assert fonte.ler(pd.Timestamp('2100-01-01')).empty
+
+
+def test_carga_completa_e_incremental(tmp_path, entregas):
+    antigas, novas, corte = entregas
+    banco = tmp_path / 'entregas.sqlite'
+    cache = tmp_path / 'cache' / 'entregas'
+    gerador_dados.gravar_sqlite(iter([antigas.copy()]), banco)
+    fonte = FonteSQLite(banco)
+
+    # Sem cache: carga completa
+    linhas = atualizar_incremental(fonte, cache)
+    assert linhas > 0
+    assert len(ler_cache(cache)) == linhas
+    assert pd.Timestamp(ler_metadados(cache)['watermark']) <= corte
+
+    # Origem sem mudanças: nada é lido
+    assert atualizar_incremental(fonte, cache) == 0
+
+    # Linhas novas: apenas elas são ingeridas
+    impressao = fonte.impressao_digital()
+    gerador_dados.gravar_sqlite(iter([antigas.copy(), novas.copy()]), banco)
+    assert fonte.impressao_digital()['sha256'] != impressao['sha256']
+    novas_ingeridas = atualizar_incremental(fonte, cache, janela=datetime.timedelta(0))
+    assert 0 < novas_ingeridas <= len(novas)
+    assert pd.Timestamp(ler_metadados(cache)['watermark']) > corte
+
+    # O cache atualizado é igual ao de uma carga completa da origem
+    referencia = tmp_path / 'referencia' / 'entregas'
+    recarregar_completo(fonte, referencia)
+    esperado = _ordenar(ler_cache(referencia))
+    obtido = _ordenar(ler_cache(cache))
+    assert len(obtido) == linhas + novas_ingeridas
+    pd.testing.assert_frame_equal(obtido[esperado.columns], esperado, check_categorical=False)
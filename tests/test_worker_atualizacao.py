@@ -0,0 +1,170 @@
+"""
+Worker de atualização com relógio simulado: disparo diário às 22:00,
+agrupamento dos pedidos pendentes e trava de escritor único.
+"""
+import datetime
+
+import pytest
+
+from config import Config
+from fila_atualizacao import CONCLUIDO, ERRO, PENDENTE, TravaEscritor, caminho_trava, enfileirar, listar_jobs
+from scheduler import WorkerAtualizacao
+
+
+class RelogioSimulado:
+    """Relógio controlado pelo teste."""
+
+    def __init__(self, inicio: datetime.datetime):
+        self.agora = inicio
+
+    def __call__(self) -> datetime.datetime:
+        return self.agora
+
+    def avancar(self, **intervalo) -> None:
+        self.agora += datetime.timedelta(**intervalo)
+
+
+class AtualizacaoSimulada:
+    """Função de atualização que registra as chamadas em vez de ler a origem."""
+
+    def __init__(self, sucesso: bool = True):
+        self.sucesso = sucesso
+        self.chamadas = []
+
+    def __call__(self, forcar: bool, progresso, continuar) -> bool:
+        self.chamadas.append(forcar)
+        progresso(10, 100)
+        return self.sucesso and continuar()
+
+
+@pytest.fixture
+def relogio():
+    return RelogioSimulado(datetime.datetime(2025, 5, 1, 21, 58))
+
+
+def _worker(diretorio, relogio, executar) -> WorkerAtualizacao:
+    return WorkerAtualizacao(diretorio, relogio=relogio, executar=executar,
+                             horario=datetime.time(22, 0), intervalo_heartbeat=3600)
+
+
+def test_atualizacao_diaria_dispara_as_22h(tmp_path, relogio):
+    executar = AtualizacaoSimulada()
+    worker = _worker(tmp_path, relogio, executar)
+    assert worker.proxima == datetime.datetime(2025, 5, 1, 22, 0)
+
+    assert worker.passo() == 0
+    relogio.avancar(minutes=1, seconds=59)
+    assert worker.passo() == 0
+    assert executar.chamadas == []
+
+    relogio.avancar(seconds=1)
+    assert worker.passo() == 1
+    assert executar.chamadas == [False]
+    [job] = listar_jobs(tmp_path)
+    assert job["tipo"] == "diario" and job["estado"] == CONCLUIDO
+    assert worker.proxima == datetime.datetime(2025, 5, 2, 22, 0)
+
+    # Só dispara de novo no dia seguinte
+    relogio.avancar(hours=1)
+    assert worker.passo() == 0
+    assert len(executar.chamadas) == 1
+
+
+def test_execucao_perdida_e_recuperada_ao_reiniciar(tmp_path, relogio):
+    executar = AtualizacaoSimulada()
+    worker = _worker(tmp_path, relogio, executar)
+    relogio.avancar(minutes=2)
+    assert worker.passo() == 1
+    worker.trava.liberar()
+
+    # Worker parado durante as 22:00 do dia seguinte: a execução é feita ao reiniciar
+    relogio.avancar(days=1, hours=1)
+    reiniciado = _worker(tmp_path, relogio, executar)
+    assert reiniciado.proxima == datetime.datetime(2025, 5, 2, 22, 0)
+    assert reiniciado.passo() == 1
+    assert len(executar.chamadas) == 2
+
+
+def test_pedidos_pendentes_sao_agrupados(tmp_path, relogio):
+    executar = AtualizacaoSimulada()
+    worker = _worker(tmp_path, relogio, executar)
+
+    primeiro = enfileirar("manual", diretorio=tmp_path, relogio=relogio)
+    assert enfileirar("manual", diretorio=tmp_path, relogio=relogio) == primeiro
+    forcado = enfileirar("manual", forcar=True, diretorio=tmp_path, relogio=relogio)
+    assert forcado != primeiro
+    # Um pedido forçado pendente cobre os pedidos incrementais seguintes
+    assert enfileirar("inicial", diretorio=tmp_path, relogio=relogio) in (primeiro, forcado)
+    assert len(listar_jobs(tmp_path, [PENDENTE])) == 2
+
+    assert worker.passo() == 2
+    assert executar.chamadas == [True]
+    jobs = listar_jobs(tmp_path)
+    assert {job["estado"] for job in jobs} == {CONCLUIDO}
+    assert len({job["lote"] for job in jobs}) == 1
+
+    assert worker.passo() == 0
+    assert executar.chamadas == [True]
+
+
+def test_falha_na_atualizacao_marca_os_jobs_com_erro(tmp_path, relogio):
+    worker = _worker(tmp_path, relogio, AtualizacaoSimulada(sucesso=False))
+    enfileirar("manual", diretorio=tmp_path, relogio=relogio)
+    assert worker.passo() == 1
+    [job] = listar_jobs(tmp_path)
+    assert job["estado"] == ERRO and job["erro"]
+
+
+def test_segundo_escritor_nao_obtem_a_trava(tmp_path, relogio):
+    executar_a, executar_b = AtualizacaoSimulada(), AtualizacaoSimulada()
+    worker_a = _worker(tmp_path, relogio, executar_a)
+    worker_b = _worker(tmp_path, relogio, executar_b)
+    assert worker_a.assumir()
+    assert not worker_b.assumir()
+    assert not TravaEscritor(caminho_trava(tmp_path), "outro", relogio=relogio).adquirir()
+
+    # O worker sem a trava não atende os pedidos
+    enfileirar("manual", diretorio=tmp_path, relogio=relogio)
+    assert worker_b.passo() == 0
+    assert executar_b.chamadas == []
+    assert worker_a.passo() == 1
+
+    # Com sinal de vida dentro da validade, a trava continua com o dono
+    relogio.avancar(seconds=Config.VALIDADE_TRAVA_SEG)
+    assert not worker_b.assumir()
+    assert worker_a.assumir()
+
+    # Sem sinal de vida além da validade, a trava pode ser tomada; o antigo dono não a renova mais
+    relogio.avancar(seconds=Config.VALIDADE_TRAVA_SEG + 1)
+    assert worker_b.assumir()
+    assert not worker_a.trava.renovar()
+    assert worker_a.trava.ler()["dono"] == worker_b.trava.dono
+
+    # Liberar a trava de outro dono não tem efeito
+    worker_a.trava.liberar()
+    assert worker_a.trava.ler()["dono"] == worker_b.trava.dono
+
+
+def test_trava_perdida_durante_a_atualizacao_aborta_sem_publicar(tmp_path, relogio):
+    publicadas = []
+    worker_b = _worker(tmp_path, relogio, AtualizacaoSimulada())
+
+    def executar(forcar, progresso, continuar) -> bool:
+        progresso(10, 100)
+        # Sem sinal de vida além da validade, outro worker toma a trava e reenfileira o job
+        relogio.avancar(seconds=Config.VALIDADE_TRAVA_SEG + 1)
+        assert worker_b.assumir()
+        if continuar():
+            publicadas.append(forcar)
+        return True
+
+    worker_a = _worker(tmp_path, relogio, executar)
+    enfileirar("manual", diretorio=tmp_path, relogio=relogio)
+    assert worker_a.passo() == 0
+    assert not worker_a.ativo
+    assert publicadas == []
+    assert [job["estado"] for job in listar_jobs(tmp_path)] == [PENDENTE]
+
+    # Os jobs ficam com o novo dono da trava
+    assert worker_b.passo() == 1
+    assert [job["estado"] for job in listar_jobs(tmp_path)] == [CONCLUIDO]
@@ -1,35 +1,80 @@
-import pandas as pd
 from pathlib import Path
+from typing import Callable, Optional
 
-def atualizar_dados() -> bool:
+from alertas import avaliar_alertas
+from cache_dados import atualizar_incremental, recarregar_completo
+from config import Config
+from fontes import FonteExcel, FontePastaExcel, Progresso, criar_fonte
+from metricas import anotar, etapa, execucao
+from snapshots import criar_snapshot
+
+def atualizar_dados(forcar: bool = False, incremental: bool = True,
+                    progresso: Optional[Progresso] = None,
+                    continuar: Optional[Callable[[], bool]] = None) -> bool:
     """
-    Como estamos utilizando um arquivo Excel estático, esta função
-    simula uma atualização de dados recarregando o arquivo e salvando
-    como parquet.
+    Atualiza o cache parquet a partir da fonte configurada em
+    Config.FONTE_DADOS (planilha Excel, pasta de planilhas, PostgreSQL ou
+    SQLite). A origem só é relida quando sua impressão digital mudou desde
+    a última carga.
+    
+    A atualização é gravada em uma nova versão do dataset (ver
+    ``snapshots.criar_snapshot``), publicada apenas ao final; leitores da
+    versão anterior não são afetados.
+    
+    No modo incremental, apenas as linhas com data_hora_nf posterior ao
+    watermark (menos Config.JANELA_CORRECAO) são gravadas, como um novo
+    fragmento parquet ao lado do cache. A origem é lida em lotes
+    (Config.TAMANHO_LOTE), sem carregá-la inteira em memória.
     
+    Com Config.ALERTAS_ATIVOS, as regras de alerta são avaliadas sobre os
+    dias reprocessados (ver ``alertas.avaliar_alertas``).
+    
+    Com Config.METRICAS_ATIVAS, as etapas da atualização (leitura da origem,
+    cubo, catálogo) são registradas no log de métricas (ver ``metricas``).
+    
+    Args:
+        forcar: reconstrói todo o cache mesmo que a planilha não tenha mudado
+        incremental: grava apenas as linhas novas em vez de regravar tudo
+        progresso: chamado após cada lote lido com as linhas lidas e o total estimado
+        continuar: consultada antes de publicar a nova versão; se retornar
+            False, nada é publicado (ver ``snapshots.criar_snapshot``)
+        
     Returns:
         Boolean indicando sucesso da operação
     """
+    tipo = "completa" if forcar or not incremental else "incremental"
     try:
-        # Caminho do arquivo Excel
-        arquivo_excel = Path('dados.xlsx')
-        
-        # Verifica se o arquivo existe
-        if not arquivo_excel.exists():
-            print(f"Erro: O arquivo {arquivo_excel} não foi encontrado.")
-            return False
+        with execucao("atualizacao", tipo=tipo, fonte=Config.FONTE_DADOS):
+            fonte = criar_fonte()
             
-        # Carrega o arquivo Excel
-        df = pd.read_excel(arquivo_excel)
-        
-        # Diretório para cache
-        cache_dir = Path('data')
-        cache_dir.mkdir(exist_ok=True)
-        
-        # Salva como parquet para cache
-        df.to_parquet(cache_dir / 'dados.parquet', index=False)
+            # Verifica se a planilha existe
+            if isinstance(fonte, FonteExcel) and not fonte.caminho.exists():
+                print(f"Erro: O arquivo {fonte.caminho} não foi encontrado.")
+                return False
+            if isinstance(fonte, FontePastaExcel) and not fonte.arquivos():
+                print(f"Erro: Nenhuma planilha encontrada em {fonte.padrao}.")
+                return False
+                
+            def atualizar(cache: Path) -> int:
+                if forcar or not incremental:
+                    return recarregar_completo(fonte, cache, progresso)
+                return atualizar_incremental(fonte, cache, progresso=progresso)
+            
+            with etapa("atualizar_dataset") as registro:
+                versao, linhas = criar_snapshot(atualizar, continuar=continuar)
+                registro["linhas_saida"] = linhas
+            anotar(versao=versao)
+            print(f"Atualização {tipo}: {linhas} linhas ingeridas. Versão publicada: {versao}")
+            
+            # Falhas nos alertas não invalidam a versão já publicada
+            if Config.ALERTAS_ATIVOS and versao is not None:
+                try:
+                    with etapa("avaliar_alertas") as registro:
+                        registro["linhas_saida"] = avaliar_alertas(versao)
+                except Exception as e:
+                    print(f"Erro ao avaliar alertas: {e}")
         
         return True
     except Exception as e:
         print(f"Erro ao atualizar dados: {e}")
-        return False
\ No newline at end of file
+        return False